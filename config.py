@@ -21,6 +21,9 @@ LOG_DIR.mkdir(exist_ok=True)
 HISTORY_DIR = PROJECT_ROOT / "history"
 HISTORY_DIR.mkdir(exist_ok=True)
 
+# 本地缓存目录（同步状态等）
+CACHE_DIR = PROJECT_ROOT / ".cache"
+
 
 # ===== 邮件配置 =====
 # 邮件客户端类型: 'graph', 'imap', 'generic', 'qq'
@@ -30,6 +33,12 @@ HISTORY_DIR.mkdir(exist_ok=True)
 # - qq: QQ邮箱客户端 (QQ邮箱专用，已预配置服务器地址)
 EMAIL_CLIENT_TYPE = os.getenv("EMAIL_CLIENT_TYPE", "imap")
 
+# 多邮箱聚合（可选）：逗号分隔的客户端类型，如 "imap,qq"
+# 配置后并发从所有邮箱获取邮件，按接收时间合并并按Message-ID去重，总结邮件由第一个邮箱发送
+# 注意：qq和generic共用EMAIL_ADDRESS/EMAIL_PASSWORD，imap和graph共用OUTLOOK_EMAIL
+EMAIL_SOURCES = [t.strip().lower() for t in os.getenv("EMAIL_SOURCES", "").split(",") if t.strip()]
+EMAIL_SOURCE_TIMEOUT = int(os.getenv("EMAIL_SOURCE_TIMEOUT", "120"))  # 每个邮箱的获取超时时间（秒）
+
 # ===== Outlook配置 (当EMAIL_CLIENT_TYPE='graph'或'imap'时使用) =====
 # Outlook邮箱地址
 OUTLOOK_EMAIL = os.getenv("OUTLOOK_EMAIL", "")
@@ -39,6 +48,11 @@ OUTLOOK_CLIENT_ID = os.getenv("OUTLOOK_CLIENT_ID", "")
 OUTLOOK_CLIENT_SECRET = os.getenv("OUTLOOK_CLIENT_SECRET", "")
 OUTLOOK_TENANT_ID = os.getenv("OUTLOOK_TENANT_ID", "")
 
+# Graph访问令牌缓存：令牌在进程内复用，过期前自动刷新
+# 开启持久化后令牌保存到文件（仅当前用户可读写），进程重启后仍可复用
+OUTLOOK_TOKEN_CACHE_PERSIST = os.getenv("OUTLOOK_TOKEN_CACHE_PERSIST", "false").lower() == "true"
+OUTLOOK_TOKEN_CACHE_FILE = CACHE_DIR / "msal_token_cache.json"
+
 # IMAP密码（当EMAIL_CLIENT_TYPE='imap'时使用，用于读取邮件）
 # 对于个人账户，这应该是应用专用密码
 OUTLOOK_IMAP_PASSWORD = os.getenv("OUTLOOK_IMAP_PASSWORD", "")
@@ -68,6 +82,29 @@ EMAIL_FILTER_SUBJECT = "每日记录"  # 主题包含匹配
 # EMAIL_FILTER_SENDER = os.getenv("EMAIL_FILTER_SENDER", "")  # 发件人包含匹配（已禁用，仅使用主题过滤）
 EMAIL_SEARCH_HOURS = 24  # 搜索最近24小时的邮件
 
+# 增量同步
+# - IMAP类客户端(imap, qq, generic): 记录每个邮箱的UIDVALIDITY和已处理的最大UID，每次运行只获取新邮件
+# - Graph客户端(graph): 使用delta查询并保存deltaLink，每次运行只获取变化的邮件
+# 注意：已被之前运行获取过的邮件不会再次返回（启用本地邮件存储时从本地读取）
+EMAIL_INCREMENTAL_SYNC = os.getenv("EMAIL_INCREMENTAL_SYNC", "false").lower() == "true"
+IMAP_SYNC_STATE_FILE = CACHE_DIR / "imap_sync_state.json"
+GRAPH_DELTA_STATE_FILE = CACHE_DIR / "graph_delta_state.json"
+
+# 本地邮件存储（所有客户端类型）
+# 开启后已下载的邮件按Message-ID保存在本地，之后的运行不再重复下载和解析
+# 与增量同步同时开启时，时间窗口内的已有邮件从本地存储读取
+EMAIL_MESSAGE_STORE_ENABLED = os.getenv("EMAIL_MESSAGE_STORE_ENABLED", "true").lower() == "true"
+EMAIL_MESSAGE_STORE_DIR = CACHE_DIR / "messages"
+
+# IMAP连接池（仅IMAP类客户端: imap, qq, generic）
+# 开启后复用已登录的IMAP连接，空闲时发送NOOP保活，断开后自动重连
+IMAP_CONNECTION_POOL_ENABLED = os.getenv("IMAP_CONNECTION_POOL", "true").lower() == "true"
+
+# IMAP IDLE监听（仅定时任务模式，需要启用连接池和本地邮件存储）
+# 开启后在后台等待新邮件通知，新邮件到达时预先下载到本地存储
+EMAIL_IDLE_ENABLED = os.getenv("EMAIL_IDLE_ENABLED", "false").lower() == "true"
+EMAIL_IDLE_TIMEOUT = 29 * 60  # RFC 2177建议每29分钟重新发送IDLE
+
 
 # ===== AI配置 =====
 # Gemini API配置
@@ -75,6 +112,19 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL_NAME = "gemini-2.5-pro"  # 使用Gemini 2.5 Pro模型
 GEMINI_TEMPERATURE = 1.0
 
+# AI生成结果缓存：相同模型、温度和提示词在有效期内直接返回缓存结果（秒，0表示不缓存）
+# 任务重试或重新运行时不再重复调用API
+GEMINI_CONTENT_CACHE_TTL = int(os.getenv("GEMINI_CONTENT_CACHE_TTL", "86400"))
+
+# 流式生成：边生成边接收，输出实时写入 history/analysis_stream.md，中断后从已收到的内容续写
+AI_STREAMING_ENABLED = os.getenv("AI_STREAMING_ENABLED", "true").lower() == "true"
+
+# Gemini速率限制与重试：所有调用（包括Map-Reduce并行调用）共享一个令牌桶，
+# 失败时按带抖动的指数退避重试，服务器返回Retry-After/retryDelay时以其为准
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))  # 0表示不限制
+GEMINI_RETRY_MAX_ATTEMPTS = 5  # 最大尝试次数
+GEMINI_RETRY_DEADLINE = 600  # 重试总截止时间（秒）
+
 # AI分析提示词
 AI_ANALYSIS_PROMPT = """你是一位专业的日记分析专家。请分析以下每日总结内容：
 
@@ -93,6 +143,43 @@ AI_ANALYSIS_PROMPT = """你是一位专业的日记分析专家。请分析以
 
 请用清晰、有条理的方式组织你的分析。"""
 
+# 提示词token预算：调用前先计算提示词token数（API不可用时本地估算），
+# 超过预算时压缩邮件内容（删除引用的回复原文和多余空白），仍超过时使用Map-Reduce分块
+# Gemini 2.5 Pro上下文为1M tokens，预留输出空间
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "900000"))
+
+# Map-Reduce分析：输入估算超过阈值时，按token预算分块并行总结，再合并各块的总结
+# 单块越小并行度越高，总耗时取决于最大的块而不是输入总长度
+AI_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("AI_MAP_REDUCE_THRESHOLD_TOKENS", "200000"))
+AI_CHUNK_MAX_TOKENS = int(os.getenv("AI_CHUNK_MAX_TOKENS", "50000"))  # 每块的最大token数
+AI_MAP_MAX_WORKERS = int(os.getenv("AI_MAP_MAX_WORKERS", "4"))  # 并行调用的最大数量
+
+# 分块总结提示词
+AI_MAP_PROMPT = """你是一位专业的日记分析专家。以下是今天每日总结内容的第 {chunk_index}/{chunk_count} 部分：
+
+{chunk_contents}
+
+请按时间顺序完整列出这一部分的记录，不要遗漏任何细节，并简要记录其中的情绪、工作/学习进展和值得关注的事项。
+只整理这一部分的内容，整体分析将在合并所有部分后进行。"""
+
+# 合并提示词
+AI_REDUCE_PROMPT = """你是一位专业的日记分析专家。以下是今天每日总结内容按时间顺序分部分整理的结果：
+
+{chunk_summaries}
+
+请按照以下要求进行分析：
+
+1. **完整列出记录**：将所有部分的记录按照时间顺序完整地合并列出，不要遗漏任何细节。
+
+2. **深度分析**：作为日记分析专家，请提供有洞见的总结与分析，包括：
+   - 主要活动和事件的总结
+   - 情绪和心理状态的观察
+   - 工作/学习进展的评估
+   - 值得关注的模式或趋势
+   - 建设性的建议和反思
+
+请用清晰、有条理的方式组织你的分析。"""
+
 
 # ===== 调度器配置 =====
 # 时区设置（东八区）
@@ -126,6 +213,16 @@ SAVE_HISTORY = os.getenv("SAVE_HISTORY", "true").lower() == "true"
 # - detailed: 保存完整的邮件内容和分析结果
 HISTORY_LEVEL = os.getenv("HISTORY_LEVEL", "detailed")
 
+# 是否每天把历史记录目录同步到Cloudflare R2（需要配置R2_*环境变量，只上传新增或变化的文件）
+HISTORY_ARCHIVE_ENABLED = os.getenv("HISTORY_ARCHIVE_ENABLED", "false").lower() == "true"
+
+# 历史记录在存储桶中的前缀
+HISTORY_ARCHIVE_PREFIX = os.getenv("HISTORY_ARCHIVE_PREFIX", "history/")
+
+# 历史记录归档时间（定时任务模式下每天执行）
+HISTORY_ARCHIVE_HOUR = int(os.getenv("HISTORY_ARCHIVE_HOUR", "2"))
+HISTORY_ARCHIVE_MINUTE = int(os.getenv("HISTORY_ARCHIVE_MINUTE", "0"))
+
 
 # ===== 错误处理配置 =====
 # 重试次数
@@ -136,8 +233,9 @@ RETRY_DELAY = 5
 
 
 # ===== 发送邮件配置 =====
-# 收件人（总结结果发送到这个邮箱）
+# 收件人（总结结果发送到这个邮箱，多个收件人用逗号分隔，每人单独发送一封）
 SUMMARY_RECIPIENT = os.getenv("SUMMARY_RECIPIENT", "")
+SUMMARY_RECIPIENTS = [addr.strip() for addr in SUMMARY_RECIPIENT.split(",") if addr.strip()]
 
 # 邮件主题模板
 EMAIL_SUBJECT_TEMPLATE = "每日总结汇总 - {date}"
@@ -10,20 +10,26 @@
 import sys
 import signal
 import logging
+import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import json
-from typing import List
+from typing import List, Optional, Tuple
 
 # 添加workflow-tools到Python路径
 sys.path.insert(0, str(Path(__file__).parent / "workflow-tools"))
 
-from workflow_tools.email.outlook import OutlookClient
+from workflow_tools.email.outlook import OutlookClient, GraphDeltaState
 from workflow_tools.email.outlook.outlook_imap_client import OutlookIMAPClient
-from workflow_tools.email import GenericIMAPClient, QQIMAPClient
+from workflow_tools.email import GenericIMAPClient, QQIMAPClient, MultiSourceEmailClient
+from workflow_tools.email.base import EmailResult, IMAPSyncState, MessageStore, OutgoingEmail
 from workflow_tools.ai_models.gemini import GeminiClient
+from workflow_tools.ai_models.base import MapReduceSummarizer
+from workflow_tools.exceptions import GeminiStreamError
 from workflow_tools.scheduler import APSchedulerClient
 from workflow_tools.utils.config_manager import ConfigManager
+from workflow_tools.utils.token_utils import compress_text
+from workflow_tools.utils.rate_limiter import RateLimiter, RetryPolicy
 
 import config
 
@@ -41,6 +47,14 @@ class DailySummaryWorkflow:
         self.ai_client = None
         self.scheduler = None
 
+        # 邮件客户端的连接不是线程安全的，定时任务和IDLE监听线程共用此锁
+        self._email_lock = threading.Lock()
+        self._idle_thread = None
+        self._stop_event = threading.Event()
+
+        # 本次运行的AI分析统计（提示词token数等），写入历史记录
+        self.analysis_stats = {}
+
         self.logger.info("=" * 80)
         self.logger.info("每日总结工作流启动")
         self.logger.info("=" * 80)
@@ -81,56 +95,47 @@ class DailySummaryWorkflow:
         try:
             self.logger.info("正在初始化客户端...")
 
-            # 初始化邮件客户端(根据配置选择类型)
-            client_type = config.EMAIL_CLIENT_TYPE.lower()
-            
-            if client_type == 'imap':
-                self.logger.info("使用Outlook IMAP客户端...")
-                self.email_client = OutlookIMAPClient(
-                    email_address=config.OUTLOOK_EMAIL,
-                    password=config.OUTLOOK_IMAP_PASSWORD or config.OUTLOOK_SMTP_PASSWORD
-                )
-                self.logger.info("✓ Outlook IMAP邮件客户端初始化成功")
-            elif client_type == 'graph':
-                self.logger.info("使用Outlook Graph API客户端...")
-                self.email_client = OutlookClient(
-                    email_address=config.OUTLOOK_EMAIL,
-                    client_id=config.OUTLOOK_CLIENT_ID,
-                    client_secret=config.OUTLOOK_CLIENT_SECRET,
-                    tenant_id=config.OUTLOOK_TENANT_ID,
-                    smtp_password=config.OUTLOOK_SMTP_PASSWORD
-                )
-                self.logger.info("✓ Outlook Graph API邮件客户端初始化成功")
-            elif client_type == 'qq':
-                self.logger.info("使用QQ邮箱客户端...")
-                self.email_client = QQIMAPClient(
-                    email_address=config.EMAIL_ADDRESS,
-                    password=config.EMAIL_PASSWORD,
-                    use_ssl_for_smtp=(config.SMTP_USE_SSL.lower() == 'true')
-                )
-                self.logger.info("✓ QQ邮箱客户端初始化成功")
-            elif client_type == 'generic':
-                self.logger.info("使用通用IMAP客户端...")
-                self.email_client = GenericIMAPClient(
-                    email_address=config.EMAIL_ADDRESS,
-                    password=config.EMAIL_PASSWORD,
-                    imap_server=config.IMAP_SERVER,
-                    imap_port=int(config.IMAP_PORT),
-                    smtp_server=config.SMTP_SERVER,
-                    smtp_port=int(config.SMTP_PORT),
-                    use_ssl_for_smtp=(config.SMTP_USE_SSL.lower() == 'true')
-                )
-                self.logger.info("✓ 通用IMAP邮件客户端初始化成功")
+            # 初始化邮件客户端(根据配置选择类型，配置EMAIL_SOURCES时聚合多个邮箱)
+            client_types = config.EMAIL_SOURCES or [config.EMAIL_CLIENT_TYPE.lower()]
+
+            # IMAP增量同步状态（仅IMAP类客户端使用）
+            sync_state = None
+            if config.EMAIL_INCREMENTAL_SYNC and any(t in ('imap', 'qq', 'generic') for t in client_types):
+                sync_state = IMAPSyncState(config.IMAP_SYNC_STATE_FILE)
+                self.logger.info(f"已启用IMAP增量同步，状态文件: {config.IMAP_SYNC_STATE_FILE}")
+
+            # Graph增量查询状态（仅Graph客户端使用）
+            delta_state = None
+            if config.EMAIL_INCREMENTAL_SYNC and 'graph' in client_types:
+                delta_state = GraphDeltaState(config.GRAPH_DELTA_STATE_FILE)
+                self.logger.info(f"已启用Graph增量查询，状态文件: {config.GRAPH_DELTA_STATE_FILE}")
+
+            # 本地邮件存储
+            message_store = None
+            if config.EMAIL_MESSAGE_STORE_ENABLED:
+                message_store = MessageStore(config.EMAIL_MESSAGE_STORE_DIR)
+                self.logger.info(f"已启用本地邮件存储: {config.EMAIL_MESSAGE_STORE_DIR}")
+
+            sources = {
+                client_type: self._create_email_client(client_type, sync_state, delta_state, message_store)
+                for client_type in client_types
+            }
+            if len(sources) == 1:
+                self.email_client = next(iter(sources.values()))
             else:
-                raise ValueError(
-                    f"不支持的邮件客户端类型: {client_type}. "
-                    f"请使用'imap', 'graph', 'qq'或'generic'"
-                )
+                self.email_client = MultiSourceEmailClient(sources, timeout=config.EMAIL_SOURCE_TIMEOUT)
+                self.logger.info(f"✓ 多邮箱聚合已启用: {', '.join(sources)}")
 
             # 初始化AI客户端
             self.ai_client = GeminiClient(
                 api_key=config.GEMINI_API_KEY,
-                model_name=config.GEMINI_MODEL_NAME
+                model_name=config.GEMINI_MODEL_NAME,
+                content_cache_ttl=config.GEMINI_CONTENT_CACHE_TTL,
+                retry_policy=RetryPolicy(
+                    max_attempts=config.GEMINI_RETRY_MAX_ATTEMPTS,
+                    deadline=config.GEMINI_RETRY_DEADLINE,
+                    rate_limiter=RateLimiter.per_minute(config.GEMINI_REQUESTS_PER_MINUTE)
+                )
             )
             self.logger.info("✓ AI客户端初始化成功")
 
@@ -144,19 +149,94 @@ class DailySummaryWorkflow:
             self.logger.error(f"✗ 客户端初始化失败: {str(e)}", exc_info=True)
             return False
 
+    def _create_email_client(self, client_type, sync_state, delta_state, message_store):
+        """
+        创建指定类型的邮件客户端
+
+        Args:
+            client_type: 客户端类型（'imap', 'graph', 'qq', 'generic'）
+            sync_state: IMAP增量同步状态
+            delta_state: Graph增量查询状态
+            message_store: 本地邮件存储
+
+        Returns:
+            邮件客户端
+        """
+        if client_type == 'imap':
+            self.logger.info("使用Outlook IMAP客户端...")
+            client = OutlookIMAPClient(
+                email_address=config.OUTLOOK_EMAIL,
+                password=config.OUTLOOK_IMAP_PASSWORD or config.OUTLOOK_SMTP_PASSWORD,
+                sync_state=sync_state,
+                message_store=message_store,
+                use_connection_pool=config.IMAP_CONNECTION_POOL_ENABLED
+            )
+            self.logger.info("✓ Outlook IMAP邮件客户端初始化成功")
+        elif client_type == 'graph':
+            self.logger.info("使用Outlook Graph API客户端...")
+            client = OutlookClient(
+                email_address=config.OUTLOOK_EMAIL,
+                client_id=config.OUTLOOK_CLIENT_ID,
+                client_secret=config.OUTLOOK_CLIENT_SECRET,
+                tenant_id=config.OUTLOOK_TENANT_ID,
+                smtp_password=config.OUTLOOK_SMTP_PASSWORD,
+                message_store=message_store,
+                delta_state=delta_state,
+                token_cache_file=config.OUTLOOK_TOKEN_CACHE_FILE if config.OUTLOOK_TOKEN_CACHE_PERSIST else None
+            )
+            self.logger.info("✓ Outlook Graph API邮件客户端初始化成功")
+        elif client_type == 'qq':
+            self.logger.info("使用QQ邮箱客户端...")
+            client = QQIMAPClient(
+                email_address=config.EMAIL_ADDRESS,
+                password=config.EMAIL_PASSWORD,
+                use_ssl_for_smtp=(config.SMTP_USE_SSL.lower() == 'true'),
+                sync_state=sync_state,
+                message_store=message_store,
+                use_connection_pool=config.IMAP_CONNECTION_POOL_ENABLED
+            )
+            self.logger.info("✓ QQ邮箱客户端初始化成功")
+        elif client_type == 'generic':
+            self.logger.info("使用通用IMAP客户端...")
+            client = GenericIMAPClient(
+                email_address=config.EMAIL_ADDRESS,
+                password=config.EMAIL_PASSWORD,
+                imap_server=config.IMAP_SERVER,
+                imap_port=int(config.IMAP_PORT),
+                smtp_server=config.SMTP_SERVER,
+                smtp_port=int(config.SMTP_PORT),
+                use_ssl_for_smtp=(config.SMTP_USE_SSL.lower() == 'true'),
+                sync_state=sync_state,
+                message_store=message_store,
+                use_connection_pool=config.IMAP_CONNECTION_POOL_ENABLED
+            )
+            self.logger.info("✓ 通用IMAP邮件客户端初始化成功")
+        else:
+            raise ValueError(
+                f"不支持的邮件客户端类型: {client_type}. "
+                f"请使用'imap', 'graph', 'qq'或'generic'"
+            )
+
+        return client
+
     def process_daily_summary(self):
         """处理每日总结的主要逻辑"""
         self.logger.info("=" * 80)
         self.logger.info(f"开始执行每日总结任务 - {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}")
         self.logger.info("=" * 80)
 
+        self.analysis_stats = {}
+
         try:
             # 1. 读取邮件
             self.logger.info("步骤 1/4: 读取邮件...")
-            emails = self._fetch_emails()
+            fetch_result = self._fetch_emails()
+            emails = fetch_result.messages if fetch_result else []
 
             if not emails:
                 self.logger.info("未找到符合条件的邮件，本次任务结束")
+                if fetch_result:
+                    self._commit_sync_state(fetch_result)
                 self._save_history(success=True, email_count=0, summary="无邮件")
                 return
 
@@ -164,11 +244,11 @@ class DailySummaryWorkflow:
 
             # 2. 整理邮件内容
             self.logger.info("步骤 2/4: 整理邮件内容...")
-            email_contents = self._organize_emails(emails)
+            email_sections = self._organize_emails(emails)
 
             # 3. AI分析
             self.logger.info("步骤 3/4: 使用Gemini AI进行分析...")
-            analysis_result = self._analyze_with_ai(email_contents)
+            analysis_result = self._analyze_with_ai(email_sections)
 
             if not analysis_result:
                 self.logger.error("AI分析失败，本次任务结束")
@@ -180,6 +260,8 @@ class DailySummaryWorkflow:
             success = self._send_summary_email(analysis_result)
 
             if success:
+                # 总结发送成功后才保存增量同步状态，之前任何一步失败时下次运行会重新获取这些邮件
+                self._commit_sync_state(fetch_result)
                 self.logger.info("✓ 每日总结任务完成！")
                 self._save_history(
                     success=True,
@@ -202,57 +284,71 @@ class DailySummaryWorkflow:
         finally:
             self.logger.info("=" * 80)
 
-    def _fetch_emails(self) -> List:
+    def _fetch_emails(self) -> Optional[EmailResult]:
         """
         获取符合条件的邮件
 
         Returns:
-            邮件列表
+            获取结果，重试后仍失败时返回None
         """
         max_retries = config.MAX_RETRIES
 
-        for attempt in range(max_retries):
-            try:
-                # 连接到Outlook
-                self.email_client.connect()
-
+        with self._email_lock:
+            for attempt in range(max_retries):
                 try:
-                    # 计算时间范围（最近24小时）
-                    since_date = datetime.now(timezone.utc) - timedelta(hours=config.EMAIL_SEARCH_HOURS)
-
-                    # 获取邮件（仅使用主题过滤）
-                    result = self.email_client.fetch_emails(
-                        subject=config.EMAIL_FILTER_SUBJECT,
-                        since_date=since_date
-                    )
-
-                    if result.success:
-                        return result.messages
-                    else:
-                        self.logger.error(f"获取邮件失败: {result.error}")
-                        if attempt < max_retries - 1:
-                            self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
-                            import time
-                            time.sleep(config.RETRY_DELAY)
-
-                finally:
-                    # 确保在任何情况下都断开连接
-                    try:
-                        self.email_client.disconnect()
-                    except Exception as disconnect_error:
-                        self.logger.warning(f"断开连接时出错: {str(disconnect_error)}")
+                    # 连接到Outlook
+                    self.email_client.connect()
 
-            except Exception as e:
-                self.logger.error(f"获取邮件时发生异常: {str(e)}", exc_info=True)
-                if attempt < max_retries - 1:
-                    self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
-                    import time
-                    time.sleep(config.RETRY_DELAY)
+                    try:
+                        # 计算时间范围（最近24小时）
+                        since_date = datetime.now(timezone.utc) - timedelta(hours=config.EMAIL_SEARCH_HOURS)
+
+                        # 获取邮件（仅使用主题过滤）
+                        result = self.email_client.fetch_emails(
+                            subject=config.EMAIL_FILTER_SUBJECT,
+                            since_date=since_date
+                        )
+
+                        if result.success:
+                            return result
+                        else:
+                            self.logger.error(f"获取邮件失败: {result.error}")
+                            if attempt < max_retries - 1:
+                                self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
+                                import time
+                                time.sleep(config.RETRY_DELAY)
+
+                    finally:
+                        # 确保在任何情况下都断开连接
+                        try:
+                            self.email_client.disconnect()
+                        except Exception as disconnect_error:
+                            self.logger.warning(f"断开连接时出错: {str(disconnect_error)}")
+
+                except Exception as e:
+                    self.logger.error(f"获取邮件时发生异常: {str(e)}", exc_info=True)
+                    if attempt < max_retries - 1:
+                        self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
+                        import time
+                        time.sleep(config.RETRY_DELAY)
 
         self.logger.error(f"获取邮件失败（已重试{max_retries}次）")
-        return []
+        return None
 
-    def _organize_emails(self, emails: List) -> str:
+    def _commit_sync_state(self, fetch_result: EmailResult):
+        """
+        确认邮件已处理完成，保存增量同步状态（IMAP UID高水位、Graph deltaLink）
+
+        Args:
+            fetch_result: _fetch_emails返回的获取结果
+        """
+        try:
+            with self._email_lock:
+                self.email_client.commit_sync_state(fetch_result)
+        except Exception as e:
+            self.logger.warning(f"保存增量同步状态失败，下次运行将重新获取这些邮件: {str(e)}")
+
+    def _organize_emails(self, emails: List) -> List[str]:
         """
         整理邮件内容（按时间顺序）
 
@@ -260,7 +356,7 @@ class DailySummaryWorkflow:
             emails: 邮件列表
 
         Returns:
-            整理后的内容字符串
+            每封邮件格式化后的内容（Map-Reduce分块时不会拆开单封邮件）
         """
         # 按接收时间排序（从早到晚）
         sorted_emails = sorted(emails, key=lambda x: x.received_time)
@@ -281,53 +377,174 @@ class DailySummaryWorkflow:
 """
             organized_content.append(content)
 
-        return "\n".join(organized_content)
+        return organized_content
 
-    def _analyze_with_ai(self, email_contents: str) -> str:
+    def _analyze_with_ai(self, email_sections: List[str]) -> str:
         """
         使用AI分析邮件内容
 
+        内容估算超过AI_MAP_REDUCE_THRESHOLD_TOKENS时使用Map-Reduce分块并行分析，
+        否则整体调用一次（启用AI_STREAMING_ENABLED时使用流式生成，中断后由客户端从已收到的内容续写）
+
         Args:
-            email_contents: 邮件内容
+            email_sections: 每封邮件格式化后的内容
 
         Returns:
             分析结果
         """
-        max_retries = config.MAX_RETRIES
-
-        for attempt in range(max_retries):
-            try:
-                # 构建提示词
-                prompt = config.AI_ANALYSIS_PROMPT.format(email_contents=email_contents)
+        # 预检提示词大小，超过预算时压缩
+        email_sections, prompt, prompt_tokens = self._preflight_prompt(email_sections)
+
+        summarizer = None
+        map_reduce_threshold = min(config.AI_MAP_REDUCE_THRESHOLD_TOKENS, config.AI_PROMPT_TOKEN_BUDGET)
+        if prompt_tokens > map_reduce_threshold:
+            self.logger.info(
+                f"内容约 {prompt_tokens} tokens，超过阈值 {map_reduce_threshold}，使用Map-Reduce分析"
+            )
+            self.analysis_stats["map_reduce"] = True
+            summarizer = MapReduceSummarizer(
+                self.ai_client,
+                map_prompt=config.AI_MAP_PROMPT,
+                reduce_prompt=config.AI_REDUCE_PROMPT,
+                max_chunk_tokens=config.AI_CHUNK_MAX_TOKENS,
+                max_workers=config.AI_MAP_MAX_WORKERS
+            )
 
-                # 调用Gemini AI
+        # 限流和临时错误由GeminiClient的重试策略统一处理，这里不再重试
+        try:
+            # 调用Gemini AI
+            if summarizer is not None:
+                result = summarizer.summarize(email_sections)
+            elif config.AI_STREAMING_ENABLED:
+                return self._stream_analysis(prompt)
+            else:
                 result = self.ai_client.generate_content(prompt)
 
-                if result.success:
-                    return result.content
-                else:
-                    self.logger.error(f"AI分析失败: {result.error}")
-                    if attempt < max_retries - 1:
-                        self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
-                        import time
-                        time.sleep(config.RETRY_DELAY)
-                    continue
+            if result.success:
+                return result.content
 
-            except Exception as e:
-                self.logger.error(f"AI分析时发生异常: {str(e)}", exc_info=True)
-                if attempt < max_retries - 1:
-                    self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
-                    import time
-                    time.sleep(config.RETRY_DELAY)
-                continue
+            self.logger.error(f"AI分析失败: {result.error}")
+
+        except GeminiStreamError as e:
+            self.logger.warning(f"流式AI分析中断（已收到 {len(e.partial_content)} 个字符），从已收到的内容续写: {str(e)}")
+            return self._resume_analysis(prompt, e.partial_content)
+
+        except Exception as e:
+            self.logger.error(f"AI分析时发生异常: {str(e)}", exc_info=True)
 
-        self.logger.error(f"AI分析失败（已重试{max_retries}次）")
         return ""
 
+    def _preflight_prompt(self, email_sections: List[str]) -> Tuple[List[str], str, int]:
+        """
+        调用AI前检查提示词大小
+
+        计算token数并记录到本次运行的统计中；超过AI_PROMPT_TOKEN_BUDGET时先压缩邮件内容
+        （删除引用的回复原文和多余空白），压缩后仍超过预算的内容由Map-Reduce分块处理
+
+        Args:
+            email_sections: 每封邮件格式化后的内容
+
+        Returns:
+            (邮件内容, 提示词, 提示词token数)
+        """
+        prompt = config.AI_ANALYSIS_PROMPT.format(email_contents="\n".join(email_sections))
+        token_count = self.ai_client.count_tokens(prompt)
+        self.analysis_stats["prompt_tokens"] = token_count.total_tokens
+        self.analysis_stats["prompt_tokens_estimated"] = token_count.estimated
+        self.logger.info(
+            f"提示词共 {token_count.total_tokens} tokens"
+            f"{'（本地估算）' if token_count.estimated else ''}，预算 {config.AI_PROMPT_TOKEN_BUDGET}"
+        )
+
+        if token_count.total_tokens <= config.AI_PROMPT_TOKEN_BUDGET:
+            return email_sections, prompt, token_count.total_tokens
+
+        email_sections = [compress_text(section) for section in email_sections]
+        prompt = config.AI_ANALYSIS_PROMPT.format(email_contents="\n".join(email_sections))
+        token_count = self.ai_client.count_tokens(prompt)
+        self.analysis_stats["compressed_prompt_tokens"] = token_count.total_tokens
+        self.logger.info(f"提示词超过预算，压缩后共 {token_count.total_tokens} tokens")
+
+        return email_sections, prompt, token_count.total_tokens
+
+    def _resume_analysis(self, prompt: str, partial_content: str) -> str:
+        """
+        流式分析中断后续写一次，续写仍失败时改用非流式调用重新生成
+
+        Args:
+            prompt: 分析提示词
+            partial_content: 中断前已收到的内容
+
+        Returns:
+            分析结果，全部失败时返回空字符串
+        """
+        try:
+            return self._stream_analysis(prompt, resume_from=partial_content)
+        except GeminiStreamError as e:
+            self.logger.warning(f"流式续写失败，改用非流式调用: {str(e)}")
+        except Exception as e:
+            self.logger.warning(f"流式续写时发生异常，改用非流式调用: {str(e)}")
+
+        try:
+            result = self.ai_client.generate_content(prompt)
+            if result.success:
+                return result.content
+            self.logger.error(f"AI分析失败: {result.error}")
+        except Exception as e:
+            self.logger.error(f"AI分析时发生异常: {str(e)}", exc_info=True)
+        return ""
+
+    def _stream_analysis(self, prompt: str, resume_from: str = "") -> str:
+        """
+        流式调用AI分析
+
+        收到的内容实时写入 history/analysis_stream.md（启用SAVE_HISTORY时），
+        生成过程中即可查看已输出的部分
+
+        Args:
+            prompt: 分析提示词
+            resume_from: 之前中断时已收到的内容，提供时在其后续写
+
+        Returns:
+            完整的分析结果
+
+        Raises:
+            GeminiStreamError: 生成中断，partial_content为已收到的内容
+        """
+        import time
+        start_time = time.monotonic()
+        parts = [resume_from] if resume_from else []
+        received_new = False
+
+        stream_file = None
+        if config.SAVE_HISTORY:
+            stream_file = open(config.HISTORY_DIR / "analysis_stream.md", 'w', encoding='utf-8')
+            stream_file.write(resume_from)
+
+        try:
+            for text in self.ai_client.generate_content_stream(prompt, resume_from=resume_from):
+                if not received_new:
+                    received_new = True
+                    self.logger.info(f"收到首段AI输出，耗时 {time.monotonic() - start_time:.1f}秒")
+                parts.append(text)
+                if stream_file is not None:
+                    stream_file.write(text)
+                    stream_file.flush()
+        finally:
+            if stream_file is not None:
+                stream_file.close()
+
+        content = "".join(parts).strip()
+        self.logger.info(f"流式AI分析完成: {len(content)} 个字符，耗时 {time.monotonic() - start_time:.1f}秒")
+        return content
+
     def _send_summary_email(self, summary: str) -> bool:
         """
         发送总结邮件
 
+        每个收件人单独发送一封，所有邮件通过同一个SMTP会话发送，
+        重试时只重发失败的收件人
+
         Args:
             summary: 总结内容
 
@@ -336,27 +553,32 @@ class DailySummaryWorkflow:
         """
         max_retries = config.MAX_RETRIES
 
+        # 构建邮件主题
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        subject = config.EMAIL_SUBJECT_TEMPLATE.format(date=today)
+
+        pending = [
+            OutgoingEmail(to=[recipient], subject=subject, body=summary)
+            for recipient in config.SUMMARY_RECIPIENTS
+        ]
+        if not pending:
+            self.logger.error("未配置总结收件人(SUMMARY_RECIPIENT)")
+            return False
+
         for attempt in range(max_retries):
             try:
-                # 构建邮件主题
-                today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-                subject = config.EMAIL_SUBJECT_TEMPLATE.format(date=today)
-
-                # 发送邮件
-                success = self.email_client.send_email(
-                    to=[config.SUMMARY_RECIPIENT],
-                    subject=subject,
-                    body=summary
-                )
+                result = self.email_client.send_many(pending)
 
-                if success:
+                if result.success:
                     return True
-                else:
-                    if attempt < max_retries - 1:
-                        self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
-                        import time
-                        time.sleep(config.RETRY_DELAY)
-                    continue
+
+                self.logger.error(f"发送邮件失败: {result.error}")
+                pending = [item['email'] for item in result.metadata['failed']]
+                if attempt < max_retries - 1:
+                    self.logger.info(f"将在{config.RETRY_DELAY}秒后重试...")
+                    import time
+                    time.sleep(config.RETRY_DELAY)
+                continue
 
             except Exception as e:
                 self.logger.error(f"发送邮件时发生异常: {str(e)}", exc_info=True)
@@ -393,6 +615,8 @@ class DailySummaryWorkflow:
                 "success": success,
                 "email_count": email_count
             }
+            if self.analysis_stats:
+                history_data["analysis"] = self.analysis_stats
 
             # 根据历史记录级别保存不同详细程度的信息
             if config.HISTORY_LEVEL == "minimal":
@@ -435,6 +659,82 @@ class DailySummaryWorkflow:
         except Exception as e:
             self.logger.error(f"保存历史记录失败: {str(e)}", exc_info=True)
 
+    def archive_history(self):
+        """把历史记录目录同步到Cloudflare R2（只上传新增或变化的文件）"""
+        try:
+            # boto3是可选依赖，只在启用归档时导入
+            from workflow_tools.storage.cloudflare_r2 import R2Client
+
+            self.logger.info(f"正在归档历史记录到R2: {config.HISTORY_ARCHIVE_PREFIX}")
+            result = R2Client().sync_directory(config.HISTORY_DIR, prefix=config.HISTORY_ARCHIVE_PREFIX)
+
+            if result.success:
+                self.logger.info(
+                    f"✓ 历史记录归档完成: 上传 {len(result.metadata['uploaded'])} 个，"
+                    f"未变化 {len(result.metadata['skipped'])} 个"
+                )
+            else:
+                self.logger.error(f"✗ 历史记录归档失败: {result.error}")
+
+        except Exception as e:
+            self.logger.error(f"✗ 历史记录归档失败: {str(e)}", exc_info=True)
+
+    def start_idle_watcher(self):
+        """启动IMAP IDLE监听线程，新邮件到达时预先获取到本地邮件存储"""
+        if not hasattr(self.email_client, 'wait_for_new_mail') or \
+                getattr(self.email_client, 'connection_pool', None) is None:
+            self.logger.warning("当前邮件客户端未启用IMAP连接池，跳过IDLE监听")
+            return
+        if not config.EMAIL_MESSAGE_STORE_ENABLED:
+            self.logger.warning("IDLE预取需要启用本地邮件存储(EMAIL_MESSAGE_STORE_ENABLED)，跳过IDLE监听")
+            return
+
+        self._idle_thread = threading.Thread(
+            target=self._watch_new_mail,
+            name="imap-idle-watcher",
+            daemon=True
+        )
+        self._idle_thread.start()
+        self.logger.info("✓ IMAP IDLE监听已启动")
+
+    def _watch_new_mail(self):
+        """IDLE监听循环：收到新邮件通知后获取邮件，写入本地存储供定时任务直接使用"""
+        while not self._stop_event.is_set():
+            try:
+                if not self.email_client.wait_for_new_mail(config.EMAIL_IDLE_TIMEOUT):
+                    continue
+
+                self.logger.info("收到新邮件通知，正在预先获取...")
+                since_date = datetime.now(timezone.utc) - timedelta(hours=config.EMAIL_SEARCH_HOURS)
+                with self._email_lock:
+                    try:
+                        result = self.email_client.fetch_emails(
+                            subject=config.EMAIL_FILTER_SUBJECT,
+                            since_date=since_date
+                        )
+                    finally:
+                        self.email_client.disconnect()
+
+                if result.success:
+                    self.logger.info(f"预先获取完成: {len(result.messages)} 封邮件")
+                else:
+                    self.logger.warning(f"预先获取邮件失败: {result.error}")
+
+            except Exception as e:
+                self.logger.warning(f"IDLE监听出错: {str(e)}")
+                self._stop_event.wait(config.RETRY_DELAY)
+
+    def _shutdown(self):
+        """停止调度器和后台线程，释放邮件连接"""
+        self._stop_event.set()
+        if self.scheduler:
+            self.scheduler.shutdown()
+        if self.email_client:
+            try:
+                self.email_client.close()
+            except Exception as e:
+                self.logger.warning(f"关闭邮件客户端时出错: {str(e)}")
+
     def setup_schedule(self):
         """设置定时任务"""
         try:
@@ -448,6 +748,18 @@ class DailySummaryWorkflow:
                 job_id='daily_summary_job'
             )
 
+            if config.HISTORY_ARCHIVE_ENABLED:
+                self.scheduler.add_job(
+                    func=self.archive_history,
+                    trigger='cron',
+                    hour=config.HISTORY_ARCHIVE_HOUR,
+                    minute=config.HISTORY_ARCHIVE_MINUTE,
+                    job_id='history_archive_job'
+                )
+                self.logger.info(
+                    f"✓ 历史记录归档任务: 每天 {config.HISTORY_ARCHIVE_HOUR}:{config.HISTORY_ARCHIVE_MINUTE:02d}"
+                )
+
             self.logger.info("✓ 定时任务设置成功")
 
         except Exception as e:
@@ -471,6 +783,8 @@ class DailySummaryWorkflow:
                 # 立即执行一次任务
                 self.logger.info("执行模式: 立即执行一次")
                 self.process_daily_summary()
+                if config.HISTORY_ARCHIVE_ENABLED:
+                    self.archive_history()
                 self.logger.info("任务执行完成，程序退出")
                 sys.exit(0)
             else:
@@ -482,6 +796,10 @@ class DailySummaryWorkflow:
 
                 # 启动调度器
                 self.scheduler.start()
+
+                # 通过IMAP IDLE实时预取新邮件（可选）
+                if config.EMAIL_IDLE_ENABLED:
+                    self.start_idle_watcher()
                 self.logger.info("调度器已启动，等待任务执行...")
                 self.logger.info(f"下次执行时间: 每天 {config.SCHEDULE_HOUR}:{config.SCHEDULE_MINUTE:02d} ({config.TIMEZONE})")
 
@@ -492,15 +810,13 @@ class DailySummaryWorkflow:
 
         except (KeyboardInterrupt, SystemExit):
             self.logger.info("收到退出信号，正在关闭...")
-            if self.scheduler:
-                self.scheduler.shutdown()
+            self._shutdown()
             self.logger.info("程序已退出")
             sys.exit(0)
 
         except Exception as e:
             self.logger.error(f"程序运行时发生错误: {str(e)}", exc_info=True)
-            if self.scheduler:
-                self.scheduler.shutdown()
+            self._shutdown()
             sys.exit(1)
 
 
@@ -95,6 +95,7 @@ setup(
         'notes': ['notion-client>=2.0.0'],
         'storage': ['boto3>=1.26.0', 'botocore>=1.29.0'],
         'email': ['msal>=1.20.0', 'requests>=2.28.0'],
+        'async': ['aiohttp>=3.8.0'],
         'scheduler': ['APScheduler>=3.10.0', 'pytz>=2023.3'],
         'utils': ['ratelimit>=2.2.0'],
         'dev': ['pytest>=7.0.0', 'pytest-mock>=3.0.0'],
@@ -105,6 +106,7 @@ setup(
             'botocore>=1.29.0',
             'msal>=1.20.0',
             'requests>=2.28.0',
+            'aiohttp>=3.8.0',
             'APScheduler>=3.10.0',
             'pytz>=2023.3',
             'ratelimit>=2.2.0'
@@ -0,0 +1,306 @@
+"""
+测试异步邮件客户端
+使用本地asyncio服务器模拟IMAP和SMTP服务（不使用TLS）
+"""
+
+import asyncio
+import base64
+import re
+import threading
+from email.mime.text import MIMEText
+
+from workflow_tools.email.base.async_email_base import SyncEmailClientAdapter
+from workflow_tools.email.base.async_imap_client import AsyncIMAPClient
+from workflow_tools.email.base.async_smtp_session import AsyncSMTPSession
+from workflow_tools.email.base.email_base import OutgoingEmail
+from workflow_tools.email.base.smtp_session import build_message
+
+
+def _raw_email(subject: str, sender: str, body: str, day: int) -> bytes:
+    """构造原始邮件"""
+    return (
+        f"From: {sender}\r\n"
+        f"To: me@example.com\r\n"
+        f"Subject: {subject}\r\n"
+        f"Date: {day:02d} Oct 2025 08:00:00 +0000\r\n"
+        f"Message-ID: <{day}@example.com>\r\n"
+        f"\r\n"
+        f"{body}\r\n"
+    ).encode('utf-8')
+
+
+MAILBOX = {
+    b'101': _raw_email("Daily report", "boss@example.com", "first", 1),
+    b'102': _raw_email("Lunch", "friend@example.com", "second", 2),
+    b'103': _raw_email("Daily report 2", "boss@example.com", "third", 3),
+}
+
+
+def _expand(message_set: bytes) -> list:
+    """展开IMAP消息集（如 101:103,105）"""
+    uids = []
+    for part in message_set.split(b','):
+        start, _, end = part.partition(b':')
+        uids.extend(str(n).encode() for n in range(int(start), int(end or start) + 1))
+    return uids
+
+
+class FakeIMAPServer:
+    """只支持LOGIN/SELECT/UID SEARCH/UID FETCH/LOGOUT的IMAP服务器"""
+
+    def __init__(self):
+        self.commands = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(b"* OK fake IMAP ready\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            tag, _, rest = line.strip().partition(b' ')
+            self.commands.append(rest)
+            command = rest.split(b' ')[0].upper()
+
+            if command == b'LOGIN':
+                writer.write(tag + b" OK logged in\r\n")
+            elif command == b'SELECT':
+                writer.write(b"* 3 EXISTS\r\n" + tag + b" OK [READ-WRITE] done\r\n")
+            elif rest.upper().startswith(b'UID SEARCH'):
+                writer.write(b"* SEARCH " + b" ".join(MAILBOX) + b"\r\n" + tag + b" OK done\r\n")
+            elif rest.upper().startswith(b'UID FETCH'):
+                uid_set, item = rest.split(b' ', 3)[2:]
+                headers_only = b'HEADER.FIELDS' in item
+                for seq, uid in enumerate(_expand(uid_set), 1):
+                    raw = MAILBOX[uid]
+                    if headers_only:
+                        raw = raw.split(b"\r\n\r\n")[0] + b"\r\n\r\n"
+                    writer.write(b"* %d FETCH (UID %s RFC822 {%d}\r\n" % (seq, uid, len(raw)) + raw + b" FLAGS (\\Seen))\r\n")
+                writer.write(tag + b" OK done\r\n")
+            elif command == b'LOGOUT':
+                writer.write(b"* BYE\r\n" + tag + b" OK bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(tag + b" BAD unknown\r\n")
+            await writer.drain()
+        writer.close()
+
+
+class FakeSMTPServer:
+    """记录收到的邮件的SMTP服务器（不支持STARTTLS）"""
+
+    def __init__(self, drop_after: int = 0):
+        self.messages = []
+        self.commands = []
+        self.connections = 0
+        self.drop_after = drop_after
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"220 fake SMTP ready\r\n")
+        recipients = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.strip().decode()
+            self.commands.append(command)
+            verb = command.split(' ')[0].upper()
+
+            if verb == 'EHLO':
+                writer.write(b"250-fake\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == 'AUTH':
+                token = base64.b64decode(command.split(' ')[2])
+                ok = token == b"\0user@example.com\0secret"
+                writer.write(b"235 ok\r\n" if ok else b"535 bad credentials\r\n")
+            elif verb in ('MAIL', 'RSET', 'NOOP'):
+                if verb == 'MAIL':
+                    recipients = []
+                writer.write(b"250 ok\r\n")
+            elif verb == 'RCPT':
+                recipient = re.search(r'<(.*)>', command).group(1)
+                if recipient.startswith('bad'):
+                    writer.write(b"550 no such user\r\n")
+                else:
+                    recipients.append(recipient)
+                    writer.write(b"250 ok\r\n")
+            elif verb == 'DATA':
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = b''
+                while True:
+                    chunk = await reader.readline()
+                    if chunk == b".\r\n":
+                        break
+                    data += chunk
+                self.messages.append((recipients, data))
+                if self.drop_after and len(self.messages) % self.drop_after == 0:
+                    # 模拟服务器在发送后关闭空闲连接
+                    writer.write(b"250 queued\r\n")
+                    await writer.drain()
+                    writer.close()
+                    return
+                writer.write(b"250 queued\r\n")
+            elif verb == 'QUIT':
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 unsupported\r\n")
+            await writer.drain()
+        writer.close()
+
+
+async def _start(handler):
+    """在随机端口启动服务器"""
+    server = await asyncio.start_server(handler, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def _imap_client(imap_port: int, smtp_port: int = 1) -> AsyncIMAPClient:
+    """创建连接本地服务器的IMAP客户端"""
+    client = AsyncIMAPClient(
+        email_address="user@example.com",
+        password="secret",
+        imap_server="127.0.0.1",
+        imap_port=imap_port,
+        smtp_server="127.0.0.1",
+        smtp_port=smtp_port,
+        use_ssl_for_smtp=False,
+        fetch_batch_size=2,
+        use_ssl=False
+    )
+    client.smtp_session.starttls = False
+    return client
+
+
+class TestAsyncIMAPClient:
+    """测试异步IMAP读取"""
+
+    def test_fetch_all(self):
+        """测试分批获取全部邮件，最新的在前"""
+        async def scenario():
+            fake = FakeIMAPServer()
+            server, port = await _start(fake.handle)
+            async with server:
+                client = _imap_client(port)
+                await client.connect()
+                result = await client.fetch_emails()
+                await client.close()
+            return fake, result
+
+        fake, result = asyncio.run(scenario())
+
+        assert result.success
+        assert [msg.body.strip() for msg in result.messages] == ["third", "second", "first"]
+        assert result.messages[0].metadata['internet_message_id'] == "<3@example.com>"
+        # 3封邮件、每批2封，需要2条FETCH命令
+        assert sum(1 for cmd in fake.commands if cmd.upper().startswith(b'UID FETCH')) == 2
+
+    def test_subject_filter_uses_headers_first(self):
+        """测试主题过滤先只获取邮件头，完整内容只获取匹配的邮件"""
+        async def scenario():
+            fake = FakeIMAPServer()
+            server, port = await _start(fake.handle)
+            async with server:
+                client = _imap_client(port)
+                result = await client.fetch_emails(subject="Daily report", limit=10)
+                await client.close()
+            return fake, result
+
+        fake, result = asyncio.run(scenario())
+
+        assert [msg.subject for msg in result.messages] == ["Daily report 2", "Daily report"]
+        full_fetches = [cmd for cmd in fake.commands if cmd.upper().startswith(b'UID FETCH') and b'RFC822' in cmd]
+        assert full_fetches == [b'UID FETCH 101,103 (RFC822)']
+
+    def test_connection_refused(self):
+        """测试无法连接时返回失败结果"""
+        async def scenario():
+            server, port = await _start(lambda reader, writer: writer.close())
+            server.close()
+            await server.wait_closed()
+            return await _imap_client(port).fetch_emails()
+
+        result = asyncio.run(scenario())
+
+        assert not result.success
+
+
+class TestAsyncSMTPSession:
+    """测试异步SMTP会话"""
+
+    def test_reuses_connection_with_rset(self):
+        """测试多封邮件复用同一个连接，邮件之间发送RSET"""
+        async def scenario():
+            fake = FakeSMTPServer()
+            server, port = await _start(fake.handle)
+            async with server:
+                session = AsyncSMTPSession("127.0.0.1", port, "user@example.com", "secret", starttls=False)
+                for index in range(3):
+                    msg = MIMEText(f"summary {index}\n.hidden", 'plain', 'us-ascii')
+                    msg['Subject'] = f"总结 {index}"
+                    await session.send_message(msg, ["a@example.com"])
+                await session.close()
+            return fake
+
+        fake = asyncio.run(scenario())
+
+        assert fake.connections == 1
+        assert len(fake.messages) == 3
+        assert fake.commands.count("RSET") == 2
+        # 行首的"."已转义
+        assert b"\r\n..hidden" in fake.messages[0][1]
+
+    def test_reconnects_after_server_drop(self):
+        """测试服务器关闭连接后重新登录并重发"""
+        async def scenario():
+            fake = FakeSMTPServer(drop_after=1)
+            server, port = await _start(fake.handle)
+            async with server:
+                session = AsyncSMTPSession("127.0.0.1", port, "user@example.com", "secret", starttls=False)
+                for index in range(2):
+                    msg = build_message("user@example.com", ["a@example.com"], f"总结 {index}", "内容")
+                    await session.send_message(msg, ["a@example.com"])
+                await session.close()
+            return fake
+
+        fake = asyncio.run(scenario())
+
+        assert fake.connections == 2
+        assert len(fake.messages) == 2
+
+
+class TestSyncEmailClientAdapter:
+    """测试同步适配器"""
+
+    def test_sync_fetch_and_send_many(self):
+        """测试同步接口调用异步客户端"""
+        loop = asyncio.new_event_loop()
+        imap, smtp = FakeIMAPServer(), FakeSMTPServer()
+        imap_server, imap_port = loop.run_until_complete(_start(imap.handle))
+        smtp_server, smtp_port = loop.run_until_complete(_start(smtp.handle))
+
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        adapter = SyncEmailClientAdapter(_imap_client(imap_port, smtp_port))
+        try:
+            result = adapter.fetch_emails(sender="boss@example.com")
+            send_result = adapter.send_many([
+                OutgoingEmail(to=["a@example.com"], subject="总结", body="内容"),
+                OutgoingEmail(to=["bad@example.com"], subject="总结", body="内容"),
+            ])
+        finally:
+            adapter.close()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            imap_server.close()
+            smtp_server.close()
+            loop.close()
+
+        assert result.success
+        assert len(result.messages) == 3
+        assert send_result.metadata['sent'] == 1
+        assert send_result.metadata['failed'][0]['email'].to == ["bad@example.com"]
+        assert smtp.commands.count("EHLO localhost") == 1
@@ -0,0 +1,276 @@
+"""
+测试内存+磁盘两级缓存管理器
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from workflow_tools.utils.cache_manager import CacheManager
+from workflow_tools.utils.serializers import get_serializer
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """创建不启动后台清理的缓存"""
+    manager = CacheManager(cache_dir=tmp_path / "cache", ttl=60, sweep_interval=0)
+    yield manager
+    manager.close()
+
+
+class TestCacheManager:
+    """测试缓存读写、淘汰和过期清理"""
+
+    def test_set_and_get(self, cache):
+        """测试写入后读取，值存放在按哈希分片的目录中"""
+        cache.set("key", {"content": "今日总结"})
+
+        assert cache.get("key") == {"content": "今日总结"}
+        assert cache.exists("key")
+        assert cache.get("missing") is None
+        key_hash = CacheManager._hash_key("key")
+        assert (cache.cache_dir / key_hash[:2] / f"{key_hash}.cache").exists()
+
+    def test_exists_uses_index_only(self, tmp_path):
+        """测试exists只查询索引，不读取缓存文件"""
+        cache = CacheManager(cache_dir=tmp_path, memory_entries=0, sweep_interval=0)
+        cache.set("key", "value")
+        key_hash = CacheManager._hash_key("key")
+        (cache.cache_dir / key_hash[:2] / f"{key_hash}.cache").write_text("not json")
+
+        assert cache.exists("key")
+        # 读取时发现文件损坏，删除条目
+        assert cache.get("key") is None
+        assert not cache.exists("key")
+        cache.close()
+
+    def test_lru_eviction_by_entries(self, tmp_path):
+        """测试超过条目数上限时淘汰最近最少使用的条目"""
+        cache = CacheManager(cache_dir=tmp_path, max_entries=2, sweep_interval=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        cache.close()
+
+    def test_eviction_by_bytes(self, tmp_path):
+        """测试超过字节数上限时淘汰最早访问的条目并删除文件"""
+        cache = CacheManager(cache_dir=tmp_path, max_bytes=250, sweep_interval=0)
+        for name in ("a", "b", "c"):
+            cache.set(name, "x" * 100)
+            time.sleep(0.01)
+
+        assert not cache.exists("a")
+        assert cache.exists("b") and cache.exists("c")
+        assert len(list(tmp_path.glob("*/*.cache"))) == 2
+        cache.close()
+
+    def test_expired_entries(self, tmp_path):
+        """测试过期条目读取时返回None，purge_expired批量清理"""
+        cache = CacheManager(cache_dir=tmp_path, ttl=0.05, sweep_interval=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        time.sleep(0.1)
+
+        assert cache.get("a") is None
+        assert cache.purge_expired() == 1
+        assert list(tmp_path.glob("*/*.cache")) == []
+        cache.close()
+
+    def test_background_sweeper(self, tmp_path):
+        """测试后台线程定期清理过期条目"""
+        cache = CacheManager(cache_dir=tmp_path, ttl=0.05, sweep_interval=0.05)
+        cache.set("a", 1)
+        time.sleep(0.3)
+
+        assert list(tmp_path.glob("*/*.cache")) == []
+        cache.close()
+
+    def test_clear_only_removes_cache_entries(self, cache):
+        """测试clear只删除缓存条目，不影响目录中的其他文件"""
+        other = cache.cache_dir / "uploaded_files.json"
+        other.write_text("{}")
+        cache.set("a", 1)
+
+        cache.clear()
+
+        assert cache.get("a") is None
+        assert other.exists()
+
+    def test_migrates_legacy_files(self, tmp_path):
+        """测试旧版本平铺的缓存文件迁移到索引中"""
+        key_hash = CacheManager._hash_key("old")
+        legacy = tmp_path / f"{key_hash}.json"
+        legacy.write_text(json.dumps({"timestamp": time.time(), "value": "旧缓存"}), encoding='utf-8')
+
+        cache = CacheManager(cache_dir=tmp_path, sweep_interval=0)
+
+        assert cache.get("old") == "旧缓存"
+        assert not legacy.exists()
+        cache.close()
+
+
+class TestTwoTierCache:
+    """测试内存层、压缩、序列化器和统计"""
+
+    def test_memory_tier_skips_disk(self, cache):
+        """测试内存层命中时不读取磁盘文件"""
+        cache.set("key", {"content": "热点数据"})
+        key_hash = CacheManager._hash_key("key")
+        (cache.cache_dir / key_hash[:2] / f"{key_hash}.cache").write_text("not json")
+
+        assert cache.get("key") == {"content": "热点数据"}
+        assert cache.stats().memory_hits == 1
+
+    def test_disk_hit_promoted_to_memory(self, tmp_path):
+        """测试新进程从磁盘命中后放入内存层"""
+        CacheManager(cache_dir=tmp_path, sweep_interval=0).set("key", [1, 2])
+        cache = CacheManager(cache_dir=tmp_path, sweep_interval=0)
+
+        cache.get("key")
+        cache.get("key")
+        cache.get("missing")
+
+        stats = cache.stats()
+        assert (stats.disk_hits, stats.memory_hits, stats.misses) == (1, 1, 1)
+        assert stats.hit_rate == pytest.approx(2 / 3)
+        cache.close()
+
+    def test_memory_tier_bounded(self, tmp_path):
+        """测试内存层超过上限时淘汰最久未使用的条目"""
+        cache = CacheManager(cache_dir=tmp_path, memory_entries=2, sweep_interval=0)
+        for name in ("a", "b", "c"):
+            cache.set(name, name)
+
+        assert len(cache._memory) == 2
+        assert cache.stats().evictions == 1
+        # 被内存层淘汰的条目仍可从磁盘读取
+        assert cache.get("a") == "a"
+        assert cache.stats().disk_hits == 1
+        cache.close()
+
+    def test_large_values_compressed(self, tmp_path):
+        """测试超过阈值的值压缩后写入磁盘，读取时解压"""
+        cache = CacheManager(cache_dir=tmp_path, compression="zlib", compress_threshold=100,
+                             memory_entries=0, sweep_interval=0)
+        response = "今天完成了季度报告的初稿。" * 200
+        cache.set("large", response)
+        cache.set("small", "短")
+
+        key_hash = CacheManager._hash_key("large")
+        stored = (tmp_path / key_hash[:2] / f"{key_hash}.cache").read_bytes()
+        assert len(stored) < len(response.encode('utf-8')) / 10
+        assert cache.get("large") == response
+        assert cache.get("small") == "短"
+        cache.close()
+
+    def test_unknown_compression(self, tmp_path):
+        """测试未知的压缩算法"""
+        with pytest.raises(ValueError):
+            CacheManager(cache_dir=tmp_path, compression="lz4", sweep_interval=0)
+
+    def test_pickle_serializer(self, tmp_path):
+        """测试pickle序列化器支持JSON无法表示的基础类型"""
+        cache = CacheManager(cache_dir=tmp_path, serializer="pickle", memory_entries=0, sweep_interval=0)
+        value = {"ids": {1, 2}, "raw": b"\x00\x01", "pair": (1, "a")}
+        cache.set("key", value)
+
+        assert cache.get("key") == value
+        cache.close()
+
+    def test_pickle_serializer_rejects_classes(self):
+        """测试pickle序列化器拒绝反序列化任意类"""
+        serializer = get_serializer("pickle")
+        data = serializer.dumps(pytest.approx(1))
+
+        with pytest.raises(Exception, match="不允许"):
+            serializer.loads(data)
+
+    def test_serializer_change_is_miss(self, tmp_path):
+        """测试更换序列化器后旧条目按未命中处理"""
+        CacheManager(cache_dir=tmp_path, sweep_interval=0).set("key", "value")
+        cache = CacheManager(cache_dir=tmp_path, serializer="pickle", sweep_interval=0)
+
+        assert cache.get("key") is None
+        assert cache.stats().misses == 1
+        cache.close()
+
+
+class TestConcurrentAccess:
+    """测试原子写入和单次计算"""
+
+    def test_write_leaves_no_temp_files(self, cache):
+        """测试写入通过临时文件原子替换，不留下临时文件"""
+        for i in range(5):
+            cache.set("key", {"version": i})
+
+        assert cache.get("key") == {"version": 4}
+        assert list(cache.cache_dir.glob("*/*.tmp")) == []
+
+    def test_concurrent_misses_compute_once(self, cache):
+        """测试同一个键并发未命中时只计算一次"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "expensive"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert sorted(hit for _, hit in results) == [False, True, True, True, True]
+        assert {value for value, _ in results} == {"expensive"}
+        assert cache._key_locks == {}
+
+    def test_single_flight_across_instances(self, tmp_path):
+        """测试共享缓存目录的多个实例（如多个进程）通过文件锁只计算一次"""
+        managers = [CacheManager(cache_dir=tmp_path, sweep_interval=0) for _ in range(3)]
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        threads = [threading.Thread(target=m.get_or_compute, args=("key", compute)) for m in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert list((tmp_path / CacheManager.LOCK_DIR).glob("*.lock")) == []
+        for manager in managers:
+            manager.close()
+
+    def test_failed_compute_not_cached(self, cache):
+        """测试计算失败时不写入缓存，下次重新计算"""
+        def failing():
+            raise RuntimeError("API错误")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("key", failing)
+
+        assert cache.get_or_compute("key", lambda: "ok") == ("ok", False)
+        assert cache.get_or_compute("key", lambda: "unused") == ("ok", True)
+
+    def test_should_cache_filter(self, cache):
+        """测试should_cache返回False的结果不写入缓存"""
+        cache.get_or_compute("key", lambda: "", should_cache=bool)
+
+        assert not cache.exists("key")
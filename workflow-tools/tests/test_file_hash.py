@@ -0,0 +1,103 @@
+"""
+测试分块文件哈希和哈希备忘录
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from workflow_tools.utils import file_utils
+from workflow_tools.utils.file_utils import clear_file_hash_memo, get_cache_key, get_file_hash
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    """每个测试使用空的备忘录"""
+    clear_file_hash_memo()
+    yield
+    clear_file_hash_memo()
+
+
+@pytest.fixture
+def hash_reads(monkeypatch):
+    """记录实际计算哈希的次数"""
+    calls = []
+    original = file_utils._new_hasher
+
+    def counting(algorithm):
+        calls.append(algorithm)
+        return original(algorithm)
+
+    monkeypatch.setattr(file_utils, "_new_hasher", counting)
+    return calls
+
+
+class TestGetFileHash:
+    """测试文件哈希"""
+
+    def test_chunked_matches_full_digest(self, tmp_path, monkeypatch):
+        """测试分块计算结果与整体计算一致"""
+        monkeypatch.setattr(file_utils, "HASH_CHUNK_SIZE", 1000)
+        data = os.urandom(4500)
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(data)
+
+        assert get_file_hash(document) == hashlib.md5(data).hexdigest()
+        assert get_file_hash(document, algorithm="sha256") == hashlib.sha256(data).hexdigest()
+        assert get_file_hash(document, algorithm="blake2b") == hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def test_unchanged_file_not_rehashed(self, tmp_path, hash_reads):
+        """测试文件未变化时使用备忘录，不同算法分别记录"""
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(b"%PDF content")
+
+        first = get_file_hash(document)
+        second = get_file_hash(document)
+        get_file_hash(document, algorithm="sha256")
+
+        assert first == second
+        assert hash_reads == ["md5", "sha256"]
+
+    def test_modified_file_rehashed(self, tmp_path, hash_reads):
+        """测试文件内容变化（大小或修改时间变化）后重新计算"""
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(b"version 1")
+        first = get_file_hash(document)
+
+        document.write_bytes(b"version 2 longer")
+        second = get_file_hash(document)
+
+        assert first != second
+        assert second == hashlib.md5(b"version 2 longer").hexdigest()
+        assert len(hash_reads) == 2
+
+    def test_memo_can_be_disabled(self, tmp_path, hash_reads):
+        """测试关闭备忘录时每次重新计算"""
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(b"data")
+
+        get_file_hash(document, use_memo=False)
+        get_file_hash(document, use_memo=False)
+
+        assert len(hash_reads) == 2
+
+    def test_errors(self, tmp_path):
+        """测试文件不存在和未知算法"""
+        with pytest.raises(FileNotFoundError):
+            get_file_hash(tmp_path / "missing.pdf")
+
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(b"data")
+        with pytest.raises(ValueError):
+            get_file_hash(document, algorithm="not-a-hash")
+
+    def test_cache_key_uses_fast_digest(self, tmp_path):
+        """测试缓存键使用BLAKE2文件哈希"""
+        document = tmp_path / "paper.pdf"
+        document.write_bytes(b"data")
+
+        file_hash, prompt_hash = get_cache_key(document, "总结").split("_")
+
+        assert file_hash == hashlib.blake2b(b"data", digest_size=16).hexdigest()
+        assert len(prompt_hash) == 32
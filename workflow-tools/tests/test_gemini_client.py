@@ -0,0 +1,428 @@
+"""
+测试GeminiClient的生成结果缓存、流式生成、批量文档分析和已上传文件登记表
+替换_generate_content、_open_stream、_upload_file和Files API，不调用真实API
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors as genai_errors
+
+from workflow_tools.ai_models.gemini.file_registry import UploadedFileRegistry
+from workflow_tools.ai_models.gemini.gemini_client import GeminiClient
+from workflow_tools.exceptions.ai_exceptions import GeminiStreamError
+from workflow_tools.utils.file_utils import get_file_hash
+from workflow_tools.utils.rate_limiter import RetryPolicy
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """在临时目录中创建客户端，记录API调用次数"""
+    monkeypatch.chdir(tmp_path)
+    gemini = GeminiClient(api_key="AIza-test-key-0000000000", model_name="test-model", content_cache_ttl=60)
+    gemini.calls = []
+
+    def fake_generate(prompt):
+        gemini.calls.append(prompt)
+        return SimpleNamespace(text=f" answer {len(gemini.calls)} ")
+
+    gemini._generate_content = fake_generate
+    return gemini
+
+
+class TestGenerateContentCache:
+    """测试generate_content缓存"""
+
+    def test_identical_prompt_hits_cache(self, client):
+        """测试相同提示词第二次直接返回缓存结果"""
+        first = client.generate_content("总结今天的记录")
+        second = client.generate_content("总结今天的记录")
+
+        assert first.metadata['cache_hit'] is False
+        assert second.metadata['cache_hit'] is True
+        assert second.content == first.content == "answer 1"
+        assert len(client.calls) == 1
+
+    def test_different_prompt_or_model_misses(self, client):
+        """测试提示词或模型不同时不命中缓存"""
+        client.generate_content("a")
+        client.generate_content("b")
+        client.model_name = "other-model"
+        client.generate_content("a")
+
+        assert len(client.calls) == 3
+
+    def test_bypass_cache_refreshes_entry(self, client):
+        """测试跳过缓存时重新调用API并更新缓存"""
+        client.generate_content("prompt")
+        refreshed = client.generate_content("prompt", bypass_cache=True)
+        cached = client.generate_content("prompt")
+
+        assert refreshed.metadata['cache_hit'] is False
+        assert cached.content == "answer 2"
+        assert len(client.calls) == 2
+
+    def test_failures_not_cached(self, client):
+        """测试失败的结果不写入缓存"""
+        def failing(prompt):
+            raise RuntimeError("配额耗尽")
+
+        original = client._generate_content
+        client._generate_content = failing
+        assert not client.generate_content("prompt").success
+
+        client._generate_content = original
+        result = client.generate_content("prompt")
+
+        assert result.success and result.metadata['cache_hit'] is False
+
+    def test_concurrent_identical_prompts_call_once(self, client):
+        """测试并发的相同提示词只调用一次API"""
+        original = client._generate_content
+
+        def slow_generate(prompt):
+            time.sleep(0.2)
+            return original(prompt)
+
+        client._generate_content = slow_generate
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(client.generate_content, ["同一个提示词"] * 4))
+
+        assert len(client.calls) == 1
+        assert {r.content for r in results} == {"answer 1"}
+        assert sum(not r.metadata['cache_hit'] for r in results) == 1
+
+    def test_zero_ttl_disables_cache(self, tmp_path, monkeypatch):
+        """测试TTL为0时不使用缓存"""
+        monkeypatch.chdir(tmp_path)
+        gemini = GeminiClient(api_key="AIza-test-key-0000000000", content_cache_ttl=0)
+
+        assert gemini.content_cache_manager is None
+
+
+class TestGenerateContentStream:
+    """测试流式生成与中断续写"""
+
+    @staticmethod
+    def _install_stream(client, scripts):
+        """按顺序为每次请求返回预设的片段，遇到异常对象时抛出"""
+        client.stream_requests = []
+
+        def fake_open_stream(prompt):
+            client.stream_requests.append(prompt)
+            for item in scripts[len(client.stream_requests) - 1]:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        client._open_stream = fake_open_stream
+
+    def test_yields_chunks_and_caches(self, client):
+        """测试逐段返回，完成后写入缓存"""
+        self._install_stream(client, [["第一段", "第二段"]])
+
+        chunks = list(client.generate_content_stream("prompt"))
+        cached = client.generate_content("prompt")
+
+        assert chunks == ["第一段", "第二段"]
+        assert cached.metadata['cache_hit'] is True
+        assert cached.content == "第一段第二段"
+
+    def test_resumes_after_interruption(self, client, monkeypatch):
+        """测试中断后带着已收到的内容续写，不重复返回"""
+        monkeypatch.setattr("workflow_tools.ai_models.gemini.gemini_client.time.sleep", lambda seconds: None)
+        self._install_stream(client, [["开头", ConnectionError("reset")], ["结尾"]])
+
+        chunks = list(client.generate_content_stream("prompt"))
+
+        assert chunks == ["开头", "结尾"]
+        assert client.stream_requests[0] == "prompt"
+        assert "开头" in client.stream_requests[1] and "继续输出" in client.stream_requests[1]
+
+    def test_raises_with_partial_content(self, client, monkeypatch):
+        """测试续写次数用完后抛出异常并携带已收到的内容"""
+        monkeypatch.setattr("workflow_tools.ai_models.gemini.gemini_client.time.sleep", lambda seconds: None)
+        self._install_stream(client, [["a", ConnectionError()], ["b", ConnectionError()]])
+
+        received = []
+        with pytest.raises(GeminiStreamError) as exc_info:
+            for chunk in client.generate_content_stream("prompt", max_resumes=1):
+                received.append(chunk)
+
+        assert received == ["a", "b"]
+        assert exc_info.value.partial_content == "ab"
+
+    def test_resume_budget_follows_retry_policy(self, client, monkeypatch):
+        """测试默认续写次数和截止时间来自重试策略"""
+        monkeypatch.setattr("workflow_tools.ai_models.gemini.gemini_client.time.sleep", lambda seconds: None)
+        client.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+        self._install_stream(client, [["a", ConnectionError()], ["b", ConnectionError()], ["c", ConnectionError()]])
+
+        with pytest.raises(GeminiStreamError) as exc_info:
+            list(client.generate_content_stream("prompt"))
+
+        assert len(client.stream_requests) == 3
+        assert exc_info.value.partial_content == "abc"
+
+        client.retry_policy = RetryPolicy(max_attempts=5, base_delay=10, deadline=1)
+        self._install_stream(client, [["x", ConnectionError()], ["y"]])
+
+        with pytest.raises(GeminiStreamError) as exc_info:
+            list(client.generate_content_stream("prompt"))
+
+        assert len(client.stream_requests) == 1
+        assert exc_info.value.partial_content == "x"
+
+    def test_resume_from_previous_partial(self, client):
+        """测试调用方传入上次的部分内容时直接续写"""
+        self._install_stream(client, [["rest"]])
+
+        chunks = list(client.generate_content_stream("prompt", resume_from="head"))
+
+        assert chunks == ["rest"]
+        assert "head" in client.stream_requests[0]
+
+
+class TestRetryHandling:
+    """测试Gemini错误分类和服务器等待时间"""
+
+    def test_quota_error_uses_retry_delay(self):
+        """测试从429错误详情中读取retryDelay"""
+        error = genai_errors.ClientError(429, {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "17s"}]
+            }
+        })
+
+        assert GeminiClient._is_retryable_error(error)
+        assert GeminiClient._retry_after_seconds(error) == 17.0
+
+    def test_client_errors_not_retried(self, client):
+        """测试请求参数错误只调用一次"""
+        attempts = []
+
+        def bad_request(**kwargs):
+            attempts.append(1)
+            raise genai_errors.ClientError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+
+        client.client.models.generate_content = bad_request
+        del client._generate_content
+
+        result = client.generate_content("prompt")
+
+        assert not result.success
+        assert len(attempts) == 1
+
+
+class TestCountTokens:
+    """测试提示词token计数"""
+
+    def test_uses_api_count(self, client):
+        """测试使用API返回的token数"""
+        client.client.models.count_tokens = lambda model, contents: SimpleNamespace(total_tokens=1234)
+
+        count = client.count_tokens("prompt")
+
+        assert count.total_tokens == 1234
+        assert not count.estimated
+
+    def test_falls_back_to_local_estimate(self, client):
+        """测试API不可用时使用本地估算"""
+        def offline(model, contents):
+            raise ConnectionError("offline")
+
+        client.client.models.count_tokens = offline
+
+        count = client.count_tokens("今天很好")
+
+        assert count.total_tokens == 4
+        assert count.estimated
+
+
+class TestAnalyzeDocumentsBatch:
+    """测试批量文档分析"""
+
+    @pytest.fixture
+    def documents(self, tmp_path):
+        """创建两个测试文档"""
+        paper = tmp_path / "paper.pdf"
+        paper.write_bytes(b"%PDF paper")
+        survey = tmp_path / "survey.pdf"
+        survey.write_bytes(b"%PDF survey")
+        return paper, survey
+
+    @staticmethod
+    def _install_fakes(client, fail_upload=None, upload_delays=None):
+        """替换上传和生成，记录调用"""
+        client.uploads = []
+        client.generations = []
+        upload_delays = upload_delays or {}
+
+        def fake_upload(path):
+            client.uploads.append(path.name)
+            time.sleep(upload_delays.get(path.name, 0))
+            if path.name == fail_upload:
+                raise RuntimeError("上传失败")
+            return f"remote-{path.name}"
+
+        def fake_generate(content_input):
+            uploaded_file, prompt = content_input
+            client.generations.append((uploaded_file, prompt, time.monotonic()))
+            time.sleep(0.1)
+            return SimpleNamespace(text=f"{uploaded_file}:{prompt}")
+
+        client._upload_file = fake_upload
+        client._generate_content = fake_generate
+
+    def test_each_file_uploaded_once(self, client, documents):
+        """测试同一文件的多个提示词只上传一次，结果顺序与请求一致"""
+        paper, survey = documents
+        self._install_fakes(client)
+
+        results = client.analyze_documents_batch([
+            (paper, "title"), (paper, "type"), (survey, "title"), (survey, "type")
+        ], progress_callback=lambda *args: None)
+
+        assert sorted(client.uploads) == ["paper.pdf", "survey.pdf"]
+        assert [r.content for r in results] == [
+            "remote-paper.pdf:title", "remote-paper.pdf:type",
+            "remote-survey.pdf:title", "remote-survey.pdf:type"
+        ]
+
+    def test_generations_run_concurrently(self, client, documents):
+        """测试生成并发执行"""
+        paper, _ = documents
+        self._install_fakes(client)
+
+        start = time.monotonic()
+        client.analyze_documents_batch([(paper, f"p{i}") for i in range(4)], max_workers=4,
+                                       progress_callback=lambda *args: None)
+
+        assert time.monotonic() - start < 0.35
+
+    def test_progress_and_cache(self, client, documents):
+        """测试进度回调，第二次批量分析命中缓存不再上传"""
+        paper, survey = documents
+        self._install_fakes(client)
+        progress = []
+
+        client.analyze_documents_batch([(paper, "title"), (survey, "title")],
+                                       progress_callback=lambda msg, cur, total: progress.append((cur, total)))
+        client.uploads.clear()
+        results = client.analyze_documents_batch([(paper, "title")], progress_callback=lambda *args: None)
+
+        assert sorted(progress) == [(1, 4), (2, 4), (3, 4), (4, 4)]
+        assert client.uploads == []
+        assert results[0].content == "remote-paper.pdf:title"
+
+    def test_slow_upload_does_not_delay_other_files(self, client, documents):
+        """测试某个文件上传完成后立即生成，不等待其他文件上传"""
+        paper, survey = documents
+        self._install_fakes(client, upload_delays={"paper.pdf": 0.5})
+
+        start = time.monotonic()
+        client.analyze_documents_batch([(paper, "title"), (survey, "title")],
+                                       progress_callback=lambda *args: None)
+
+        survey_started = next(t for name, _, t in client.generations if name == "remote-survey.pdf")
+        assert survey_started - start < 0.3
+
+    def test_duplicate_requests_generate_once(self, client, documents):
+        """测试并发批量分析中重复的 (文件, 提示词) 只调用一次API"""
+        paper, _ = documents
+        self._install_fakes(client)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(client.analyze_documents_batch, [(paper, "title"), (paper, "title")],
+                            progress_callback=lambda *args: None)
+                for _ in range(2)
+            ]
+            batches = [future.result() for future in futures]
+
+        assert len(client.generations) == 1
+        assert all(r.content == "remote-paper.pdf:title" for batch in batches for r in batch)
+
+    def test_upload_failure_only_affects_that_file(self, client, documents):
+        """测试单个文件上传失败不影响其他文件"""
+        paper, survey = documents
+        self._install_fakes(client, fail_upload="survey.pdf")
+
+        results = client.analyze_documents_batch([(paper, "title"), (survey, "title")],
+                                                 progress_callback=lambda *args: None)
+
+        assert results[0].success
+        assert not results[1].success and "上传失败" in results[1].error
+
+
+class TestUploadedFileRegistry:
+    """测试已上传文件登记表"""
+
+    @pytest.fixture
+    def remote(self, client):
+        """替换Files API，记录上传和查询"""
+        client.remote_uploads = []
+        client.remote_files = {}
+
+        def upload(file):
+            name = f"files/{len(client.remote_uploads) + 1}"
+            client.remote_uploads.append(file)
+            remote_file = SimpleNamespace(
+                name=name, uri=f"https://example.com/{name}", mime_type="application/pdf",
+                expiration_time=datetime.now(timezone.utc) + timedelta(hours=48)
+            )
+            client.remote_files[name] = remote_file
+            return remote_file
+
+        def get(name):
+            if name not in client.remote_files:
+                raise RuntimeError("404 NOT_FOUND")
+            return client.remote_files[name]
+
+        client.client.files.upload = upload
+        client.client.files.get = get
+        return client
+
+    def test_same_content_uploaded_once(self, remote, tmp_path):
+        """测试相同内容的文件（即使路径不同）在有效期内只上传一次"""
+        first = tmp_path / "a.pdf"
+        first.write_bytes(b"%PDF same")
+        copy = tmp_path / "b.pdf"
+        copy.write_bytes(b"%PDF same")
+
+        uploaded = remote._upload_file(first)
+        reused = remote._upload_file(copy)
+
+        assert len(remote.remote_uploads) == 1
+        assert reused is uploaded
+
+    def test_deleted_remote_file_reuploaded(self, remote, tmp_path):
+        """测试远程文件被提前删除时重新上传并更新记录"""
+        document = tmp_path / "a.pdf"
+        document.write_bytes(b"%PDF")
+        remote._upload_file(document)
+        remote.remote_files.clear()
+
+        uploaded = remote._upload_file(document)
+
+        assert len(remote.remote_uploads) == 2
+        assert remote.file_registry.get(get_file_hash(document, algorithm="blake2b"))['name'] == uploaded.name
+
+    def test_expired_entries_purged(self, tmp_path):
+        """测试过期和即将过期的记录被清理"""
+        registry = UploadedFileRegistry(tmp_path / "uploaded_files.json", safety_margin=3600)
+        now = datetime.now(timezone.utc)
+        registry.register("fresh", SimpleNamespace(name="files/1", expiration_time=now + timedelta(hours=47)))
+        registry.register("closing", SimpleNamespace(name="files/2", expiration_time=now + timedelta(minutes=30)))
+        registry.register("expired", SimpleNamespace(name="files/3", expiration_time=now - timedelta(hours=1)))
+
+        assert registry.get("closing") is None
+        assert registry.purge_expired() == 0
+        assert registry.get("fresh")['name'] == "files/1"
+        assert set(json.loads((tmp_path / "uploaded_files.json").read_text())) == {"fresh"}
@@ -0,0 +1,250 @@
+"""
+测试通用IMAP客户端的邮件获取流程
+使用模拟的IMAP连接，不访问真实服务器
+"""
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+from workflow_tools.email.base.generic_imap_client import GenericIMAPClient
+from workflow_tools.email.base.imap_sync_state import IMAPSyncState
+from workflow_tools.email.base.message_store import MessageStore
+
+
+def _make_client(**kwargs) -> GenericIMAPClient:
+    """创建使用模拟连接的客户端"""
+    client = GenericIMAPClient(
+        email_address="user@example.com",
+        password="secret",
+        imap_server="imap.example.com",
+        imap_port=993,
+        smtp_server="smtp.example.com",
+        smtp_port=587,
+        use_ssl_for_smtp=False,
+        **kwargs
+    )
+    client.imap_conn = MagicMock()
+    client.imap_conn.select.return_value = ('OK', [b'3'])
+    return client
+
+
+def _raw_email(subject: str, body: str) -> bytes:
+    """构造简单的RFC822邮件"""
+    return (
+        f"Subject: {subject}\r\n"
+        "From: Sender <sender@example.com>\r\n"
+        "Date: Thu, 02 Oct 2025 07:38:32 +0800\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "\r\n"
+        f"{body}\r\n"
+    ).encode('utf-8')
+
+
+class TestHeaderFirstFetch:
+    """测试两阶段（先邮件头后正文）获取"""
+
+    def test_only_matching_bodies_fetched(self):
+        """测试只下载通过邮件头过滤的邮件正文"""
+        client = _make_client(header_first=True)
+        client.imap_conn.search.return_value = ('OK', [b'1 2 3'])
+
+        headers = {
+            b'1': b'Subject: =?utf-8?b?5q+P5pel6K6w5b2V?=\r\nFrom: sender@example.com\r\n\r\n',
+            b'2': b'Subject: newsletter\r\nFrom: other@example.com\r\n\r\n',
+            b'3': b'Subject: hello\r\nFrom: other@example.com\r\n\r\n',
+        }
+
+        def fake_fetch(message_set, message_parts):
+            if 'HEADER.FIELDS' in message_parts:
+                data = []
+                for msg_id in (b'1', b'2', b'3'):
+                    data.append((msg_id + b' (BODY[HEADER.FIELDS (SUBJECT FROM DATE)] {10}', headers[msg_id]))
+                    data.append(b')')
+                return 'OK', data
+            assert message_set == "1"
+            return 'OK', [(b'1 (RFC822 {10}', _raw_email("每日记录", "今天的记录")), b')']
+
+        client.imap_conn.fetch.side_effect = fake_fetch
+
+        result = client.fetch_emails(subject="每日记录")
+
+        assert result.success
+        assert [msg.body for msg in result.messages] == ["今天的记录"]
+        assert client.imap_conn.fetch.call_count == 2
+
+    def test_header_first_disabled(self):
+        """测试关闭两阶段获取时直接下载完整邮件"""
+        client = _make_client(header_first=False)
+        client.imap_conn.search.return_value = ('OK', [b'1 2'])
+        client.imap_conn.fetch.return_value = ('OK', [
+            (b'1 (RFC822 {10}', _raw_email("每日记录", "a")), b')',
+            (b'2 (RFC822 {10}', _raw_email("其他", "b")), b')'
+        ])
+
+        result = client.fetch_emails(subject="每日记录")
+
+        assert [msg.body for msg in result.messages] == ["a"]
+        client.imap_conn.fetch.assert_called_once_with("1:2", '(RFC822)')
+
+
+class TestIncrementalSync:
+    """测试基于UID高水位的增量同步"""
+
+    @staticmethod
+    def _uid_client(tmp_path, uidvalidity: bytes, search_result: bytes, missing=None):
+        """创建启用增量同步的客户端（missing中的UID不返回正文）"""
+        missing = missing if missing is not None else set()
+        sync_state = IMAPSyncState(tmp_path / "sync.json")
+        client = _make_client(header_first=False, sync_state=sync_state)
+        client.imap_conn.response.return_value = ('UIDVALIDITY', [uidvalidity])
+
+        def fake_uid(command, *args):
+            if command == 'SEARCH':
+                return 'OK', [search_result]
+            uids = []
+            for part in args[0].split(','):
+                start, _, end = part.partition(':')
+                uids.extend(str(uid) for uid in range(int(start), int(end or start) + 1))
+            data = []
+            for uid in uids:
+                if uid in missing:
+                    continue
+                data.append((f'1 (UID {uid} RFC822 {{10}}'.encode(), _raw_email("每日记录", uid)))
+                data.append(b')')
+            return 'OK', data
+
+        client.imap_conn.uid.side_effect = fake_uid
+        return client, sync_state, missing
+
+    def test_only_new_uids_fetched(self, tmp_path):
+        """测试只获取高水位之后的邮件并更新状态"""
+        client, sync_state, _ = self._uid_client(tmp_path, b'7', b'12 15')
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        result = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(result)
+
+        search_call = client.imap_conn.uid.call_args_list[0]
+        assert search_call.args == ('SEARCH', None, 'UID 13:*')
+        assert [msg.body for msg in result.messages] == ["15"]
+        assert sync_state.get(key) == {'uidvalidity': 7, 'last_uid': 15}
+
+    def test_no_new_mail(self, tmp_path):
+        """测试 UID n:* 只返回旧的最大UID时不获取任何邮件"""
+        client, sync_state, _ = self._uid_client(tmp_path, b'7', b'12')
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        result = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(result)
+
+        assert result.messages == []
+        assert sync_state.get(key)['last_uid'] == 12
+
+    def test_uidvalidity_change_full_resync(self, tmp_path):
+        """测试UIDVALIDITY变化时执行完整同步"""
+        client, sync_state, _ = self._uid_client(tmp_path, b'8', b'1 2')
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        result = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(result)
+
+        search_call = client.imap_conn.uid.call_args_list[0]
+        assert search_call.args == ('SEARCH', None, 'ALL')
+        assert sorted(msg.body for msg in result.messages) == ["1", "2"]
+        assert sync_state.get(key) == {'uidvalidity': 8, 'last_uid': 2}
+
+    def test_mark_saved_only_after_commit(self, tmp_path):
+        """测试未确认处理完成时高水位不变"""
+        client, sync_state, _ = self._uid_client(tmp_path, b'7', b'13 14')
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        result = client.fetch_emails(subject="每日记录")
+
+        assert result.metadata["last_uid"] == 14
+        assert sync_state.get(key)['last_uid'] == 12
+
+    def test_failed_fetch_retried_next_run(self, tmp_path):
+        """测试正文获取失败时高水位停在失败邮件之前，下次运行重新获取"""
+        client, sync_state, missing = self._uid_client(tmp_path, b'7', b'13 14 15', missing={'14'})
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        first = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(first)
+
+        assert sorted(msg.body for msg in first.messages) == ["13", "15"]
+        assert sync_state.get(key)['last_uid'] == 13
+
+        missing.clear()
+        second = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(second)
+
+        assert client.imap_conn.uid.call_args_list[-2].args == ('SEARCH', None, 'UID 14:*')
+        assert sorted(msg.body for msg in second.messages) == ["14", "15"]
+        assert sync_state.get(key)['last_uid'] == 15
+
+    def test_limit_keeps_unfetched_uids_for_next_run(self, tmp_path):
+        """测试增量同步时limit截掉的邮件不会被高水位跳过"""
+        client, sync_state, _ = self._uid_client(tmp_path, b'7', b'13 14 15')
+        key = IMAPSyncState.mailbox_key("user@example.com", "imap.example.com")
+        sync_state.update(key, 7, 12)
+
+        result = client.fetch_emails(subject="每日记录", limit=2)
+        client.commit_sync_state(result)
+
+        assert sorted(msg.body for msg in result.messages) == ["13", "14"]
+        assert sync_state.get(key)['last_uid'] == 14
+
+
+class TestMessageStoreIntegration:
+    """测试本地邮件存储"""
+
+    def test_second_fetch_served_from_store(self, tmp_path):
+        """测试已保存的邮件不再下载正文"""
+        client = _make_client(message_store=MessageStore(tmp_path))
+        client.imap_conn.search.return_value = ('OK', [b'1'])
+        raw = b"Message-ID: <m1@example.com>\r\n" + _raw_email("每日记录", "正文")
+        header = b'Subject: =?utf-8?b?5q+P5pel6K6w5b2V?=\r\nMessage-ID: <m1@example.com>\r\n\r\n'
+
+        def fake_fetch(message_set, message_parts):
+            if 'HEADER.FIELDS' in message_parts:
+                return 'OK', [(b'1 (BODY[HEADER.FIELDS (MESSAGE-ID)] {10}', header), b')']
+            return 'OK', [(b'1 (RFC822 {10}', raw), b')']
+
+        client.imap_conn.fetch.side_effect = fake_fetch
+
+        first = client.fetch_emails(subject="每日记录")
+        second = client.fetch_emails(subject="每日记录")
+
+        assert [msg.body for msg in first.messages] == ["正文"]
+        assert [msg.body for msg in second.messages] == ["正文"]
+        body_fetches = [
+            call for call in client.imap_conn.fetch.call_args_list if call.args[1] == '(RFC822)'
+        ]
+        assert len(body_fetches) == 1
+
+    def test_stored_messages_filtered_by_ascii_sender(self, tmp_path):
+        """测试ASCII发件人由服务器端过滤时，合并本地存储的邮件仍按发件人过滤"""
+        store = MessageStore(tmp_path / "store")
+        sync_state = IMAPSyncState(tmp_path / "sync.json")
+        client = _make_client(message_store=store, sync_state=sync_state)
+        client.imap_conn.response.return_value = ('UIDVALIDITY', [b'7'])
+        client.imap_conn.uid.return_value = ('OK', [b'12'])
+        sync_state.update(IMAPSyncState.mailbox_key("user@example.com", "imap.example.com"), 7, 12)
+
+        for index, sender in enumerate(("sender@example.com", "other@example.com")):
+            raw = (
+                f"Message-ID: <m{index}@example.com>\r\n".encode()
+                + _raw_email("每日记录", sender).replace(b"sender@example.com", sender.encode())
+            )
+            client._save_to_store(raw, client._parse_email(raw, str(index)))
+
+        result = client.fetch_emails(sender="sender@example.com")
+
+        search_call = client.imap_conn.uid.call_args_list[0]
+        assert search_call.args == ('SEARCH', None, 'UID 13:* FROM "sender@example.com"')
+        assert [msg.body for msg in result.messages] == ["sender@example.com"]
@@ -0,0 +1,118 @@
+"""
+测试IMAP连接池
+使用模拟的IMAP连接，不访问真实服务器
+"""
+# pylint: disable=protected-access
+
+import imaplib
+import threading
+from unittest.mock import MagicMock, patch
+
+from workflow_tools.email.base.imap_connection_pool import IMAPConnectionPool
+from workflow_tools.email.base.generic_imap_client import GenericIMAPClient
+
+
+def _make_pool(**kwargs) -> IMAPConnectionPool:
+    """创建测试用连接池"""
+    return IMAPConnectionPool("imap.example.com", 993, "user@example.com", "secret", **kwargs)
+
+
+class TestIMAPConnectionPool:
+    """测试连接复用和断线重连"""
+
+    def test_connection_reused(self):
+        """测试归还的连接被再次使用，只登录一次"""
+        pool = _make_pool()
+        with patch('imaplib.IMAP4_SSL') as mock_ssl:
+            first = pool.acquire()
+            pool.release(first)
+            second = pool.acquire()
+
+        assert first is second
+        assert mock_ssl.call_count == 1
+        first.login.assert_called_once_with("user@example.com", "secret")
+
+    def test_dead_connection_replaced(self):
+        """测试空闲过久且NOOP失败的连接被重新建立"""
+        pool = _make_pool(check_interval=0)
+        with patch('imaplib.IMAP4_SSL', side_effect=[MagicMock(), MagicMock()]):
+            first = pool.acquire()
+            first.noop.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+            pool.release(first)
+            second = pool.acquire()
+
+        assert second is not first
+        first.logout.assert_called_once()
+
+    def test_discarded_connection_not_reused(self):
+        """测试丢弃的连接不会放回连接池"""
+        pool = _make_pool()
+        with patch('imaplib.IMAP4_SSL', side_effect=[MagicMock(), MagicMock()]):
+            first = pool.acquire()
+            pool.release(first, discard=True)
+            second = pool.acquire()
+
+        assert second is not first
+
+    def test_keepalive_does_not_exceed_max_size(self):
+        """测试保活线程检测空闲连接期间，并发获取等待该连接而不是新建连接"""
+        pool = _make_pool(max_size=1, keepalive_interval=0.01)
+        noop_started = threading.Event()
+        noop_release = threading.Event()
+
+        def slow_noop():
+            noop_started.set()
+            noop_release.wait(5)
+            return 'OK', [b'']
+
+        with patch('imaplib.IMAP4_SSL', side_effect=[MagicMock(), MagicMock()]) as mock_ssl:
+            conn = pool.acquire()
+            conn.noop.side_effect = slow_noop
+            pool.release(conn)
+            pool.start_keepalive()
+            assert noop_started.wait(5)
+
+            acquired = []
+            waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+            waiter.start()
+            waiter.join(0.2)
+            assert acquired == []
+
+            noop_release.set()
+            waiter.join(5)
+            pool.close_all()
+
+        assert acquired == [conn]
+        assert mock_ssl.call_count == 1
+
+
+class TestPooledClient:
+    """测试启用连接池的IMAP客户端"""
+
+    def test_fetch_retries_after_abort(self):
+        """测试获取过程中连接中断时自动重连并重试"""
+        broken = MagicMock()
+        broken.select.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+        healthy = MagicMock()
+        healthy.select.return_value = ('OK', [b'0'])
+        healthy.search.return_value = ('OK', [b''])
+
+        with patch('imaplib.IMAP4_SSL', side_effect=[broken, healthy]):
+            client = GenericIMAPClient(
+                email_address="user@example.com",
+                password="secret",
+                imap_server="imap.example.com",
+                imap_port=993,
+                smtp_server="smtp.example.com",
+                smtp_port=587,
+                use_connection_pool=True
+            )
+            client.connect()
+            result = client.fetch_emails()
+            client.disconnect()
+
+        assert result.success
+        assert result.messages == []
+        broken.logout.assert_called_once()
+        healthy.logout.assert_not_called()
+        client.close()
@@ -0,0 +1,92 @@
+"""
+测试IMAP批量获取工具
+主要测试消息集压缩和FETCH响应拆分
+"""
+
+from unittest.mock import MagicMock
+
+from workflow_tools.email.base.imap_fetch import (
+    build_message_set,
+    chunk_message_ids,
+    parse_fetch_response,
+    fetch_messages_batched
+)
+
+
+class TestBuildMessageSet:
+    """测试消息集构建"""
+
+    def test_consecutive_ids(self):
+        """测试连续ID合并为范围"""
+        assert build_message_set([b'1', b'2', b'3', b'4']) == "1:4"
+
+    def test_mixed_ids(self):
+        """测试连续与离散ID混合"""
+        ids = [b'8', b'1', b'2', b'3', b'5', b'7']
+        assert build_message_set(ids) == "1:3,5,7:8"
+
+    def test_empty(self):
+        """测试空列表"""
+        assert build_message_set([]) == ""
+
+
+class TestChunkMessageIds:
+    """测试批次切分"""
+
+    def test_chunk_size(self):
+        """测试按批次大小切分"""
+        ids = [str(i).encode() for i in range(1, 6)]
+        chunks = list(chunk_message_ids(ids, 2))
+        assert chunks == [[b'1', b'2'], [b'3', b'4'], [b'5']]
+
+
+class TestParseFetchResponse:
+    """测试FETCH响应拆分"""
+
+    def test_sequence_numbers(self):
+        """测试按消息序号拆分"""
+        data = [
+            (b'1 (RFC822 {5}', b'first'),
+            b')',
+            b'2 (FLAGS (\\Seen))',
+            (b'3 (RFC822 {6}', b'second'),
+            b')'
+        ]
+        assert parse_fetch_response(data) == {b'1': b'first', b'3': b'second'}
+
+    def test_uid_after_literal(self):
+        """测试UID位于字面量之后的响应"""
+        data = [
+            (b'1 (UID 101 RFC822 {1}', b'a'),
+            b')',
+            (b'2 (RFC822 {1}', b'b'),
+            b' UID 102)'
+        ]
+        assert parse_fetch_response(data, use_uid=True) == {b'101': b'a', b'102': b'b'}
+
+
+class TestFetchMessagesBatched:
+    """测试批量获取"""
+
+    def test_one_fetch_per_batch(self):
+        """测试每批只发送一条FETCH命令并保持请求顺序"""
+        imap_conn = MagicMock()
+        imap_conn.fetch.side_effect = [
+            ('OK', [(b'2 (RFC822 {1}', b'b'), b')', (b'3 (RFC822 {1}', b'c'), b')']),
+            ('OK', [(b'1 (RFC822 {1}', b'a'), b')'])
+        ]
+
+        results = list(fetch_messages_batched(imap_conn, [b'3', b'2', b'1'], batch_size=2))
+
+        assert results == [(b'3', b'c'), (b'2', b'b'), (b'1', b'a')]
+        assert imap_conn.fetch.call_count == 2
+        assert imap_conn.fetch.call_args_list[0].args == ("2:3", '(RFC822)')
+
+    def test_failed_batch(self):
+        """测试FETCH失败时该批返回None"""
+        imap_conn = MagicMock()
+        imap_conn.fetch.return_value = ('NO', [None])
+
+        results = list(fetch_messages_batched(imap_conn, [b'1'], batch_size=10))
+
+        assert results == [(b'1', None)]
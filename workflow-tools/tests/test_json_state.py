@@ -0,0 +1,61 @@
+"""
+测试JSON状态文件
+"""
+
+import threading
+
+import pytest
+
+from workflow_tools.utils.json_state import JsonStateFile
+
+
+class TestJsonStateFile:
+    """测试读取、修改和并发写入"""
+
+    def test_modify_persists(self, tmp_path):
+        """修改后重新打开能读到"""
+        state = JsonStateFile(tmp_path / "nested" / "state.json")
+        with state.modify() as data:
+            data['a'] = {'n': 1}
+
+        assert JsonStateFile(tmp_path / "nested" / "state.json").read() == {'a': {'n': 1}}
+        assert list(tmp_path.glob("nested/*.tmp")) == []
+
+    def test_corrupt_file_reads_empty(self, tmp_path):
+        """损坏的状态文件视为空状态"""
+        path = tmp_path / "state.json"
+        path.write_text("{not json", encoding='utf-8')
+
+        assert JsonStateFile(path).read() == {}
+
+    def test_exception_discards_changes(self, tmp_path):
+        """代码块抛出异常时不写回"""
+        state = JsonStateFile(tmp_path / "state.json")
+        with state.modify() as data:
+            data['keep'] = 1
+
+        with pytest.raises(RuntimeError):
+            with state.modify() as data:
+                data['drop'] = 2
+                raise RuntimeError("boom")
+
+        assert state.read() == {'keep': 1}
+
+    def test_concurrent_writers_do_not_lose_updates(self, tmp_path):
+        """多个实例（模拟多个进程）同时读-改-写同一文件不会互相覆盖"""
+        path = tmp_path / "state.json"
+
+        def worker(index):
+            state = JsonStateFile(path)
+            for i in range(20):
+                with state.modify() as data:
+                    data[f"{index}-{i}"] = i
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(JsonStateFile(path).read()) == 80
+        assert list(tmp_path.glob("*.tmp")) == []
@@ -0,0 +1,133 @@
+"""
+测试Token估算、按预算分块和Map-Reduce总结
+使用模拟的AI客户端
+"""
+
+import threading
+import time
+
+from workflow_tools.ai_models.base.ai_client_base import AIClientBase, AIResult
+from workflow_tools.ai_models.base.map_reduce import MapReduceSummarizer
+from workflow_tools.utils.token_utils import compress_text, estimate_tokens, split_by_token_budget
+
+
+class FakeAIClient(AIClientBase):
+    """记录提示词并返回固定长度总结的模拟客户端"""
+
+    def __init__(self, delay: float = 0, fail_on: str = None):
+        super().__init__(api_key="test")
+        self.prompts = []
+        self.delay = delay
+        self.fail_on = fail_on
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def analyze_document(self, file_path, prompt, progress_callback=None) -> AIResult:
+        raise NotImplementedError
+
+    def generate_content(self, prompt: str) -> AIResult:
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail_on and self.fail_on in prompt:
+                return AIResult(success=False, error="模型错误")
+            return AIResult(success=True, content=f"summary-{len(self.prompts)}")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+MAP_PROMPT = "MAP {chunk_index}/{chunk_count}\n{chunk_contents}"
+REDUCE_PROMPT = "REDUCE\n{chunk_summaries}"
+
+
+class TestTokenUtils:
+    """测试token估算与分块"""
+
+    def test_estimate_tokens(self):
+        """测试中文按字计算，其他字符按4个字符计算"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("今天很好") == 4
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("工作abcd") == 3
+
+    def test_sections_kept_whole(self):
+        """测试段落不被拆开，按顺序合并到预算以内"""
+        sections = ["a" * 40, "b" * 40, "c" * 40]  # 每段10 tokens
+
+        chunks = split_by_token_budget(sections, max_tokens=25)
+
+        assert chunks == ["a" * 40 + "\n" + "b" * 40, "c" * 40]
+
+    def test_oversized_section_split_by_lines(self):
+        """测试超过预算的段落按行切分"""
+        section = "\n".join(["行" * 8] * 5)
+
+        chunks = split_by_token_budget([section], max_tokens=20)
+
+        assert "".join(chunks) == section
+        assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+
+    def test_compress_text(self):
+        """测试删除引用原文和多余空白"""
+        text = "今天   完成了报告  \n\n\n\n> 上一封邮件\n> 引用内容\n明天\t继续\n"
+
+        assert compress_text(text) == "今天 完成了报告\n\n明天 继续\n"
+
+
+class TestMapReduceSummarizer:
+    """测试Map-Reduce总结"""
+
+    def test_map_then_reduce(self):
+        """测试每块调用一次，再合并一次"""
+        client = FakeAIClient()
+        summarizer = MapReduceSummarizer(client, MAP_PROMPT, REDUCE_PROMPT, max_chunk_tokens=60)
+
+        result = summarizer.summarize(["a" * 200, "b" * 200, "c" * 200])
+
+        assert result.success
+        assert result.metadata == {'chunk_count': 3, 'reduce_rounds': 1}
+        map_prompts = sorted(p for p in client.prompts if p.startswith("MAP"))
+        assert [p.split("\n")[0] for p in map_prompts] == ["MAP 1/3", "MAP 2/3", "MAP 3/3"]
+        reduce_prompt = client.prompts[-1]
+        assert reduce_prompt.startswith("REDUCE")
+        assert reduce_prompt.index("[第 1 部分]") < reduce_prompt.index("[第 3 部分]")
+
+    def test_chunks_run_in_parallel(self):
+        """测试分块并行调用，受max_workers限制"""
+        client = FakeAIClient(delay=0.2)
+        summarizer = MapReduceSummarizer(client, MAP_PROMPT, REDUCE_PROMPT, max_chunk_tokens=60, max_workers=3)
+
+        start = time.monotonic()
+        result = summarizer.summarize(["x" * 200] * 6)
+
+        assert result.success
+        assert client.max_active == 3
+        # 6块、3个并行 => 2轮map + 1次reduce
+        assert time.monotonic() - start < 1.0
+
+    def test_hierarchical_reduce(self):
+        """测试总结合计超过预算时分组合并"""
+        client = FakeAIClient()
+        summarizer = MapReduceSummarizer(client, MAP_PROMPT, REDUCE_PROMPT, max_chunk_tokens=12)
+
+        result = summarizer.summarize(["y" * 40] * 4)
+
+        assert result.success
+        assert result.metadata['chunk_count'] == 4
+        assert result.metadata['reduce_rounds'] > 1
+
+    def test_failed_chunk_fails_result(self):
+        """测试任一块失败时整体失败"""
+        client = FakeAIClient(fail_on="MAP 2/")
+        summarizer = MapReduceSummarizer(client, MAP_PROMPT, REDUCE_PROMPT, max_chunk_tokens=15)
+
+        result = summarizer.summarize(["a" * 40, "b" * 40])
+
+        assert not result.success
+        assert "第 2/2 块" in result.error
+        assert not any(p.startswith("REDUCE") for p in client.prompts)
@@ -0,0 +1,87 @@
+"""
+测试本地邮件存储
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from workflow_tools.email.base.email_base import EmailMessage
+from workflow_tools.email.base.message_store import MessageStore
+
+
+def _message(subject: str, received_time: datetime) -> EmailMessage:
+    """构造测试邮件"""
+    return EmailMessage(
+        subject=subject,
+        sender="sender@example.com",
+        recipients=["user@example.com"],
+        body=f"{subject} 正文",
+        received_time=received_time,
+        message_id="1",
+        metadata={"internet_message_id": f"<{subject}@example.com>"}
+    )
+
+
+class TestMessageStore:
+    """测试邮件存储读写"""
+
+    def test_put_and_get(self, tmp_path):
+        """测试保存后读取原始邮件和解析结果"""
+        store = MessageStore(tmp_path)
+        now = datetime.now(timezone.utc)
+
+        store.put("a", b"raw-a", _message("每日记录", now), source="box")
+
+        assert "a" in store
+        assert store.get_raw("a") == b"raw-a"
+        message = store.get_message("a")
+        assert message.subject == "每日记录"
+        assert message.received_time == now
+        assert message.metadata["internet_message_id"] == "<每日记录@example.com>"
+
+    def test_content_deduplicated(self, tmp_path):
+        """测试相同内容只写入一次"""
+        store = MessageStore(tmp_path)
+        now = datetime.now(timezone.utc)
+
+        hash_a = store.put("a", b"same", _message("a", now))
+        hash_b = store.put("b", b"same", _message("b", now))
+
+        assert hash_a == hash_b
+        segment = next((tmp_path / "segments").glob("*.dat"))
+        assert segment.read_bytes().count(b"same") == 1
+
+    def test_reload_from_disk(self, tmp_path):
+        """测试重新打开后从索引恢复"""
+        now = datetime.now(timezone.utc)
+        store = MessageStore(tmp_path)
+        store.put("a", b"raw-a", _message("a", now))
+        store.close()
+
+        reopened = MessageStore(tmp_path)
+
+        assert len(reopened) == 1
+        assert reopened.get_raw("a") == b"raw-a"
+
+    def test_segment_rotation(self, tmp_path):
+        """测试超过分段大小后写入新分段"""
+        store = MessageStore(tmp_path, segment_max_bytes=600)
+        now = datetime.now(timezone.utc)
+
+        for index in range(5):
+            store.put(str(index), bytes([index]) * 200, _message(str(index), now))
+
+        assert len(list((tmp_path / "segments").glob("*.dat"))) > 1
+        assert store.get_raw("0") == bytes([0]) * 200
+        assert store.get_raw("4") == bytes([4]) * 200
+
+    def test_iter_messages_since(self, tmp_path):
+        """测试按来源和时间遍历"""
+        store = MessageStore(tmp_path)
+        now = datetime.now(timezone.utc)
+        store.put("old", b"old", _message("old", now - timedelta(days=2)), source="box")
+        store.put("new", b"new", _message("new", now), source="box")
+        store.put("other", b"other", _message("other", now), source="other")
+
+        keys = [key for key, _ in store.iter_messages(source="box", since=now - timedelta(days=1))]
+
+        assert keys == ["new"]
@@ -0,0 +1,97 @@
+"""
+测试单遍MIME扫描
+"""
+
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from workflow_tools.email.base.mime_scanner import scan_message
+
+
+def _with_attachment(payload: bytes = b"%PDF-1.4 binary") -> bytes:
+    """构造包含正文和附件的邮件"""
+    msg = MIMEMultipart()
+    msg['Subject'] = "daily"
+    msg.attach(MIMEText("今天的记录", 'plain', 'utf-8'))
+    attachment = MIMEApplication(payload, Name="report.pdf")
+    attachment['Content-Disposition'] = 'attachment; filename="report.pdf"'
+    msg.attach(attachment)
+    return msg.as_bytes()
+
+
+class TestScanMessage:
+    """测试扫描结果与标准库解析一致"""
+
+    def test_plain_with_attachment(self):
+        """测试提取纯文本正文并识别附件"""
+        result = scan_message(_with_attachment())
+
+        assert result.body == "今天的记录"
+        assert result.has_attachments
+        assert result.headers['Subject'] == "daily"
+
+    def test_nested_alternative_prefers_plain(self):
+        """测试嵌套multipart/alternative中优先使用纯文本"""
+        alternative = MIMEMultipart('alternative')
+        alternative.attach(MIMEText("<p>网页</p>", 'html', 'utf-8'))
+        alternative.attach(MIMEText("纯文本", 'plain', 'utf-8'))
+        msg = MIMEMultipart('mixed')
+        msg.attach(alternative)
+
+        result = scan_message(msg.as_bytes())
+
+        assert result.body == "纯文本"
+        assert not result.has_attachments
+
+    def test_html_only(self):
+        """测试只有HTML时移除标签"""
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText("<p>你好<b>世界</b></p>", 'html', 'utf-8'))
+
+        assert scan_message(msg.as_bytes()).body == "你好世界"
+
+    def test_quoted_printable_body(self):
+        """测试quoted-printable编码的正文"""
+        raw = (
+            b"Content-Type: multipart/mixed; boundary=\"b1\"\r\n\r\n"
+            b"--b1\r\n"
+            b"Content-Type: text/plain; charset=utf-8\r\n"
+            b"Content-Transfer-Encoding: quoted-printable\r\n\r\n"
+            b"caf=C3=A9\r\n"
+            b"--b1--\r\n"
+        )
+
+        assert scan_message(raw).body == "café"
+
+    def test_single_part(self):
+        """测试单部分邮件"""
+        raw = MIMEText("单部分正文", 'plain', 'utf-8').as_bytes()
+
+        result = scan_message(raw)
+
+        assert result.body == "单部分正文"
+        assert not result.has_attachments
+
+    def test_attachment_payload_not_decoded(self):
+        """测试无效的附件内容不影响扫描（附件不会被解码）"""
+        raw = _with_attachment()
+        attachment_start = raw.index(b'filename="report.pdf"')
+        corrupted = raw[:attachment_start] + raw[attachment_start:].replace(b"JVBERi", b"!!!!!!", 1)
+
+        result = scan_message(corrupted)
+
+        assert result.body == "今天的记录"
+        assert result.has_attachments
+
+    def test_boundary_text_inside_body_ignored(self):
+        """测试正文中不在行首的boundary文本不会被当作分隔符"""
+        raw = (
+            b"Content-Type: multipart/mixed; boundary=\"b1\"\r\n\r\n"
+            b"--b1\r\n"
+            b"Content-Type: text/plain; charset=utf-8\r\n\r\n"
+            b"see --b1 here\r\n"
+            b"--b1--\r\n"
+        )
+
+        assert scan_message(raw).body == "see --b1 here"
@@ -0,0 +1,154 @@
+"""
+测试多邮箱聚合客户端
+使用内存中的模拟邮件客户端
+"""
+
+import time
+from datetime import datetime, timezone
+
+from workflow_tools.email.base.email_base import EmailClientBase, EmailResult, EmailMessage
+from workflow_tools.email.multi_source_client import MultiSourceEmailClient
+
+
+class FakeClient(EmailClientBase):
+    """返回固定邮件的模拟客户端"""
+
+    def __init__(self, messages=None, delay: float = 0, error: str = None, sync_state=None):
+        super().__init__()
+        self.messages = messages or []
+        self.delay = delay
+        self.error = error
+        self.sync_state = sync_state
+        self.sent = []
+        self.committed = []
+        self.disconnects = 0
+
+    def connect(self) -> bool:
+        return True
+
+    def disconnect(self) -> None:
+        self.disconnects += 1
+
+    def fetch_emails(self, subject=None, sender=None, since_date=None, limit=None) -> EmailResult:
+        time.sleep(self.delay)
+        if self.error:
+            return EmailResult(success=False, error=self.error)
+        metadata = {"sync_state": self.sync_state} if self.sync_state else {}
+        return EmailResult(success=True, messages=list(self.messages), metadata=metadata)
+
+    def commit_sync_state(self, result: EmailResult) -> None:
+        self.committed.append(result.metadata["sync_state"])
+
+    def send_email(self, to, subject, body, cc=None, bcc=None) -> bool:
+        self.sent.append((to, subject))
+        return True
+
+
+def _message(subject: str, hour: int, internet_message_id: str = None) -> EmailMessage:
+    """构造测试邮件"""
+    metadata = {'internet_message_id': internet_message_id} if internet_message_id else {}
+    return EmailMessage(
+        subject=subject,
+        sender="sender@example.com",
+        recipients=[],
+        body=subject,
+        received_time=datetime(2025, 10, 2, hour, tzinfo=timezone.utc),
+        message_id=subject,
+        metadata=metadata
+    )
+
+
+class TestMultiSourceFetch:
+    """测试并发获取与合并"""
+
+    def test_merge_sorted_and_deduplicated(self):
+        """测试按接收时间合并，并按Message-ID去重"""
+        client = MultiSourceEmailClient({
+            "outlook": FakeClient([_message("a", 8, "<a@x>"), _message("c", 6)]),
+            "qq": FakeClient([_message("b", 7), _message("a-copy", 8, "<a@x>")])
+        })
+
+        result = client.fetch_emails()
+
+        assert result.success
+        assert [msg.subject for msg in result.messages] == ["a", "b", "c"]
+        assert result.messages[1].metadata['source'] == "qq"
+        assert result.metadata['sources'] == {"outlook": 2, "qq": 2}
+
+    def test_sources_run_concurrently(self):
+        """测试总耗时取决于最慢的邮箱"""
+        client = MultiSourceEmailClient({
+            name: FakeClient([_message(name, 1)], delay=0.3) for name in ("a", "b", "c")
+        })
+
+        start = time.monotonic()
+        result = client.fetch_emails()
+
+        assert len(result.messages) == 3
+        assert time.monotonic() - start < 0.8
+
+    def test_slow_and_failed_sources_skipped(self):
+        """测试超时和失败的邮箱不影响其他邮箱"""
+        client = MultiSourceEmailClient(
+            {
+                "fast": FakeClient([_message("ok", 1)]),
+                "slow": FakeClient([_message("late", 2)], delay=1),
+                "broken": FakeClient(error="认证失败")
+            },
+            timeout=0.2
+        )
+
+        result = client.fetch_emails()
+
+        assert result.success
+        assert [msg.subject for msg in result.messages] == ["ok"]
+        assert set(result.metadata['failed_sources']) == {"slow", "broken"}
+
+    def test_disconnect_skips_source_still_fetching(self):
+        """测试超时后仍在后台获取的邮箱不会被主线程断开，由工作线程自行断开"""
+        fast = FakeClient([_message("ok", 1)])
+        slow = FakeClient([_message("late", 2)], delay=0.5)
+        client = MultiSourceEmailClient({"fast": fast, "slow": slow}, timeout=0.1)
+
+        client.fetch_emails()
+        client.disconnect()
+
+        assert fast.disconnects == 2
+        assert slow.disconnects == 0
+
+        time.sleep(0.6)
+        assert slow.disconnects == 1
+
+    def test_commit_sync_state_per_source(self):
+        """测试确认处理完成后才把同步状态交给各邮箱保存"""
+        outlook = FakeClient([_message("a", 8)], sync_state={"delta_link": "b"})
+        qq = FakeClient([_message("b", 7)], sync_state={"last_uid": 15})
+        failed = FakeClient(error="boom", sync_state={"last_uid": 3})
+        client = MultiSourceEmailClient({"outlook": outlook, "qq": qq, "failed": failed})
+
+        result = client.fetch_emails()
+        assert outlook.committed == [] and qq.committed == []
+
+        client.commit_sync_state(result)
+
+        assert outlook.committed == [{"delta_link": "b"}]
+        assert qq.committed == [{"last_uid": 15}]
+        assert failed.committed == []
+
+    def test_all_sources_failed(self):
+        """测试所有邮箱失败时返回失败结果"""
+        client = MultiSourceEmailClient({"a": FakeClient(error="x"), "b": FakeClient(error="y")})
+
+        result = client.fetch_emails()
+
+        assert not result.success
+        assert "所有邮箱获取失败" in result.error
+
+    def test_send_uses_first_source(self):
+        """测试使用第一个邮箱发送"""
+        first, second = FakeClient(), FakeClient()
+        client = MultiSourceEmailClient({"first": first, "second": second})
+
+        client.send_email(["to@example.com"], "总结", "内容")
+
+        assert first.sent and not second.sent
@@ -0,0 +1,254 @@
+"""
+测试Outlook Graph客户端的令牌复用、分页和增量查询
+使用模拟的MSAL应用和HTTP会话，不访问真实服务器
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from msal import SerializableTokenCache
+
+from workflow_tools.email.outlook.outlook_client import OutlookClient, parse_graph_messages
+from workflow_tools.email.outlook.graph_delta_state import GraphDeltaState
+
+
+def _make_client(**kwargs) -> OutlookClient:
+    """创建使用模拟HTTP会话的客户端"""
+    client = OutlookClient(
+        email_address="user@example.com",
+        client_id="client",
+        client_secret="secret",
+        tenant_id="tenant",
+        smtp_password="smtp",
+        **kwargs
+    )
+    client.access_token = "token"
+    client.token_expires_at = time.time() + 3600
+    client.session = MagicMock()
+    return client
+
+
+def _response(data: dict, status_code: int = 200) -> MagicMock:
+    """构造模拟响应"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = data
+    response.text = str(data)
+    return response
+
+
+def _graph_message(msg_id: str, subject: str = "每日记录", received: str = "2025-10-02T07:00:00Z") -> dict:
+    """构造Graph邮件数据"""
+    return {
+        "id": msg_id,
+        "subject": subject,
+        "from": {"emailAddress": {"address": "sender@example.com"}},
+        "toRecipients": [],
+        "receivedDateTime": received,
+        "body": {"content": f"正文{msg_id}"}
+    }
+
+
+class TestParseGraphMessages:
+    """测试同步和异步客户端共用的邮件解析"""
+
+    def test_invalid_message_skipped(self):
+        """测试无法解析的邮件被跳过，其余邮件正常返回"""
+        raw = _graph_message("1")
+        raw["internetMessageId"] = "<m1@example.com>"
+
+        messages = parse_graph_messages([raw, _graph_message("2", received="not-a-date")])
+
+        assert [msg.message_id for msg in messages] == ["1"]
+        assert messages[0].metadata == {"internet_message_id": "<m1@example.com>"}
+        assert messages[0].received_time.tzinfo is not None
+
+
+class TestTokenCache:
+    """测试访问令牌复用"""
+
+    @staticmethod
+    def _patch_app(expires_in: int = 3600):
+        """模拟MSAL应用"""
+        patcher = patch('workflow_tools.email.outlook.outlook_client.ConfidentialClientApplication')
+        mock_app_class = patcher.start()
+        mock_app_class.return_value.acquire_token_for_client.return_value = {
+            "access_token": "token", "expires_in": expires_in
+        }
+        return patcher, mock_app_class
+
+    def test_token_reused_across_connects(self):
+        """测试令牌未过期时不再请求认证，MSAL应用只创建一次"""
+        patcher, mock_app_class = self._patch_app()
+        try:
+            client = _make_client()
+            client.access_token = None
+            for _ in range(3):
+                client.connect()
+                client.disconnect()
+        finally:
+            patcher.stop()
+
+        assert mock_app_class.call_count == 1
+        assert mock_app_class.return_value.acquire_token_for_client.call_count == 1
+
+    def test_token_refreshed_before_expiry(self):
+        """测试令牌接近过期时重新获取"""
+        patcher, mock_app_class = self._patch_app()
+        try:
+            client = _make_client()
+            client.token_expires_at = time.time() + 60
+            client.connect()
+        finally:
+            patcher.stop()
+
+        assert mock_app_class.return_value.acquire_token_for_client.call_count == 1
+        assert client.token_expires_at > time.time() + 3000
+
+    def test_refresh_purges_cached_access_token(self):
+        """测试缓存中有即将过期的令牌时，强制刷新会删除缓存的令牌并重新获取"""
+        patcher, mock_app_class = self._patch_app()
+        try:
+            client = _make_client()
+            client.access_token = None
+            client.token_cache.add({
+                "client_id": "client",
+                "scope": ["https://graph.microsoft.com/.default"],
+                "token_endpoint": "https://login.microsoftonline.com/tenant/oauth2/v2.0/token",
+                "response": {"access_token": "old", "expires_in": 60, "token_type": "Bearer"}
+            })
+            mock_app_class.return_value.acquire_token_for_client.side_effect = [
+                {"access_token": "old", "expires_in": 60, "token_source": "cache"},
+                {"access_token": "new", "expires_in": 3600}
+            ]
+
+            assert client.connect()
+        finally:
+            patcher.stop()
+
+        assert client.access_token == "new"
+        assert list(client.token_cache.search(SerializableTokenCache.CredentialType.ACCESS_TOKEN)) == []
+        assert mock_app_class.return_value.acquire_token_for_client.call_count == 2
+
+    def test_token_cache_file_permissions(self, tmp_path):
+        """测试令牌缓存文件只允许当前用户读写"""
+        cache_file = tmp_path / "token_cache.json"
+        client = _make_client(token_cache_file=cache_file)
+        client.token_cache.has_state_changed = True
+
+        client._save_token_cache()
+
+        assert cache_file.exists()
+        assert os.stat(cache_file).st_mode & 0o777 == 0o600
+
+
+class TestPagination:
+    """测试分页查询"""
+
+    def test_follows_next_link(self):
+        """测试按@odata.nextLink获取所有页面"""
+        client = _make_client()
+        client.session.get.side_effect = [
+            _response({"value": [_graph_message("1")], "@odata.nextLink": "https://graph/next"}),
+            _response({"value": [_graph_message("2")]})
+        ]
+
+        result = client.fetch_emails(subject="每日记录")
+
+        assert [msg.message_id for msg in result.messages] == ["1", "2"]
+        second_call = client.session.get.call_args_list[1]
+        assert second_call.args[0] == "https://graph/next"
+        assert second_call.kwargs["params"] is None
+
+    def test_stops_at_limit(self):
+        """测试达到数量限制后不再请求下一页"""
+        client = _make_client()
+        client.session.get.return_value = _response({
+            "value": [_graph_message("1"), _graph_message("2")],
+            "@odata.nextLink": "https://graph/next"
+        })
+
+        result = client.fetch_emails(limit=2)
+
+        assert len(result.messages) == 2
+        assert client.session.get.call_count == 1
+        assert client.session.get.call_args.kwargs["params"]["$top"] == 2
+
+
+class TestDeltaQuery:
+    """测试增量查询"""
+
+    def test_delta_link_saved_and_reused(self, tmp_path):
+        """测试保存deltaLink并在下次运行时使用"""
+        delta_state = GraphDeltaState(tmp_path / "delta.json")
+        client = _make_client(delta_state=delta_state)
+        client.session.get.side_effect = [
+            _response({"value": [_graph_message("1"), _graph_message("2", subject="其他")],
+                       "@odata.deltaLink": "https://graph/delta?token=a"}),
+            _response({"value": [{"id": "1", "@removed": {"reason": "deleted"}}, _graph_message("3")],
+                       "@odata.deltaLink": "https://graph/delta?token=b"})
+        ]
+
+        first = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(first)
+        second = client.fetch_emails(subject="每日记录")
+        client.commit_sync_state(second)
+
+        assert [msg.message_id for msg in first.messages] == ["1"]
+        assert [msg.message_id for msg in second.messages] == ["3"]
+        assert client.session.get.call_args_list[1].args[0] == "https://graph/delta?token=a"
+        assert delta_state.get(client._delta_key()) == "https://graph/delta?token=b"
+
+    def test_replayed_delta_link_skips_old_modified_mail(self, tmp_path):
+        """测试重放deltaLink返回的、早于起始时间的旧邮件（如刚被标记已读）不计入结果"""
+        delta_state = GraphDeltaState(tmp_path / "delta.json")
+        client = _make_client(delta_state=delta_state)
+        delta_state.update(client._delta_key(), "https://graph/delta?token=a")
+        client.session.get.return_value = _response({
+            "value": [
+                _graph_message("old", received="2025-09-01T07:00:00Z"),
+                _graph_message("new", received="2025-10-02T07:00:00Z")
+            ],
+            "@odata.deltaLink": "https://graph/delta?token=b"
+        })
+
+        result = client.fetch_emails(since_date=datetime(2025, 10, 1, tzinfo=timezone.utc))
+
+        assert client.session.get.call_args.args[0] == "https://graph/delta?token=a"
+        assert [msg.message_id for msg in result.messages] == ["new"]
+
+    def test_expired_delta_link_full_resync(self, tmp_path):
+        """测试deltaLink失效(410)时执行完整同步"""
+        delta_state = GraphDeltaState(tmp_path / "delta.json")
+        client = _make_client(delta_state=delta_state)
+        delta_state.update(client._delta_key(), "https://graph/delta?token=old")
+        client.session.get.side_effect = [
+            _response({"error": {"code": "syncStateNotFound"}}, status_code=410),
+            _response({"value": [_graph_message("1")], "@odata.deltaLink": "https://graph/delta?token=new"})
+        ]
+
+        result = client.fetch_emails()
+        client.commit_sync_state(result)
+
+        assert result.success
+        assert client.session.get.call_args_list[1].args[0].endswith("/mailFolders/inbox/messages/delta")
+        assert delta_state.get(client._delta_key()) == "https://graph/delta?token=new"
+
+    def test_delta_link_saved_only_after_commit(self, tmp_path):
+        """测试未确认处理完成时不保存deltaLink，下次运行重新获取同一批邮件"""
+        delta_state = GraphDeltaState(tmp_path / "delta.json")
+        client = _make_client(delta_state=delta_state)
+        delta_state.update(client._delta_key(), "https://graph/delta?token=a")
+        client.session.get.side_effect = [
+            _response({"value": [_graph_message("1")], "@odata.deltaLink": "https://graph/delta?token=b"}),
+            _response({"value": [_graph_message("1")], "@odata.deltaLink": "https://graph/delta?token=b"})
+        ]
+
+        client.fetch_emails()
+        retry = client.fetch_emails()
+
+        assert client.session.get.call_args_list[1].args[0] == "https://graph/delta?token=a"
+        assert retry.metadata["sync_state"]["delta_link"] == "https://graph/delta?token=b"
+        assert delta_state.get(client._delta_key()) == "https://graph/delta?token=a"
@@ -0,0 +1,336 @@
+"""
+测试R2Client的传输参数、进度回调、可续传分片上传、批量操作和对象列表
+使用内存中的模拟S3客户端，不连接真实的R2
+"""
+
+import hashlib
+
+import pytest
+from botocore.exceptions import ClientError
+
+from workflow_tools.storage.cloudflare_r2.r2_client import R2Client
+
+
+class FakeS3:
+    """模拟分片上传、列表和批量删除相关的S3接口"""
+
+    def __init__(self, fail_on_part=None):
+        self.uploads = {}
+        self.objects = {}
+        self.etags = {}
+        self.part_calls = []
+        self.fail_on_part = fail_on_part
+        self.simple_uploads = []
+        self.delete_requests = []
+        self.presigned = []
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.part_calls.append(PartNumber)
+        if PartNumber == self.fail_on_part:
+            raise ClientError({'Error': {'Code': 'InternalError', 'Message': 'connection reset'}}, 'UploadPart')
+        self.uploads[UploadId][PartNumber] = Body
+        return {'ETag': f'"etag-{PartNumber}"'}
+
+    def get_paginator(self, operation):
+        fake = self
+
+        class ListPartsPaginator:
+            def paginate(self, Bucket, Key, UploadId):
+                if UploadId not in fake.uploads:
+                    raise ClientError({'Error': {'Code': 'NoSuchUpload', 'Message': ''}}, 'ListParts')
+                yield {'Parts': [
+                    {'PartNumber': number, 'ETag': f'"etag-{number}"', 'Size': len(body)}
+                    for number, body in fake.uploads[UploadId].items()
+                ]}
+
+        class ListObjectsPaginator:
+            def paginate(self, Bucket, PaginationConfig, Prefix="", Delimiter=None):
+                fake.pages_served = 0
+                keys = sorted(key for key in fake.objects if key.startswith(Prefix))
+                prefixes = []
+                if Delimiter:
+                    nested = [key for key in keys if Delimiter in key[len(Prefix):]]
+                    prefixes = sorted({Prefix + key[len(Prefix):].split(Delimiter)[0] + Delimiter for key in nested})
+                    keys = [key for key in keys if key not in nested]
+                # 每页2个对象，测试分页
+                for i in range(0, max(len(keys), 1), 2):
+                    fake.pages_served += 1
+                    yield {
+                        'Contents': [
+                            {'Key': key, 'Size': len(fake.objects[key]), 'ETag': f'"{fake.etags[key]}"'}
+                            for key in keys[i:i + 2]
+                        ],
+                        'CommonPrefixes': [{'Prefix': p} for p in prefixes] if i == 0 else []
+                    }
+
+        return ListPartsPaginator() if operation == 'list_parts' else ListObjectsPaginator()
+
+    def put(self, key, data):
+        """直接写入对象（单次上传的ETag为MD5）"""
+        self.objects[key] = data
+        self.etags[key] = hashlib.md5(data).hexdigest()
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        self.delete_requests.append(keys)
+        errors = []
+        for key in keys:
+            if key.startswith("locked/"):
+                errors.append({'Key': key, 'Code': 'AccessDenied', 'Message': 'denied'})
+            else:
+                self.objects.pop(key, None)
+        return {'Errors': errors}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        assert numbers == sorted(parts)
+        self.objects[Key] = b"".join(parts[number] for number in numbers)
+        digests = b"".join(hashlib.md5(parts[number]).digest() for number in numbers)
+        self.etags[Key] = f"{hashlib.md5(digests).hexdigest()}-{len(numbers)}"
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        self.simple_uploads.append((Key, Config))
+        with open(Filename, 'rb') as f:
+            data = f.read()
+        if Callback:
+            Callback(len(data))
+        self.put(Key, data)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.presigned.append(Params['Key'])
+        return f"https://r2.example.com/{Params['Key']}"
+
+
+@pytest.fixture
+def r2(tmp_path):
+    """创建使用模拟S3的客户端（分片阈值和分片大小为10字节）"""
+    client = R2Client(
+        access_key_id="key", secret_access_key="secret",
+        endpoint_url="https://account.r2.cloudflarestorage.com", bucket_name="bucket",
+        multipart_threshold=10, multipart_chunksize=10, max_concurrency=4,
+        upload_state_file=tmp_path / "uploads.json"
+    )
+    client.client = FakeS3()
+    return client
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """45字节的测试文件（5个分片）"""
+    path = tmp_path / "archive.zip"
+    path.write_bytes(bytes(range(45)))
+    return path
+
+
+class TestR2Transfer:
+    """测试上传传输"""
+
+    def test_transfer_config(self, r2):
+        """测试传输参数"""
+        assert r2.transfer_config.multipart_threshold == 10
+        assert r2.transfer_config.multipart_chunksize == 10
+        assert r2.transfer_config.max_request_concurrency == 4
+
+    def test_small_file_uses_transfer_config(self, r2, tmp_path):
+        """测试小文件直接上传，使用传输参数并回调进度"""
+        small = tmp_path / "note.txt"
+        small.write_bytes(b"hello")
+        progress = []
+
+        result = r2.upload_file(small, progress_callback=lambda msg, cur, total: progress.append((cur, total)))
+
+        assert result.success
+        assert r2.client.simple_uploads == [("note.txt", r2.transfer_config)]
+        assert progress == [(5, 5)]
+
+    def test_multipart_upload(self, r2, archive):
+        """测试大文件并发分片上传，进度累计到文件大小"""
+        progress = []
+
+        result = r2.upload_file(archive, progress_callback=lambda msg, cur, total: progress.append((cur, total)))
+
+        assert result.success
+        assert r2.client.objects["archive.zip"] == archive.read_bytes()
+        assert sorted(r2.client.part_calls) == [1, 2, 3, 4, 5]
+        assert max(progress) == (45, 45)
+        assert r2.upload_state.get("bucket/archive.zip") is None
+
+    def test_resume_after_interruption(self, r2, archive):
+        """测试上传中断后再次上传只上传未完成的分片"""
+        r2.client.fail_on_part = 3
+        first = r2.upload_file(archive)
+
+        assert not first.success
+        assert r2.upload_state.get("bucket/archive.zip") is not None
+
+        r2.client.fail_on_part = None
+        r2.client.part_calls.clear()
+        second = r2.upload_file(archive)
+
+        assert second.success
+        assert r2.client.part_calls == [3]
+        assert second.metadata['resumed_parts'] == 4
+        assert r2.client.objects["archive.zip"] == archive.read_bytes()
+
+    def test_changed_file_restarts_upload(self, r2, archive):
+        """测试文件变化后放弃旧的上传重新开始"""
+        r2.client.fail_on_part = 2
+        r2.upload_file(archive)
+
+        archive.write_bytes(bytes(range(50)))
+        r2.client.fail_on_part = None
+        r2.client.part_calls.clear()
+        result = r2.upload_file(archive)
+
+        assert result.success
+        assert sorted(r2.client.part_calls) == [1, 2, 3, 4, 5]
+        assert list(r2.client.uploads) == []
+        assert r2.client.objects["archive.zip"] == bytes(range(50))
+
+    def test_expired_upload_restarts(self, r2, archive):
+        """测试服务器上的上传已失效时重新开始"""
+        r2.client.fail_on_part = 5
+        r2.upload_file(archive)
+        r2.client.uploads.clear()
+
+        r2.client.fail_on_part = None
+        result = r2.upload_file(archive)
+
+        assert result.success
+        assert result.metadata['resumed_parts'] == 0
+
+
+class TestR2BulkOperations:
+    """测试批量上传、批量删除和目录同步"""
+
+    @pytest.fixture
+    def history(self, tmp_path):
+        """模拟history目录：2个小文件和1个分片上传的大文件"""
+        directory = tmp_path / "history"
+        (directory / "2024").mkdir(parents=True)
+        (directory / "history_1.json").write_bytes(b'{"a": 1}')
+        (directory / "2024" / "history_2.json").write_bytes(b'{"b": 2}')
+        (directory / "analysis_stream.md").write_bytes(b"x" * 25)
+        return directory
+
+    def test_upload_many(self, r2, tmp_path):
+        """测试批量上传保持顺序，单个失败不影响其他文件"""
+        first = tmp_path / "a.txt"
+        first.write_bytes(b"a")
+        progress = []
+
+        results = r2.upload_many(
+            [first, (first, "renamed.txt"), tmp_path / "missing.txt"],
+            progress_callback=lambda msg, cur, total: progress.append((cur, total))
+        )
+
+        assert [r.success for r in results] == [True, True, False]
+        assert results[1].file_key == "renamed.txt"
+        assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+    def test_delete_many_batches(self, r2, monkeypatch):
+        """测试按1000个对象分批删除，并汇总失败的对象"""
+        monkeypatch.setattr("workflow_tools.storage.cloudflare_r2.r2_client.DELETE_BATCH_SIZE", 2)
+        for key in ("a", "b", "c", "locked/d"):
+            r2.client.put(key, b"data")
+
+        result = r2.delete_many(["a", "b", "c", "locked/d", "a"])
+
+        assert not result.success
+        assert sorted(len(batch) for batch in r2.client.delete_requests) == [2, 2]
+        assert sorted(result.metadata['deleted']) == ["a", "b", "c"]
+        assert result.metadata['errors'][0]['key'] == "locked/d"
+
+    def test_sync_uploads_only_changes(self, r2, history):
+        """测试同步只上传新增或变化的文件（包括分片上传的ETag比较）"""
+        first = r2.sync_directory(history, prefix="history")
+
+        assert first.success
+        assert sorted(first.metadata['uploaded']) == [
+            "history/2024/history_2.json", "history/analysis_stream.md", "history/history_1.json"
+        ]
+        assert "-" in r2.client.etags["history/analysis_stream.md"]
+
+        (history / "history_1.json").write_bytes(b'{"a": 9}')
+        (history / "history_3.json").write_bytes(b'{"c": 3}')
+        second = r2.sync_directory(history, prefix="history/")
+
+        assert sorted(second.metadata['uploaded']) == ["history/history_1.json", "history/history_3.json"]
+        assert sorted(second.metadata['skipped']) == ["history/2024/history_2.json", "history/analysis_stream.md"]
+        assert r2.client.objects["history/history_1.json"] == b'{"a": 9}'
+
+    def test_sync_deletes_removed(self, r2, history):
+        """测试delete_removed时删除本地已不存在的对象，不影响前缀外的对象"""
+        r2.client.put("history/old.json", b"old")
+        r2.client.put("other/keep.json", b"keep")
+
+        result = r2.sync_directory(history, prefix="history/", delete_removed=True)
+
+        assert result.metadata['deleted'] == ["history/old.json"]
+        assert "other/keep.json" in r2.client.objects
+
+    def test_sync_missing_directory(self, r2, tmp_path):
+        """测试目录不存在"""
+        assert not r2.sync_directory(tmp_path / "missing").success
+
+
+class TestR2Listing:
+    """测试懒加载的对象列表"""
+
+    @pytest.fixture
+    def bucket(self, r2):
+        """history/下有3个文件和2个子目录"""
+        for key in ("history/a.json", "history/b.json", "history/c.json",
+                    "history/2024/d.json", "history/2025/e.json", "other.txt"):
+            r2.client.put(key, b"data")
+        r2.client.presigned.clear()
+        return r2
+
+    def test_iter_files_is_lazy(self, bucket):
+        """测试按页懒加载，不生成访问URL"""
+        objects = bucket.iter_files(prefix="history/")
+        first = next(objects)
+
+        assert first.key == "history/2024/d.json"
+        assert first.size == 4 and first.etag
+        assert bucket.client.pages_served == 1
+        assert len(list(objects)) == 4
+        assert bucket.client.presigned == []
+
+    def test_url_generated_on_demand(self, bucket):
+        """测试访问URL在需要时才生成"""
+        obj = next(bucket.iter_files(prefix="history/a"))
+
+        assert obj.url == "https://r2.example.com/history/a.json"
+        assert bucket.client.presigned == ["history/a.json"]
+
+    def test_delimiter_lists_directories(self, bucket):
+        """测试使用分隔符按目录列出"""
+        objects = list(bucket.iter_files(prefix="history/", delimiter="/"))
+
+        assert [o.key for o in objects if o.is_prefix] == ["history/2024/", "history/2025/"]
+        assert [o.key for o in objects if not o.is_prefix] == ["history/a.json", "history/b.json", "history/c.json"]
+
+    def test_list_files_without_urls(self, bucket):
+        """测试list_files可以不生成访问URL，并返回子目录前缀"""
+        result = bucket.list_files(prefix="history/", delimiter="/", include_urls=False)
+
+        assert result.metadata['file_count'] == 3
+        assert result.metadata['prefixes'] == ["history/2024/", "history/2025/"]
+        assert 'url' not in result.metadata['files'][0]
+        assert bucket.client.presigned == []
+
+    def test_list_files_keeps_urls_by_default(self, bucket):
+        """测试list_files默认仍返回访问URL"""
+        result = bucket.list_files(prefix="history/2024/")
+
+        assert result.metadata['files'][0]['url'] == "https://r2.example.com/history/2024/d.json"
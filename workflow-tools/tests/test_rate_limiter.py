@@ -0,0 +1,172 @@
+"""
+测试令牌桶速率限制器和重试策略
+"""
+
+import threading
+import time
+
+import pytest
+
+from workflow_tools.utils import rate_limiter as rate_limiter_module
+from workflow_tools.utils.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+
+
+class TransientError(Exception):
+    """可重试的错误，可携带服务器要求的等待时间"""
+
+    def __init__(self, retry_after=None):
+        super().__init__("temporarily unavailable")
+        self.retry_after = retry_after
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录重试等待时间，不真正等待"""
+    recorded = []
+    monkeypatch.setattr(rate_limiter_module.time, "sleep", recorded.append)
+    return recorded
+
+
+class TestParseRetryAfter:
+    """测试等待时间解析"""
+
+    def test_formats(self):
+        """测试秒数、带单位时长和无法解析的值"""
+        assert parse_retry_after("30") == 30.0
+        assert parse_retry_after("1.5s") == 1.5
+        assert parse_retry_after(7) == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_http_date_in_past(self):
+        """测试已经过去的HTTP日期返回0"""
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestRateLimiter:
+    """测试令牌桶"""
+
+    def test_spaces_requests(self):
+        """测试令牌用完后按速率等待"""
+        limiter = RateLimiter(rate=20, capacity=1)
+
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+
+        # 第一个令牌立即可用，之后每个间隔0.05秒
+        assert time.monotonic() - start >= 0.14
+
+    def test_unlimited_rate(self):
+        """测试速率为0时不等待"""
+        limiter = RateLimiter.per_minute(0)
+
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.acquire()
+
+        assert time.monotonic() - start < 0.1
+
+    def test_pause_blocks_all_threads(self):
+        """测试pause后所有共享限制器的线程都要等待"""
+        limiter = RateLimiter()
+        limiter.pause(0.3)
+        finished = []
+
+        def worker():
+            limiter.acquire()
+            finished.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(end - start >= 0.25 for end in finished)
+
+    def test_acquire_timeout(self):
+        """测试超时返回False"""
+        limiter = RateLimiter(rate=1, capacity=1)
+        limiter.acquire()
+
+        assert limiter.acquire(timeout=0.05) is False
+
+
+class TestRetryPolicy:
+    """测试重试策略"""
+
+    def test_retries_until_success(self, sleeps):
+        """测试失败后按指数退避重试"""
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise TransientError()
+            return "ok"
+
+        policy = RetryPolicy(max_attempts=5, base_delay=1.0)
+
+        assert policy.call(flaky) == "ok"
+        assert len(calls) == 3
+        assert 0.5 <= sleeps[0] <= 1.0
+        assert 1.0 <= sleeps[1] <= 2.0
+
+    def test_honors_server_delay_and_pauses_limiter(self, sleeps):
+        """测试服务器要求的等待时间优先，并暂停共享的限制器"""
+        limiter = RateLimiter()
+        attempts = []
+
+        def throttled():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise TransientError(retry_after=30)
+            return "ok"
+
+        policy = RetryPolicy(base_delay=0.5, rate_limiter=limiter)
+        limiter.acquire = lambda *args, **kwargs: True
+
+        policy.call(throttled, retry_after=lambda e: e.retry_after)
+
+        assert 30 <= sleeps[0] <= 30.5
+        assert limiter._paused_until > time.monotonic() + 25
+
+    def test_non_retryable_raises_immediately(self, sleeps):
+        """测试不可重试的错误直接抛出"""
+        def bad_request():
+            raise ValueError("invalid argument")
+
+        policy = RetryPolicy()
+
+        with pytest.raises(ValueError):
+            policy.call(bad_request, is_retryable=lambda e: not isinstance(e, ValueError))
+        assert sleeps == []
+
+    def test_deadline_stops_retries(self, sleeps):
+        """测试等待时间超过总截止时间时不再重试"""
+        calls = []
+
+        def always_throttled():
+            calls.append(1)
+            raise TransientError(retry_after=120)
+
+        policy = RetryPolicy(max_attempts=5, deadline=60)
+
+        with pytest.raises(TransientError):
+            policy.call(always_throttled, retry_after=lambda e: e.retry_after)
+        assert len(calls) == 1
+
+    def test_max_attempts(self, sleeps):
+        """测试达到最大尝试次数后抛出最后一个异常"""
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise TransientError()
+
+        with pytest.raises(TransientError):
+            RetryPolicy(max_attempts=3).call(failing)
+        assert len(calls) == 3
+        assert len(sleeps) == 2
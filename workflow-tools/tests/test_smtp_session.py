@@ -0,0 +1,106 @@
+"""
+测试SMTP会话复用和批量发送
+使用模拟的SMTP连接，不访问真实服务器
+"""
+
+import smtplib
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from workflow_tools.email.base.smtp_session import SMTPSession, build_message
+from workflow_tools.email.base.email_base import OutgoingEmail
+from workflow_tools.email.base.generic_imap_client import GenericIMAPClient
+from workflow_tools.exceptions.email_exceptions import EmailAuthError
+
+
+def _make_session() -> SMTPSession:
+    """创建测试用SMTP会话"""
+    return SMTPSession("smtp.example.com", 587, "user@example.com", "secret")
+
+
+def _message():
+    """构造测试邮件"""
+    return build_message("user@example.com", ["to@example.com"], "主题", "正文")
+
+
+class TestSMTPSession:
+    """测试SMTP会话"""
+
+    def test_connection_reused_with_rset(self):
+        """测试多次发送只登录一次，邮件之间发送RSET"""
+        session = _make_session()
+        with patch('smtplib.SMTP') as mock_smtp:
+            server = mock_smtp.return_value
+            for _ in range(3):
+                session.send_message(_message(), ["to@example.com"])
+
+        assert mock_smtp.call_count == 1
+        server.login.assert_called_once_with("user@example.com", "secret")
+        assert server.send_message.call_count == 3
+        assert server.rset.call_count == 2
+
+    def test_relogin_after_421(self):
+        """测试服务器返回421后重新登录并重发"""
+        session = _make_session()
+        first, second = MagicMock(), MagicMock()
+        with patch('smtplib.SMTP', side_effect=[first, second]):
+            session.send_message(_message(), ["to@example.com"])
+            first.rset.side_effect = smtplib.SMTPResponseException(421, b"Timeout waiting for data")
+            session.send_message(_message(), ["to@example.com"])
+
+        second.login.assert_called_once()
+        second.send_message.assert_called_once()
+
+    def test_rejected_message_keeps_connection(self):
+        """测试服务器拒绝邮件时不丢弃连接"""
+        session = _make_session()
+        with patch('smtplib.SMTP') as mock_smtp:
+            server = mock_smtp.return_value
+            server.send_message.side_effect = smtplib.SMTPRecipientsRefused({})
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                session.send_message(_message(), ["to@example.com"])
+
+        assert session.is_connected
+        server.quit.assert_not_called()
+
+    def test_auth_error(self):
+        """测试认证失败抛出EmailAuthError"""
+        session = _make_session()
+        with patch('smtplib.SMTP') as mock_smtp:
+            mock_smtp.return_value.login.side_effect = smtplib.SMTPAuthenticationError(535, b"bad")
+            with pytest.raises(EmailAuthError):
+                session.send_message(_message(), ["to@example.com"])
+
+        assert not session.is_connected
+
+
+class TestSendMany:
+    """测试批量发送"""
+
+    def test_send_many_over_one_session(self):
+        """测试批量发送复用同一连接，并报告失败的邮件"""
+        client = GenericIMAPClient(
+            email_address="user@example.com",
+            password="secret",
+            imap_server="imap.example.com",
+            imap_port=993,
+            smtp_server="smtp.example.com",
+            smtp_port=587,
+            use_ssl_for_smtp=False
+        )
+        emails = [OutgoingEmail(to=[f"r{i}@example.com"], subject="总结", body="内容") for i in range(3)]
+
+        def fake_send(msg, to_addrs):
+            if to_addrs == ["r1@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({"r1@example.com": (550, b"no such user")})
+            return {}
+
+        with patch('smtplib.SMTP') as mock_smtp, patch('time.sleep'):
+            mock_smtp.return_value.send_message.side_effect = fake_send
+            result = client.send_many(emails)
+
+        assert mock_smtp.call_count == 1
+        assert not result.success
+        assert result.metadata['sent'] == 2
+        assert [item['email'].to for item in result.metadata['failed']] == [["r1@example.com"]]
@@ -3,10 +3,12 @@ AI模型模块
 """
 
 from .base.ai_client_base import AIClientBase, AIResult
+from .base.map_reduce import MapReduceSummarizer
 from .gemini.gemini_client import GeminiClient
 
 __all__ = [
     "AIClientBase",
     "AIResult",
+    "MapReduceSummarizer",
     "GeminiClient"
 ]
\ No newline at end of file
@@ -3,5 +3,6 @@ AI客户端基类
 """
 
 from .ai_client_base import AIClientBase, AIResult
+from .map_reduce import MapReduceSummarizer
 
-__all__ = ["AIClientBase", "AIResult"]
\ No newline at end of file
+__all__ = ["AIClientBase", "AIResult", "MapReduceSummarizer"]
\ No newline at end of file
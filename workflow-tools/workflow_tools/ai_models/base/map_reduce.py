@@ -0,0 +1,146 @@
+"""
+Map-Reduce长文本分析
+输入超过单次调用预算时，按token预算分块并行总结，再合并各块的总结
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+from .ai_client_base import AIClientBase, AIResult
+from ...utils.token_utils import estimate_tokens, split_by_token_budget
+
+
+class MapReduceSummarizer:
+    """
+    Map-Reduce总结器
+
+    Map: 每个文本块单独调用一次generate_content，多个块并行执行；
+    Reduce: 将各块的总结合并为最终结果。总结本身超过预算时，先分组合并再继续，
+    因此总耗时取决于最大的块和合并层数，而不是输入总长度
+    """
+
+    def __init__(
+        self,
+        client: AIClientBase,
+        map_prompt: str,
+        reduce_prompt: str,
+        max_chunk_tokens: int = 50000,
+        max_workers: int = 4
+    ):
+        """
+        初始化总结器
+
+        Args:
+            client: AI客户端
+            map_prompt: 分块总结提示词，包含 {chunk_contents}、{chunk_index}、{chunk_count} 占位符
+            reduce_prompt: 合并提示词，包含 {chunk_summaries} 占位符
+            max_chunk_tokens: 每块（包括合并时每组总结）的最大token数
+            max_workers: 并行调用的最大数量
+        """
+        if max_chunk_tokens <= 0:
+            raise ValueError("max_chunk_tokens必须大于0")
+
+        self.client = client
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_workers = max(1, max_workers)
+
+        self.logger = logging.getLogger(__name__)
+
+    def summarize(self, sections: Sequence[str]) -> AIResult:
+        """
+        分块总结并合并
+
+        Args:
+            sections: 待分析的文本段落（如每封邮件一段，段落尽量不被拆开）
+
+        Returns:
+            分析结果，metadata包含chunk_count（分块数）和reduce_rounds（合并轮数）；
+            任一块失败时返回失败结果
+        """
+        start_time = time.monotonic()
+        chunks = split_by_token_budget(sections, self.max_chunk_tokens)
+        if not chunks:
+            return AIResult(success=False, error="没有可分析的内容")
+
+        self.logger.info(f"输入已分为 {len(chunks)} 块，开始并行总结")
+        prompts = [
+            self.map_prompt.format(chunk_contents=chunk, chunk_index=index, chunk_count=len(chunks))
+            for index, chunk in enumerate(chunks, 1)
+        ]
+
+        try:
+            summaries = self._generate_all(prompts, stage="分块总结")
+
+            reduce_rounds = 0
+            while True:
+                reduce_rounds += 1
+                groups = self._group_summaries(summaries)
+                if len(groups) == 1:
+                    content = self._generate_all(
+                        [self.reduce_prompt.format(chunk_summaries=groups[0])], stage="合并总结"
+                    )[0]
+                    break
+                # 总结合计仍超过预算，先分组合并
+                self.logger.info(f"第 {reduce_rounds} 轮合并: {len(summaries)} 份总结分为 {len(groups)} 组")
+                summaries = self._generate_all(
+                    [self.reduce_prompt.format(chunk_summaries=group) for group in groups], stage="分组合并"
+                )
+        except RuntimeError as e:
+            self.logger.error(str(e))
+            return AIResult(success=False, error=str(e))
+
+        elapsed = time.monotonic() - start_time
+        self.logger.info(f"Map-Reduce分析完成: {len(chunks)} 块, {reduce_rounds} 轮合并, 耗时 {elapsed:.1f}秒")
+
+        return AIResult(
+            success=True,
+            content=content,
+            metadata={
+                'chunk_count': len(chunks),
+                'reduce_rounds': reduce_rounds
+            }
+        )
+
+    def _group_summaries(self, summaries: List[str]) -> List[str]:
+        """
+        将总结按预算分组，每组拼接为一段文本
+
+        每组至少包含两份总结，保证多轮合并一定收敛
+        """
+        sections = [f"[第 {index} 部分]\n{summary}" for index, summary in enumerate(summaries, 1)]
+        if len(sections) <= 1:
+            return ["\n\n".join(sections)]
+
+        groups = split_by_token_budget(sections, self.max_chunk_tokens, separator="\n\n")
+        if len(groups) < len(sections):
+            return groups
+        return ["\n\n".join(sections[start:start + 2]) for start in range(0, len(sections), 2)]
+
+    def _generate_all(self, prompts: List[str], stage: str) -> List[str]:
+        """
+        并行调用generate_content，结果顺序与提示词一致
+
+        Raises:
+            RuntimeError: 任一调用失败
+        """
+        if len(prompts) == 1:
+            results = [self.client.generate_content(prompts[0])]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(prompts)),
+                thread_name_prefix="ai-map"
+            ) as executor:
+                results = list(executor.map(self.client.generate_content, prompts))
+
+        for index, result in enumerate(results, 1):
+            if not result.success:
+                raise RuntimeError(f"{stage}失败（第 {index}/{len(prompts)} 块）: {result.error}")
+
+        self.logger.debug(
+            f"{stage}完成: {len(prompts)} 次调用，最大输入约 {max(estimate_tokens(p) for p in prompts)} tokens"
+        )
+        return [result.content for result in results]
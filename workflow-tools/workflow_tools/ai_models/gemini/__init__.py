@@ -2,6 +2,7 @@
 Gemini AI客户端
 """
 
-from .gemini_client import GeminiClient, GeminiResult
+from .gemini_client import GeminiClient, GeminiResult, TokenCount
+from .file_registry import UploadedFileRegistry
 
-__all__ = ["GeminiClient", "GeminiResult"]
\ No newline at end of file
+__all__ = ["GeminiClient", "GeminiResult", "TokenCount", "UploadedFileRegistry"]
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+Gemini已上传文件登记表
+按文件内容哈希记录上传到Gemini的远程文件名和过期时间，文件仍有效时无需重新上传
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from ...utils.json_state import JsonStateFile
+
+
+class UploadedFileRegistry:
+    """
+    基于JSON文件的已上传文件登记表
+
+    Gemini Files API上传的文件保留48小时，登记表记录每个文件内容哈希对应的远程文件，
+    过期（或即将过期）的记录在读取和写入时自动清理
+
+    键是按CACHE_KEY_HASH_ALGORITHM（blake2b，16字节摘要）计算的文件内容哈希，
+    更换哈希算法后旧记录不再命中，文件会重新上传
+
+    文件格式:
+        {
+            "<文件内容blake2b十六进制摘要>": {
+                "name": "files/abc123",
+                "uri": "https://generativelanguage.googleapis.com/v1beta/files/abc123",
+                "mime_type": "application/pdf",
+                "expires_at": 1700000000.0
+            }
+        }
+    """
+
+    # Gemini Files API文件的默认保留时间（秒）
+    DEFAULT_FILE_TTL = 48 * 3600
+
+    def __init__(
+        self,
+        registry_file: Union[str, Path] = ".cache/gemini/uploaded_files.json",
+        safety_margin: float = 3600
+    ):
+        """
+        初始化登记表
+
+        Args:
+            registry_file: 登记表文件路径
+            safety_margin: 安全余量（秒），剩余有效期不足该值的文件视为已过期，
+                避免分析过程中远程文件过期
+        """
+        self.registry_file = Path(registry_file)
+        self.safety_margin = safety_margin
+        self._state = JsonStateFile(self.registry_file)
+
+    @staticmethod
+    def expiry_timestamp(remote_file: Any) -> float:
+        """
+        获取远程文件的过期时间戳
+
+        Args:
+            remote_file: SDK返回的文件对象（带expiration_time属性）
+
+        Returns:
+            过期时间的Unix时间戳，无法获取时按默认保留时间计算
+        """
+        expiration_time = getattr(remote_file, 'expiration_time', None)
+        if isinstance(expiration_time, datetime):
+            return expiration_time.timestamp()
+        return time.time() + UploadedFileRegistry.DEFAULT_FILE_TTL
+
+    def _is_valid(self, entry: Dict[str, Any], now: float) -> bool:
+        """检查记录是否完整且在安全余量之外仍未过期"""
+        return bool(entry.get('name')) and entry.get('expires_at', 0) - self.safety_margin > now
+
+    def _purge(self, data: Dict[str, Dict[str, Any]]) -> int:
+        """删除过期记录（在modify()内调用），返回删除数量"""
+        now = time.time()
+        stale = [key for key, entry in data.items() if not isinstance(entry, dict) or not self._is_valid(entry, now)]
+        for key in stale:
+            del data[key]
+        return len(stale)
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        获取仍然有效的远程文件记录
+
+        Args:
+            file_hash: 文件内容哈希
+
+        Returns:
+            远程文件记录（name、uri、mime_type、expires_at），不存在或已过期则返回None
+        """
+        entry = self._state.read().get(file_hash)
+        if isinstance(entry, dict) and self._is_valid(entry, time.time()):
+            return entry
+        self.purge_expired()
+        return None
+
+    def register(self, file_hash: str, remote_file: Any) -> None:
+        """
+        记录上传成功的远程文件，同时清理过期记录
+
+        Args:
+            file_hash: 文件内容哈希
+            remote_file: SDK返回的文件对象
+        """
+        with self._state.modify() as data:
+            self._purge(data)
+            data[file_hash] = {
+                'name': getattr(remote_file, 'name', None),
+                'uri': getattr(remote_file, 'uri', None),
+                'mime_type': getattr(remote_file, 'mime_type', None),
+                'expires_at': self.expiry_timestamp(remote_file)
+            }
+
+    def remove(self, file_hash: str) -> None:
+        """
+        删除记录（如远程文件已被提前删除）
+
+        Args:
+            file_hash: 文件内容哈希
+        """
+        with self._state.modify() as data:
+            data.pop(file_hash, None)
+
+    def purge_expired(self) -> int:
+        """
+        清理所有过期记录
+
+        Returns:
+            删除的记录数量
+        """
+        with self._state.modify() as data:
+            return self._purge(data)
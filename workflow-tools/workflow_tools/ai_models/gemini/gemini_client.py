@@ -2,11 +2,14 @@
 Gemini AI客户端实现
 """
 
+import hashlib
 import logging
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Union, Any, List
+from typing import Optional, Union, Any, Callable, List, Iterator, Dict, Sequence, Tuple
 
 try:
     # 尝试使用新版本的Google GenAI SDK
@@ -24,10 +27,13 @@ except ImportError:
         raise ImportError("请安装google-genai或google-generativeai: pip install google-genai")
 
 from ..base.ai_client_base import AIClientBase, AIResult, ProgressCallback
-from ...exceptions.ai_exceptions import GeminiAPIError
+from ...exceptions.ai_exceptions import GeminiAPIError, GeminiStreamError
 from ...utils.config_manager import ConfigManager
 from ...utils.cache_manager import CacheManager
-from ...utils.file_utils import get_cache_key
+from ...utils.file_utils import CACHE_KEY_HASH_ALGORITHM, get_cache_key, get_file_hash
+from ...utils.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+from ...utils.token_utils import estimate_tokens
+from .file_registry import UploadedFileRegistry
 
 # 导入配置
 try:
@@ -51,6 +57,13 @@ class GeminiResult(AIResult):
     raw_response: Optional[Any] = None
 
 
+@dataclass
+class TokenCount:
+    """提示词token计数结果"""
+    total_tokens: int
+    estimated: bool = False  # True表示API不可用，使用本地估算
+
+
 @dataclass
 class GeminiValidationResult:
     """Gemini配置验证结果"""
@@ -67,12 +80,29 @@ class GeminiValidationResult:
 class GeminiClient(AIClientBase):
     """Gemini AI客户端"""
 
+    # 可以重试的HTTP状态码（超时、限流和服务器错误）
+    RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+    # 流式生成中断后的续写提示词
+    STREAM_RESUME_PROMPT = """{prompt}
+
+---
+你之前对上述要求的回答在输出过程中被中断，已输出的部分如下：
+
+{partial}
+
+---
+请从中断处继续输出剩余内容，不要重复已输出的部分，也不要添加任何说明。"""
+
     def __init__(
         self,
         api_key: Optional[str] = None,
         model_name: Optional[str] = None,
         cache_enabled: bool = True,
-        cache_ttl: int = 3600
+        cache_ttl: int = 3600,
+        content_cache_ttl: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None
     ):
         """
         初始化Gemini客户端
@@ -82,6 +112,11 @@ class GeminiClient(AIClientBase):
             model_name: 模型名称，如果为None则从settings.py获取
             cache_enabled: 是否启用缓存
             cache_ttl: 缓存生存时间（秒）
+            content_cache_ttl: generate_content结果的缓存生存时间（秒），
+                如果为None则从环境变量GEMINI_CONTENT_CACHE_TTL获取（默认24小时）
+            rate_limiter: 请求速率限制器，多个客户端可以共享同一个限制器，
+                如果为None则按环境变量GEMINI_REQUESTS_PER_MINUTE创建（默认不限制速率）
+            retry_policy: 重试策略，如果为None则使用默认策略（最多5次，总截止时间10分钟）
         """
         super().__init__(api_key)
 
@@ -119,7 +154,30 @@ class GeminiClient(AIClientBase):
 
         # 缓存配置
         self.cache_enabled = cache_enabled
-        self.cache_manager = CacheManager(cache_dir=".cache/gemini", ttl=cache_ttl) if cache_enabled else None
+        # AI回复较长，写入磁盘前压缩
+        self.cache_manager = (
+            CacheManager(cache_dir=".cache/gemini", ttl=cache_ttl, compression="zlib") if cache_enabled else None
+        )
+
+        # generate_content结果缓存（相同模型、温度和提示词直接返回缓存结果）
+        if content_cache_ttl is None:
+            content_cache_ttl = int(ConfigManager.get_env('GEMINI_CONTENT_CACHE_TTL', '86400'))
+        self.content_cache_manager = (
+            CacheManager(cache_dir=".cache/gemini/content", ttl=content_cache_ttl, compression="zlib")
+            if cache_enabled and content_cache_ttl > 0 else None
+        )
+
+        # 已上传文件登记表（同一文件内容在远程文件过期前不重复上传）
+        self.file_registry = UploadedFileRegistry(".cache/gemini/uploaded_files.json") if cache_enabled else None
+
+        # 速率限制与重试（线程安全，Map-Reduce等并行调用共享同一个限制器）
+        if rate_limiter is None and retry_policy is not None:
+            rate_limiter = retry_policy.rate_limiter
+        if rate_limiter is None:
+            rate_limiter = RateLimiter.per_minute(float(ConfigManager.get_env('GEMINI_REQUESTS_PER_MINUTE', '0')))
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy(rate_limiter=self.rate_limiter)
+        self.retry_policy.rate_limiter = self.rate_limiter
 
         # 日志配置
         self.logger = logging.getLogger(__name__)
@@ -156,46 +214,26 @@ class GeminiClient(AIClientBase):
         try:
             callback("开始分析文档", 1, 4)
 
-            # 检查缓存
-            if self.cache_enabled:
-                cache_key = get_cache_key(file_path, prompt)
-                cached_result = self.cache_manager.get(cache_key)
-                if cached_result:
-                    callback("从缓存获取结果", 4, 4)
-                    self.logger.info(f"从缓存获取分析结果: {file_path}")
-                    return GeminiResult(**cached_result)
-
-            callback("上传文件", 2, 4)
-
-            # 上传文件到Gemini
-            sample_file = self._upload_file(file_path)
+            def analyze() -> GeminiResult:
+                callback("上传文件", 2, 4)
 
-            callback("分析中", 3, 4)
+                # 上传文件到Gemini
+                sample_file = self._upload_file(file_path)
 
-            # 生成内容
-            response = self._generate_content([sample_file, prompt])
+                callback("分析中", 3, 4)
 
-            # 构建结果
-            result = GeminiResult(
-                success=True,
-                content=response.text.strip(),
-                metadata={
-                    'model': self.model_name,
-                    'file_path': str(file_path),
-                    'prompt': prompt
-                },
-                raw_response=response
-            )
+                # 生成内容
+                return self._generate_document_result(file_path, prompt, sample_file)
 
-            # 缓存结果
             if self.cache_enabled:
-                cache_data = {
-                    'success': result.success,
-                    'content': result.content,
-                    'metadata': result.metadata,
-                    'error': result.error
-                }
-                self.cache_manager.set(cache_key, cache_data)
+                # 检查缓存；多个进程/线程同时分析同一文档和提示词时只调用一次API
+                result, cache_hit = self._get_or_analyze(get_cache_key(file_path, prompt), analyze)
+                if cache_hit:
+                    callback("从缓存获取结果", 4, 4)
+                    self.logger.info(f"从缓存获取分析结果: {file_path}")
+                    return result
+            else:
+                result = analyze()
 
             callback("分析完成", 4, 4)
             self.logger.info(f"文档分析完成: {file_path}")
@@ -207,37 +245,408 @@ class GeminiClient(AIClientBase):
             self.logger.error(error_msg)
             return GeminiResult(success=False, error=error_msg)
 
-    def generate_content(self, prompt: str) -> GeminiResult:
+    def analyze_documents_batch(
+        self,
+        requests: Sequence[Tuple[Union[str, Path], str]],
+        max_workers: int = 4,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> List[GeminiResult]:
+        """
+        批量分析文档
+
+        每个不同的文件只上传一次，同一文件的多个提示词复用上传后的文件；
+        某个文件上传完成后立即提交它的生成任务，不等待其他文件上传，
+        生成经过缓存的single-flight，多个线程/进程重复的 (文件, 提示词) 只调用一次API；
+        上传和生成共用一个线程池，并发数不超过max_workers
+
+        Args:
+            requests: (文档文件路径, 分析提示) 列表
+            max_workers: 最大并发数
+            progress_callback: 进度回调函数（每完成一次上传或生成回调一次）
+
+        Returns:
+            分析结果列表，顺序与requests一致；单个请求失败不影响其他请求
+        """
+        callback = self._get_progress_callback(progress_callback)
+        items = [(Path(file_path), prompt) for file_path, prompt in requests]
+        results: List[Optional[GeminiResult]] = [None] * len(items)
+        cache_keys: Dict[int, str] = {}
+
+        # 先检查缓存，只有未命中的请求需要上传和生成
+        pending_by_file: Dict[Path, List[int]] = {}
+        for index, (file_path, prompt) in enumerate(items):
+            try:
+                if self.cache_enabled:
+                    cache_keys[index] = get_cache_key(file_path, prompt)
+                    cached_result = self.cache_manager.get(cache_keys[index])
+                    if cached_result:
+                        results[index] = GeminiResult(**cached_result)
+                        continue
+                pending_by_file.setdefault(file_path.resolve(), []).append(index)
+            except Exception as e:
+                results[index] = GeminiResult(success=False, error=f"文档分析失败: {str(e)}")
+
+        pending_count = sum(len(indexes) for indexes in pending_by_file.values())
+        total_steps = len(pending_by_file) + pending_count
+        completed = 0
+
+        def report(message: str) -> None:
+            nonlocal completed
+            completed += 1
+            callback(message, completed, total_steps)
+
+        self.logger.info(
+            f"批量分析 {len(items)} 个请求: {len(items) - pending_count} 个命中缓存，"
+            f"需要上传 {len(pending_by_file)} 个文件"
+        )
+
+        upload_queue = deque(pending_by_file)
+        workers = max(1, min(max_workers, max(total_steps, 1)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini-batch") as executor:
+            in_flight: Dict[Future, Tuple[str, Any]] = {}
+
+            def submit_upload() -> None:
+                path = upload_queue.popleft()
+                in_flight[executor.submit(self._upload_file, path)] = ('upload', path)
+
+            # 同时进行的上传不超过线程数，每完成一个上传先提交它的生成再提交下一个上传，
+            # 生成任务排在剩余上传之前
+            for _ in range(min(workers, len(upload_queue))):
+                submit_upload()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, key = in_flight.pop(future)
+
+                    if kind == 'upload':
+                        path = key
+                        try:
+                            uploaded_file = future.result()
+                            upload_error = None
+                        except Exception as e:
+                            uploaded_file = None
+                            upload_error = str(e)
+                        report(f"上传完成: {path.name}")
+
+                        for index in pending_by_file[path]:
+                            file_path, prompt = items[index]
+                            if upload_error is not None:
+                                results[index] = GeminiResult(success=False, error=f"文档分析失败: {upload_error}")
+                                report(f"分析失败: {file_path.name}")
+                                continue
+                            generate = executor.submit(
+                                self._generate_document_cached,
+                                file_path, prompt, uploaded_file, cache_keys.get(index)
+                            )
+                            in_flight[generate] = ('generate', index)
+
+                        if upload_queue:
+                            submit_upload()
+                        continue
+
+                    index = key
+                    file_path = items[index][0]
+                    try:
+                        results[index] = future.result()
+                        report(f"分析完成: {file_path.name}")
+                    except Exception as e:
+                        error_msg = f"文档分析失败: {str(e)}"
+                        self.logger.error(f"{error_msg} ({file_path})")
+                        results[index] = GeminiResult(success=False, error=error_msg)
+                        report(f"分析失败: {file_path.name}")
+
+        return results
+
+    def _get_or_analyze(self, cache_key: str, analyze: Callable[[], GeminiResult]) -> Tuple[GeminiResult, bool]:
+        """
+        通过缓存获取文档分析结果，未命中时调用analyze并写入缓存
+
+        多个线程/进程同时请求同一缓存键时只有一个调用analyze，其余等待后读取缓存
+
+        Args:
+            cache_key: 缓存键
+            analyze: 计算分析结果的函数
+
+        Returns:
+            (分析结果, 是否命中缓存)
+        """
+        computed: Dict[str, GeminiResult] = {}
+
+        def compute() -> Dict[str, Any]:
+            computed['result'] = analyze()
+            return self._document_cache_data(computed['result'])
+
+        cache_data, cache_hit = self.cache_manager.get_or_compute(cache_key, compute)
+        if cache_hit:
+            return GeminiResult(**cache_data), True
+        return computed['result'], False
+
+    def _generate_document_cached(
+        self,
+        file_path: Path,
+        prompt: str,
+        uploaded_file: Any,
+        cache_key: Optional[str]
+    ) -> GeminiResult:
+        """
+        使用已上传的文件生成分析结果，启用缓存时经过缓存的single-flight
+
+        Args:
+            file_path: 文档文件路径
+            prompt: 分析提示
+            uploaded_file: 上传后的文件
+            cache_key: 缓存键，未启用缓存时为None
+
+        Returns:
+            分析结果
+        """
+        def analyze() -> GeminiResult:
+            return self._generate_document_result(file_path, prompt, uploaded_file)
+
+        if cache_key is None:
+            return analyze()
+        return self._get_or_analyze(cache_key, analyze)[0]
+
+    def _generate_document_result(self, file_path: Path, prompt: str, uploaded_file: Any) -> GeminiResult:
+        """
+        使用已上传的文件生成分析结果
+
+        Args:
+            file_path: 文档文件路径
+            prompt: 分析提示
+            uploaded_file: 上传后的文件
+
+        Returns:
+            分析结果
+        """
+        response = self._generate_content([uploaded_file, prompt])
+        return GeminiResult(
+            success=True,
+            content=response.text.strip(),
+            metadata={
+                'model': self.model_name,
+                'file_path': str(file_path),
+                'prompt': prompt
+            },
+            raw_response=response
+        )
+
+    @staticmethod
+    def _document_cache_data(result: GeminiResult) -> Dict[str, Any]:
+        """文档分析结果的缓存数据（不包含原始响应）"""
+        return {
+            'success': result.success,
+            'content': result.content,
+            'metadata': result.metadata,
+            'error': result.error
+        }
+
+    def _content_cache_key(self, prompt: str) -> str:
+        """
+        生成generate_content的缓存键
+
+        Args:
+            prompt: 生成提示
+
+        Returns:
+            由模型名称、温度和提示词哈希组成的缓存键
+        """
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return f"generate_content:{self.model_name}:{GEMINI_TEMPERATURE}:{prompt_hash}"
+
+    def generate_content(self, prompt: str, bypass_cache: bool = False) -> GeminiResult:
         """
         生成内容
 
         Args:
             prompt: 生成提示
+            bypass_cache: 是否跳过缓存读取（生成结果仍会写入缓存）
 
         Returns:
-            生成结果
+            生成结果，metadata['cache_hit']表示是否来自缓存
         """
         try:
-            response = self._generate_content(prompt)
-
-            result = GeminiResult(
+            if self.content_cache_manager is None:
+                return self._generate_text_result(prompt)
+
+            cache_key = self._content_cache_key(prompt)
+            if bypass_cache:
+                result = self._generate_text_result(prompt)
+                # 只缓存成功的结果
+                if result.content:
+                    self.content_cache_manager.set(cache_key, result.content)
+                return result
+
+            # 相同提示词并发未命中时只调用一次API，其他调用方等待并读取缓存
+            computed: Dict[str, GeminiResult] = {}
+
+            def compute() -> str:
+                computed['result'] = self._generate_text_result(prompt)
+                return computed['result'].content
+
+            content, cache_hit = self.content_cache_manager.get_or_compute(cache_key, compute, should_cache=bool)
+            if not cache_hit:
+                return computed['result']
+
+            self.logger.info("从缓存获取生成结果")
+            return GeminiResult(
                 success=True,
-                content=response.text.strip(),
+                content=content,
                 metadata={
                     'model': self.model_name,
-                    'prompt': prompt
-                },
-                raw_response=response
+                    'prompt': prompt,
+                    'cache_hit': True
+                }
             )
 
-            self.logger.info("内容生成完成")
-            return result
-
         except Exception as e:
             error_msg = f"内容生成失败: {str(e)}"
             self.logger.error(error_msg)
             return GeminiResult(success=False, error=error_msg)
 
+    def _generate_text_result(self, prompt: str) -> GeminiResult:
+        """
+        调用API生成内容（不使用缓存）
+
+        Args:
+            prompt: 生成提示
+
+        Returns:
+            生成结果
+
+        Raises:
+            GeminiAPIError: API调用失败
+        """
+        response = self._generate_content(prompt)
+        self.logger.info("内容生成完成")
+        return GeminiResult(
+            success=True,
+            content=response.text.strip(),
+            metadata={
+                'model': self.model_name,
+                'prompt': prompt,
+                'cache_hit': False
+            },
+            raw_response=response
+        )
+
+    def count_tokens(self, prompt: str) -> TokenCount:
+        """
+        计算提示词的token数量
+
+        优先使用API的count_tokens（与模型实际计费一致），API不可用时使用本地估算
+
+        Args:
+            prompt: 提示词
+
+        Returns:
+            token计数结果
+        """
+        try:
+            if NEW_SDK:
+                response = self.client.models.count_tokens(model=self.model_name, contents=prompt)
+            else:
+                response = self.model.count_tokens(prompt)
+            return TokenCount(total_tokens=int(response.total_tokens))
+        except Exception as e:
+            estimated = estimate_tokens(prompt)
+            self.logger.warning(f"调用count_tokens失败，使用本地估算（约 {estimated} tokens）: {str(e)}")
+            return TokenCount(total_tokens=estimated, estimated=True)
+
+    def generate_content_stream(
+        self,
+        prompt: str,
+        resume_from: str = "",
+        max_resumes: Optional[int] = None,
+        bypass_cache: bool = False
+    ) -> Iterator[str]:
+        """
+        流式生成内容，收到一段文本就立即返回一段
+
+        连接中断时使用已收到的内容续写，而不是从头重新生成
+
+        Args:
+            prompt: 生成提示
+            resume_from: 之前中断时已收到的内容（从GeminiStreamError.partial_content获取），
+                提供时直接续写，不会重复返回这部分内容
+            max_resumes: 中断后最多续写的次数，默认与非流式调用相同
+                （重试策略的max_attempts - 1，并受其总截止时间限制）
+            bypass_cache: 是否跳过缓存读取
+
+        Yields:
+            生成的文本片段
+
+        Raises:
+            GeminiStreamError: 续写次数用完仍然失败，partial_content为已收到的全部内容
+        """
+        cache_key = None
+        if self.content_cache_manager is not None:
+            cache_key = self._content_cache_key(prompt)
+            if not bypass_cache and not resume_from:
+                cached_content = self.content_cache_manager.get(cache_key)
+                if cached_content is not None:
+                    self.logger.info("从缓存获取生成结果")
+                    yield cached_content
+                    return
+
+        if max_resumes is None:
+            max_resumes = self.retry_policy.max_attempts - 1
+        deadline = self.retry_policy.deadline
+        start_time = time.monotonic()
+
+        partial = resume_from
+        for attempt in range(max_resumes + 1):
+            request = self.STREAM_RESUME_PROMPT.format(prompt=prompt, partial=partial) if partial else prompt
+            self.rate_limiter.acquire()
+            try:
+                for text in self._open_stream(request):
+                    if text:
+                        partial += text
+                        yield text
+                break
+            except Exception as e:
+                if attempt == max_resumes or not self._is_retryable_error(e):
+                    error_msg = f"流式生成失败（已续写{attempt}次）: {str(e)}"
+                    self.logger.error(error_msg)
+                    raise GeminiStreamError(error_msg, partial_content=partial) from e
+
+                server_delay = self._retry_after_seconds(e)
+                wait_time = self.retry_policy.compute_delay(attempt + 1, server_delay)
+                if deadline is not None and time.monotonic() - start_time + wait_time > deadline:
+                    error_msg = f"流式生成失败（续写等待将超过截止时间 {deadline} 秒）: {str(e)}"
+                    self.logger.error(error_msg)
+                    raise GeminiStreamError(error_msg, partial_content=partial) from e
+
+                if server_delay is not None:
+                    self.rate_limiter.pause(server_delay)
+                self.logger.warning(
+                    f"流式生成中断（已收到 {len(partial)} 个字符），{wait_time:.1f} 秒后续写: {str(e)}"
+                )
+                time.sleep(wait_time)
+
+        if cache_key is not None and partial.strip():
+            self.content_cache_manager.set(cache_key, partial.strip())
+        self.logger.info("流式内容生成完成")
+
+    def _open_stream(self, prompt: str) -> Iterator[str]:
+        """调用流式生成接口，逐段返回文本"""
+        if NEW_SDK:
+            stream = self.client.models.generate_content_stream(
+                model=self.model_name,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=GEMINI_TEMPERATURE,
+                    max_output_tokens=65535,
+                )
+            )
+        else:
+            stream = self.model.generate_content(prompt, stream=True)
+
+        for chunk in stream:
+            yield chunk.text or ""
+
     def extract_title(self, file_path: Union[str, Path]) -> GeminiResult:
         """
         提取文档标题
@@ -288,7 +697,19 @@ class GeminiClient(AIClientBase):
         return result
 
     def _upload_file(self, file_path: Path) -> Any:
-        """上传文件到Gemini"""
+        """上传文件到Gemini，登记表中有仍然有效的远程文件时直接复用"""
+        file_hash = None
+        if self.file_registry is not None:
+            file_hash = get_file_hash(file_path, algorithm=CACHE_KEY_HASH_ALGORITHM)
+            entry = self.file_registry.get(file_hash)
+            if entry:
+                remote_file = self._get_remote_file(entry['name'])
+                if remote_file is not None:
+                    self.logger.debug(f"复用已上传的文件: {file_path} -> {entry['name']}")
+                    return remote_file
+                # 远程文件已被删除或处理失败，清除记录后重新上传
+                self.file_registry.remove(file_hash)
+
         try:
             if NEW_SDK:
                 # 新版本SDK使用file参数
@@ -297,61 +718,106 @@ class GeminiClient(AIClientBase):
                 # 旧版本SDK使用path参数
                 sample_file = genai.upload_file(path=str(file_path), display_name=file_path.name)
             self.logger.debug(f"文件上传成功: {file_path}")
-            return sample_file
         except Exception as e:
             raise GeminiAPIError(f"文件上传失败: {str(e)}")
 
+        if file_hash is not None:
+            self.file_registry.register(file_hash, sample_file)
+        return sample_file
+
+    def _get_remote_file(self, name: str) -> Optional[Any]:
+        """获取已上传的远程文件，文件不存在或处理失败时返回None"""
+        try:
+            if NEW_SDK:
+                remote_file = self.client.files.get(name=name)
+            else:
+                remote_file = genai.get_file(name)
+        except Exception as e:
+            self.logger.debug(f"远程文件不可用: {name}: {str(e)}")
+            return None
+
+        state = getattr(remote_file, 'state', None)
+        if 'FAILED' in str(getattr(state, 'name', state)):
+            return None
+        return remote_file
+
     def _generate_content(self, content_input) -> Any:
-        """生成内容，包含错误处理和重试"""
-        max_retries = 3
-        for attempt in range(max_retries):
+        """生成内容，按重试策略处理限流和临时错误"""
+        def request() -> Any:
+            if NEW_SDK:
+                # 新版本SDK，支持更长超时时间（content_input可以是提示词或[文件, 提示词]）
+                return self.client.models.generate_content(
+                    model=self.model_name,
+                    contents=content_input,
+                    config=types.GenerateContentConfig(
+                        temperature=GEMINI_TEMPERATURE,
+                        max_output_tokens=65535,
+                    )
+                )
+            # 旧版本SDK
+            return self.model.generate_content(content_input)
+
+        try:
+            return self.retry_policy.call(
+                request,
+                is_retryable=self._is_retryable_error,
+                retry_after=self._retry_after_seconds
+            )
+        except Exception as e:
+            if self._error_status(e) == 429:
+                raise GeminiAPIError(f"API配额耗尽，请稍后重试: {str(e)}") from e
+            raise GeminiAPIError(f"API调用失败: {str(e)}") from e
+
+    @staticmethod
+    def _error_status(error: Exception) -> Optional[int]:
+        """获取异常对应的HTTP状态码（无法获取时返回None）"""
+        code = getattr(error, 'code', None)
+        if isinstance(code, int):
+            return code
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+        if isinstance(status_code, int):
+            return status_code
+        # 无法识别的异常类型，按错误消息判断配额耗尽
+        error_msg = str(error).lower()
+        if "resource" in error_msg and "exhaust" in error_msg:
+            return 429
+        return None
+
+    @classmethod
+    def _is_retryable_error(cls, error: Exception) -> bool:
+        """限流、服务器错误和网络错误可以重试；请求参数、认证等客户端错误不重试"""
+        status = cls._error_status(error)
+        return status is None or status in cls.RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def _retry_after_seconds(error: Exception) -> Optional[float]:
+        """
+        读取服务器要求的等待时间
+
+        优先使用Retry-After响应头，其次使用错误详情中的RetryInfo.retryDelay
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        if headers is not None:
             try:
-                if NEW_SDK:
-                    # 新版本SDK，支持更长超时时间
-                    if isinstance(content_input, list):
-                        # 包含文件和提示的情况
-                        response = self.client.models.generate_content(
-                            model=self.model_name,
-                            contents=content_input,
-                            config=types.GenerateContentConfig(
-                                temperature=GEMINI_TEMPERATURE,
-                                max_output_tokens=65535,
-                            )
-                        )
-                    else:
-                        # 只有提示的情况
-                        response = self.client.models.generate_content(
-                            model=self.model_name,
-                            contents=content_input,
-                            config=types.GenerateContentConfig(
-                                temperature=GEMINI_TEMPERATURE,
-                                max_output_tokens=65535,
-                            )
-                        )
-                else:
-                    # 旧版本SDK
-                    response = self.model.generate_content(content_input)
-                return response
-            except Exception as e:
-                error_msg = str(e).lower()
-                if "resource" in error_msg and "exhaust" in error_msg:
-                    # 配额耗尽
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        self.logger.warning(f"API配额耗尽，等待 {wait_time} 秒后重试...")
-                        time.sleep(wait_time)
-                    else:
-                        raise GeminiAPIError("API配额耗尽，请稍后重试")
-                else:
-                    # 其他错误
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        self.logger.warning(f"API调用失败，等待 {wait_time} 秒后重试: {str(e)}")
-                        time.sleep(wait_time)
-                    else:
-                        raise GeminiAPIError(f"API调用失败: {str(e)}")
-
-        raise GeminiAPIError("所有重试尝试都失败")
+                retry_after = parse_retry_after(headers.get('retry-after'))
+            except AttributeError:
+                retry_after = None
+            if retry_after is not None:
+                return retry_after
+
+        def find_retry_delay(node: Any) -> Optional[float]:
+            if isinstance(node, dict):
+                if 'retryDelay' in node:
+                    return parse_retry_after(node['retryDelay'])
+                node = list(node.values())
+            if isinstance(node, list):
+                for item in node:
+                    delay = find_retry_delay(item)
+                    if delay is not None:
+                        return delay
+            return None
+
+        return find_retry_delay(getattr(error, 'details', None))
 
     @staticmethod
     def _get_test_model_name_static() -> str:
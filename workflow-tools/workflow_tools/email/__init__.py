@@ -2,10 +2,22 @@
 邮件处理模块
 """
 
-from .outlook import OutlookClient
+from .outlook import OutlookClient, AsyncOutlookClient
 from .base.generic_imap_client import GenericIMAPClient
+from .base.async_imap_client import AsyncIMAPClient
+from .base.async_email_base import AsyncEmailClientBase, SyncEmailClientAdapter
 from .qq import QQIMAPClient
+from .multi_source_client import MultiSourceEmailClient
 
-__all__ = ["OutlookClient", "GenericIMAPClient", "QQIMAPClient"]
+__all__ = [
+    "OutlookClient",
+    "GenericIMAPClient",
+    "QQIMAPClient",
+    "MultiSourceEmailClient",
+    "AsyncEmailClientBase",
+    "AsyncIMAPClient",
+    "AsyncOutlookClient",
+    "SyncEmailClientAdapter",
+]
 
 
@@ -2,8 +2,26 @@
 邮件客户端基类
 """
 
-from .email_base import EmailClientBase, EmailResult, EmailMessage
+from .email_base import EmailClientBase, EmailResult, EmailMessage, OutgoingEmail
+from .async_email_base import AsyncEmailClientBase, SyncEmailClientAdapter
+from .async_imap_client import AsyncIMAPClient
+from .async_smtp_session import AsyncSMTPSession
+from .imap_sync_state import IMAPSyncState
+from .message_store import MessageStore
+from .smtp_session import SMTPSession
 
-__all__ = ["EmailClientBase", "EmailResult", "EmailMessage"]
+__all__ = [
+    "EmailClientBase",
+    "EmailResult",
+    "EmailMessage",
+    "OutgoingEmail",
+    "AsyncEmailClientBase",
+    "SyncEmailClientAdapter",
+    "AsyncIMAPClient",
+    "AsyncSMTPSession",
+    "IMAPSyncState",
+    "MessageStore",
+    "SMTPSession",
+]
 
 
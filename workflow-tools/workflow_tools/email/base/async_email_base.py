@@ -0,0 +1,205 @@
+"""
+异步邮件客户端基类定义
+以及将异步客户端包装为同步EmailClientBase接口的适配器
+"""
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Coroutine, Iterable, List, Optional
+
+from .email_base import EmailClientBase, EmailResult, OutgoingEmail
+
+
+class AsyncEmailClientBase(ABC):
+    """
+    异步邮件客户端抽象基类
+
+    接口与EmailClientBase一致，所有网络操作均为协程，
+    多个邮箱可以在同一个事件循环中并发处理，不需要为每个连接创建线程
+    """
+
+    @abstractmethod
+    async def connect(self) -> bool:
+        """
+        连接到邮件服务器
+
+        Returns:
+            是否连接成功
+        """
+        pass
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """断开与邮件服务器的连接"""
+        pass
+
+    async def close(self) -> None:
+        """释放客户端持有的全部资源（默认等同于断开连接）"""
+        await self.disconnect()
+
+    @abstractmethod
+    async def fetch_emails(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> EmailResult:
+        """
+        获取邮件列表
+
+        Args:
+            subject: 邮件主题过滤
+            sender: 发件人过滤
+            since_date: 起始时间过滤
+            limit: 最大返回数量
+
+        Returns:
+            邮件结果
+        """
+        pass
+
+    @abstractmethod
+    async def send_email(
+        self,
+        to: List[str],
+        subject: str,
+        body: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> bool:
+        """
+        发送邮件
+
+        Args:
+            to: 收件人列表
+            subject: 邮件主题
+            body: 邮件正文
+            cc: 抄送列表
+            bcc: 密送列表
+
+        Returns:
+            是否发送成功
+        """
+        pass
+
+    async def send_many(self, emails: Iterable[OutgoingEmail]) -> EmailResult:
+        """
+        按顺序发送一批邮件，单封邮件失败不影响后续发送
+
+        Args:
+            emails: 待发送的邮件
+
+        Returns:
+            发送结果，metadata包含sent（成功数量）和failed（失败的邮件及原因）
+        """
+        sent = 0
+        failed = []
+
+        for outgoing in emails:
+            try:
+                if await self.send_email(
+                    to=outgoing.to,
+                    subject=outgoing.subject,
+                    body=outgoing.body,
+                    cc=outgoing.cc,
+                    bcc=outgoing.bcc
+                ):
+                    sent += 1
+                    continue
+                failed.append({'email': outgoing, 'error': "发送失败"})
+            except Exception as e:
+                failed.append({'email': outgoing, 'error': str(e)})
+
+        error = None
+        if failed:
+            error = f"{len(failed)} 封邮件发送失败: " + "; ".join(
+                f"{', '.join(item['email'].to)}: {item['error']}" for item in failed
+            )
+
+        return EmailResult(
+            success=not failed,
+            error=error,
+            metadata={'sent': sent, 'failed': failed}
+        )
+
+
+class SyncEmailClientAdapter(EmailClientBase):
+    """
+    将异步邮件客户端包装为同步接口
+
+    在后台线程中运行一个专用事件循环，同步方法把协程提交到该循环并等待结果，
+    因此现有的工作流代码无需修改即可使用异步客户端
+    """
+
+    def __init__(self, async_client: AsyncEmailClientBase):
+        """
+        初始化适配器
+
+        Args:
+            async_client: 异步邮件客户端
+        """
+        super().__init__()
+        self.async_client = async_client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="async-email-loop",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """在后台事件循环中执行协程并等待结果"""
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("异步邮件客户端已关闭")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def connect(self) -> bool:
+        """连接到邮件服务器"""
+        return self._run(self.async_client.connect())
+
+    def disconnect(self) -> None:
+        """断开与邮件服务器的连接"""
+        self._run(self.async_client.disconnect())
+
+    def close(self) -> None:
+        """关闭异步客户端并停止后台事件循环"""
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self.async_client.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+
+    def fetch_emails(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> EmailResult:
+        """获取邮件列表（参数同AsyncEmailClientBase.fetch_emails）"""
+        return self._run(self.async_client.fetch_emails(
+            subject=subject, sender=sender, since_date=since_date, limit=limit
+        ))
+
+    def send_email(
+        self,
+        to: List[str],
+        subject: str,
+        body: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> bool:
+        """发送邮件（参数同AsyncEmailClientBase.send_email）"""
+        return self._run(self.async_client.send_email(to=to, subject=subject, body=body, cc=cc, bcc=bcc))
+
+    def send_many(self, emails: Iterable[OutgoingEmail]) -> EmailResult:
+        """批量发送邮件"""
+        return self._run(self.async_client.send_many(list(emails)))
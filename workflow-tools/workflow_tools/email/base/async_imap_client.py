@@ -0,0 +1,497 @@
+"""
+基于asyncio流的IMAP邮件客户端
+使用IMAP协议读取邮件，使用SMTP协议发送邮件，所有网络操作都不阻塞事件循环
+"""
+
+import asyncio
+import logging
+import re
+import ssl
+from datetime import datetime
+from email.parser import BytesHeaderParser
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .async_email_base import AsyncEmailClientBase
+from .async_smtp_session import AsyncSMTPSession
+from .email_base import EmailResult, EmailMessage
+from .generic_imap_client import GenericIMAPClient
+from .imap_fetch import DEFAULT_FETCH_BATCH_SIZE, build_message_set, chunk_message_ids, parse_fetch_response
+from .mime_scanner import scan_message
+from .smtp_session import build_message
+from ...exceptions.email_exceptions import SMTPError, EmailAuthError, EmailConnectionError
+from ...utils.config_manager import ConfigManager
+
+# 响应行末尾的字面量长度，如: b'* 12 FETCH (UID 4821 RFC822 {3456}\r\n'
+_LITERAL_PATTERN = re.compile(rb'\{(\d+)\}\r?\n$')
+
+# imaplib风格的响应数据: 普通行为bytes，带字面量的行为 (行, 字面量)
+ResponseData = List[Union[bytes, Tuple[bytes, bytes]]]
+
+
+class AsyncIMAPConnection:
+    """
+    最小化的异步IMAP4rev1连接
+
+    只实现读取邮件所需的命令，响应数据格式与imaplib一致，
+    因此可以直接复用imap_fetch中的解析函数
+    """
+
+    def __init__(self, host: str, port: int, use_ssl: bool = True, timeout: int = 30):
+        """
+        初始化连接参数
+
+        Args:
+            host: IMAP服务器地址
+            port: IMAP端口
+            use_ssl: 是否使用SSL（仅测试时关闭）
+            timeout: 网络超时时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._tag_counter = 0
+
+    @property
+    def is_open(self) -> bool:
+        """连接是否已打开"""
+        return self._writer is not None
+
+    async def open(self) -> None:
+        """建立连接并读取服务器问候"""
+        ssl_context = ssl.create_default_context() if self.use_ssl else None
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+            self.timeout
+        )
+        greeting = await self._readline()
+        if not greeting.startswith((b'* OK', b'* PREAUTH')):
+            raise EmailConnectionError(f"IMAP服务器拒绝连接: {greeting!r}")
+
+    async def close(self) -> None:
+        """关闭连接，忽略错误"""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            await asyncio.wait_for(writer.wait_closed(), 5)
+        except Exception:
+            pass
+
+    async def _readline(self) -> bytes:
+        """读取一行响应"""
+        line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not line:
+            raise EmailConnectionError("IMAP连接被服务器关闭")
+        return line
+
+    @staticmethod
+    def quote(value: str) -> str:
+        """将参数转为IMAP带引号字符串"""
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    async def command(self, *args: str) -> Tuple[str, ResponseData]:
+        """
+        发送命令并读取到对应的标记响应
+
+        Args:
+            *args: 命令及参数（如 'UID', 'FETCH', '1:5', '(RFC822)'）
+
+        Returns:
+            (状态, 未标记响应数据)，数据已去掉开头的 "* "
+        """
+        self._tag_counter += 1
+        tag = f"A{self._tag_counter:04d}".encode('ascii')
+        self._writer.write(tag + b' ' + ' '.join(args).encode('utf-8') + b'\r\n')
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+
+        data: ResponseData = []
+        while True:
+            line = await self._readline()
+
+            if line.startswith(tag + b' '):
+                parts = line.split(b' ', 2)
+                return parts[1].decode('ascii', errors='replace'), data
+
+            if line.startswith(b'* '):
+                line = line[2:]
+            elif line.startswith(b'+'):
+                # 本客户端不发送需要继续的命令
+                continue
+
+            # 带字面量的响应：(字面量之前的部分, 字面量)，字面量之后的剩余部分单独保存
+            match = _LITERAL_PATTERN.search(line)
+            while match:
+                literal = await asyncio.wait_for(self._reader.readexactly(int(match.group(1))), self.timeout)
+                data.append((line[:match.start()] + match.group(0).rstrip(b'\r\n'), literal))
+                line = await self._readline()
+                match = _LITERAL_PATTERN.search(line)
+            data.append(line.rstrip(b'\r\n'))
+
+    async def untagged(self, *args: str, keyword: bytes) -> Tuple[str, List[bytes]]:
+        """
+        发送命令并只返回指定关键字的未标记响应（如SEARCH）
+
+        Args:
+            *args: 命令及参数
+            keyword: 响应关键字
+
+        Returns:
+            (状态, 响应内容列表)
+        """
+        status, data = await self.command(*args)
+        prefix = keyword + b' '
+        values = [
+            item[len(prefix):] if item.startswith(prefix) else b''
+            for item in data
+            if isinstance(item, bytes) and (item == keyword or item.startswith(prefix))
+        ]
+        return status, values
+
+
+class AsyncIMAPClient(AsyncEmailClientBase):
+    """
+    异步IMAP邮件客户端
+
+    读取流程与GenericIMAPClient一致：SINCE/FROM服务器端搜索，
+    主题等非ASCII条件先只获取邮件头在本地过滤，再按批次获取匹配邮件的完整内容
+    """
+
+    HEADER_FIELDS = GenericIMAPClient.HEADER_FIELDS
+
+    def __init__(
+        self,
+        email_address: Optional[str] = None,
+        password: Optional[str] = None,
+        imap_server: Optional[str] = None,
+        imap_port: Optional[int] = None,
+        smtp_server: Optional[str] = None,
+        smtp_port: Optional[int] = None,
+        use_ssl_for_smtp: Optional[bool] = None,
+        fetch_batch_size: Optional[int] = None,
+        use_ssl: bool = True,
+        timeout: int = 30
+    ):
+        """
+        初始化异步IMAP客户端
+
+        Args:
+            email_address: 邮箱地址
+            password: 邮箱密码或授权码
+            imap_server: IMAP服务器地址
+            imap_port: IMAP端口（默认993）
+            smtp_server: SMTP服务器地址
+            smtp_port: SMTP端口（默认587）
+            use_ssl_for_smtp: SMTP是否使用SSL（True=465端口，False=587端口STARTTLS）
+            fetch_batch_size: 每条FETCH命令获取的邮件数量
+            use_ssl: IMAP是否使用SSL（仅测试时关闭）
+            timeout: 网络超时时间（秒）
+        """
+        self.email_address = email_address or ConfigManager.get_required_env('EMAIL_ADDRESS')
+        self.password = password or ConfigManager.get_required_env('EMAIL_PASSWORD')
+        self.imap_server = imap_server or ConfigManager.get_required_env('IMAP_SERVER')
+        self.imap_port = imap_port or int(ConfigManager.get_env('IMAP_PORT', '993'))
+        self.smtp_server = smtp_server or ConfigManager.get_required_env('SMTP_SERVER')
+        self.smtp_port = smtp_port or int(ConfigManager.get_env('SMTP_PORT', '587'))
+        if use_ssl_for_smtp is None:
+            use_ssl_for_smtp = ConfigManager.get_env('SMTP_USE_SSL', 'false').lower() == 'true'
+        self.use_ssl_for_smtp = use_ssl_for_smtp
+
+        if fetch_batch_size is None:
+            fetch_batch_size = int(ConfigManager.get_env('IMAP_FETCH_BATCH_SIZE', str(DEFAULT_FETCH_BATCH_SIZE)))
+        self.fetch_batch_size = max(1, fetch_batch_size)
+
+        self.imap_conn = AsyncIMAPConnection(self.imap_server, self.imap_port, use_ssl=use_ssl, timeout=timeout)
+        self.smtp_session = AsyncSMTPSession(
+            self.smtp_server,
+            self.smtp_port,
+            self.email_address,
+            self.password,
+            use_ssl=self.use_ssl_for_smtp,
+            timeout=timeout
+        )
+
+        # 同一连接上的命令必须串行执行
+        # 在事件循环中首次使用时创建（Python 3.8/3.9的asyncio.Lock在创建时绑定当前事件循环）
+        self._lock: Optional[asyncio.Lock] = None
+
+        # 日志配置
+        self.logger = logging.getLogger(__name__)
+
+    def _connection_lock(self) -> asyncio.Lock:
+        """获取连接锁"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def connect(self) -> bool:
+        """
+        连接到IMAP服务器并登录
+
+        Returns:
+            是否连接成功
+        """
+        if self.imap_conn.is_open:
+            return True
+
+        try:
+            self.logger.info(f"正在连接到IMAP服务器 {self.imap_server}:{self.imap_port}...")
+            await self.imap_conn.open()
+            status, data = await self.imap_conn.command(
+                'LOGIN',
+                AsyncIMAPConnection.quote(self.email_address),
+                AsyncIMAPConnection.quote(self.password)
+            )
+        except EmailConnectionError:
+            await self.imap_conn.close()
+            raise
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            await self.imap_conn.close()
+            error_msg = f"连接IMAP服务器失败: {str(e)}"
+            self.logger.error(error_msg)
+            raise EmailConnectionError(error_msg) from e
+
+        if status != 'OK':
+            await self.imap_conn.close()
+            error_msg = f"IMAP认证失败: {status} {data!r}"
+            self.logger.error(error_msg)
+            raise EmailAuthError(error_msg)
+
+        self.logger.info(f"成功连接到IMAP服务器 ({self.imap_server})")
+        return True
+
+    async def disconnect(self) -> None:
+        """登出并断开IMAP连接"""
+        if not self.imap_conn.is_open:
+            return
+        try:
+            await self.imap_conn.command('LOGOUT')
+        except Exception:
+            pass
+        await self.imap_conn.close()
+        self.logger.info("已断开IMAP连接")
+
+    async def close(self) -> None:
+        """断开IMAP连接并结束SMTP会话"""
+        await self.disconnect()
+        await self.smtp_session.close()
+
+    async def _fetch_batched(
+        self,
+        uids: Sequence[bytes],
+        message_parts: str
+    ) -> Dict[bytes, bytes]:
+        """
+        按批次发送UID FETCH命令
+
+        Args:
+            uids: UID列表
+            message_parts: FETCH数据项
+
+        Returns:
+            UID到内容的映射
+        """
+        fetched: Dict[bytes, bytes] = {}
+        for chunk in chunk_message_ids(uids, self.fetch_batch_size):
+            status, data = await self.imap_conn.command('UID', 'FETCH', build_message_set(chunk), message_parts)
+            if status != 'OK':
+                self.logger.warning(f"获取邮件失败: {status}")
+                continue
+            fetched.update(parse_fetch_response(data, use_uid=True))
+        return fetched
+
+    @staticmethod
+    def _matches(subject: str, sender: str, filter_subject: Optional[str], filter_sender: Optional[str]) -> bool:
+        """检查主题和发件人是否包含过滤条件"""
+        if filter_subject and filter_subject not in subject:
+            return False
+        if filter_sender and filter_sender not in sender:
+            return False
+        return True
+
+    def _parse_email(self, raw_email: bytes, uid: str) -> Optional[EmailMessage]:
+        """
+        解析原始邮件（单遍扫描，不解码附件）
+
+        Args:
+            raw_email: 原始邮件字节
+            uid: 邮件UID
+
+        Returns:
+            解析后的邮件消息
+        """
+        try:
+            scanned = scan_message(raw_email)
+            headers = scanned.headers
+
+            metadata = {}
+            internet_message_id = (headers.get('Message-ID') or '').strip()
+            if internet_message_id:
+                metadata['internet_message_id'] = internet_message_id
+
+            return EmailMessage(
+                subject=GenericIMAPClient._decode_header(headers.get('Subject', '')),
+                sender=GenericIMAPClient._extract_email_address(headers.get('From', '')),
+                recipients=[GenericIMAPClient._extract_email_address(headers.get('To', ''))],
+                body=scanned.body,
+                received_time=GenericIMAPClient._parse_date(headers.get('Date', '')),
+                message_id=uid,
+                has_attachments=scanned.has_attachments,
+                is_read=False,
+                metadata=metadata
+            )
+        except Exception as e:
+            self.logger.warning(f"解析邮件失败: {str(e)}")
+            return None
+
+    async def fetch_emails(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> EmailResult:
+        """
+        获取邮件列表
+
+        Args:
+            subject: 邮件主题过滤（包含匹配）
+            sender: 发件人过滤（包含匹配）
+            since_date: 起始时间过滤
+            limit: 最大返回数量
+
+        Returns:
+            邮件结果
+        """
+        try:
+            async with self._connection_lock():
+                if not self.imap_conn.is_open:
+                    await self.connect()
+                return await self._fetch_emails_locked(subject, sender, since_date, limit)
+        except (EmailAuthError, EmailConnectionError) as e:
+            return EmailResult(success=False, error=str(e))
+        except Exception as e:
+            error_msg = f"获取邮件失败: {str(e)}"
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+
+    async def _fetch_emails_locked(
+        self,
+        subject: Optional[str],
+        sender: Optional[str],
+        since_date: Optional[datetime],
+        limit: Optional[int]
+    ) -> EmailResult:
+        """在已持有连接锁的情况下获取邮件"""
+        status, _ = await self.imap_conn.command('SELECT', 'INBOX')
+        if status != 'OK':
+            return EmailResult(success=False, error=f"选择收件箱失败: {status}")
+
+        search_criteria = []
+        filter_subject = subject
+        filter_sender = None
+
+        if since_date:
+            # IMAP日期格式: DD-Mon-YYYY (如: 01-Jan-2024)
+            search_criteria.append(f"SINCE {since_date.strftime('%d-%b-%Y')}")
+
+        if sender:
+            if sender.isascii():
+                search_criteria.append(f'FROM {AsyncIMAPConnection.quote(sender)}')
+            else:
+                filter_sender = sender
+
+        status, values = await self.imap_conn.untagged(
+            'UID', 'SEARCH', ' '.join(search_criteria) or 'ALL', keyword=b'SEARCH'
+        )
+        if status != 'OK':
+            error_msg = f"IMAP搜索失败: {status}"
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+
+        uids = sorted({uid for value in values for uid in value.split()}, key=int)
+        if limit and len(uids) > limit:
+            uids = uids[-limit:]
+        # 最新的邮件在前
+        uids.reverse()
+
+        self.logger.info(f"找到 {len(uids)} 封符合条件的邮件")
+
+        # 第一阶段：只获取邮件头进行本地过滤
+        if filter_subject or filter_sender:
+            header_parser = BytesHeaderParser()
+            raw_headers = await self._fetch_batched(
+                uids, f'(BODY.PEEK[HEADER.FIELDS ({self.HEADER_FIELDS})])'
+            )
+            matched = []
+            for uid in uids:
+                raw_header = raw_headers.get(uid)
+                if raw_header is None:
+                    continue
+                headers = header_parser.parsebytes(raw_header)
+                if self._matches(
+                    GenericIMAPClient._decode_header(headers.get('Subject', '')),
+                    GenericIMAPClient._extract_email_address(headers.get('From', '')),
+                    filter_subject,
+                    filter_sender
+                ):
+                    matched.append(uid)
+            uids = matched
+            self.logger.info(f"邮件头过滤后剩余 {len(uids)} 封邮件")
+
+        # 第二阶段：获取匹配邮件的完整内容
+        raw_emails = await self._fetch_batched(uids, '(RFC822)')
+
+        messages = []
+        for uid in uids:
+            raw_email = raw_emails.get(uid)
+            if raw_email is None:
+                self.logger.warning(f"获取邮件 {uid} 失败")
+                continue
+            parsed_msg = self._parse_email(raw_email, uid.decode())
+            if parsed_msg and self._matches(parsed_msg.subject, parsed_msg.sender, filter_subject, filter_sender):
+                messages.append(parsed_msg)
+
+        self.logger.info(f"成功获取 {len(messages)} 封邮件")
+        return EmailResult(success=True, messages=messages, metadata={"total_count": len(messages)})
+
+    async def send_email(
+        self,
+        to: List[str],
+        subject: str,
+        body: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> bool:
+        """
+        使用SMTP发送邮件
+
+        Args:
+            to: 收件人列表
+            subject: 邮件主题
+            body: 邮件正文（纯文本）
+            cc: 抄送列表
+            bcc: 密送列表
+
+        Returns:
+            是否发送成功
+        """
+        msg = build_message(self.email_address, to, subject, body, cc)
+        recipients = to + (cc or []) + (bcc or [])
+
+        try:
+            await self.smtp_session.send_message(msg, recipients)
+        except EmailAuthError as e:
+            self.logger.error(str(e))
+            raise
+        except Exception as e:
+            error_msg = f"SMTP发送失败: {str(e)}"
+            self.logger.error(error_msg)
+            raise SMTPError(error_msg) from e
+
+        self.logger.info(f"成功发送邮件到 {', '.join(to)}")
+        return True
@@ -0,0 +1,316 @@
+"""
+基于asyncio流的SMTP会话
+与SMTPSession行为一致：复用一个已认证的连接，邮件之间发送RSET，
+连接被服务器关闭（421/超时）时自动重新登录并重发一次
+"""
+
+import asyncio
+import base64
+import io
+import logging
+import re
+import smtplib
+import ssl
+import time
+from email.generator import BytesGenerator
+from email.message import Message
+from typing import List, Optional, Set, Tuple
+
+from ...exceptions.email_exceptions import EmailAuthError, EmailConnectionError
+
+# 行首的"."需要转义为".."（RFC 5321 4.5.2）
+_DOT_STUFF = re.compile(rb'^\.', re.MULTILINE)
+
+
+class AsyncSMTPSession:
+    """
+    异步SMTP会话
+
+    只实现发送邮件所需的命令: EHLO, STARTTLS, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT。
+    错误使用smtplib的异常类型，便于与同步实现共用错误处理
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        use_ssl: bool = False,
+        starttls: bool = True,
+        timeout: int = 30,
+        check_interval: int = 30,
+        local_hostname: str = "localhost"
+    ):
+        """
+        初始化异步SMTP会话
+
+        Args:
+            host: SMTP服务器地址
+            port: SMTP端口
+            username: 登录用户名（邮箱地址）
+            password: 密码或授权码
+            use_ssl: 是否使用SSL连接（465端口）
+            starttls: 非SSL连接时是否执行STARTTLS（仅本地中继或测试时关闭）
+            timeout: 网络超时时间（秒）
+            check_interval: 空闲超过该时间的连接在发送前先用NOOP检测（秒）
+            local_hostname: EHLO使用的本机名称
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.local_hostname = local_hostname
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        # STARTTLS前的明文StreamWriter，需要保持引用，否则被回收时会关闭底层连接
+        self._plain_writer: Optional[asyncio.StreamWriter] = None
+        self._extensions: Set[str] = set()
+        self._auth_methods: Set[str] = set()
+        self._last_used = 0.0
+        self._sent_count = 0
+        # 在事件循环中首次使用时创建（Python 3.8/3.9的asyncio.Lock在创建时绑定当前事件循环）
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.logger = logging.getLogger(__name__)
+
+    def _session_lock(self) -> asyncio.Lock:
+        """获取会话锁，同一会话上的SMTP事务串行执行"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def is_connected(self) -> bool:
+        """是否持有已登录的连接"""
+        return self._writer is not None
+
+    async def _read_reply(self) -> Tuple[int, str]:
+        """读取一条（可能多行的）服务器响应"""
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            if not line:
+                raise smtplib.SMTPServerDisconnected("连接被服务器关闭")
+            if len(line) < 4 or not line[:3].isdigit():
+                raise smtplib.SMTPResponseException(-1, line)
+            lines.append(line[4:].strip().decode('utf-8', errors='replace'))
+            if line[3:4] != b'-':
+                return int(line[:3]), "\n".join(lines)
+
+    async def _command(self, command: str) -> Tuple[int, str]:
+        """发送命令并读取响应"""
+        self._writer.write(command.encode('utf-8') + b"\r\n")
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+        return await self._read_reply()
+
+    async def _ehlo(self) -> None:
+        """发送EHLO并记录服务器支持的扩展"""
+        code, text = await self._command(f"EHLO {self.local_hostname}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, text)
+        self._extensions = set()
+        self._auth_methods = set()
+        for line in text.splitlines()[1:]:
+            keyword, _, params = line.partition(' ')
+            self._extensions.add(keyword.upper())
+            if keyword.upper() == 'AUTH':
+                self._auth_methods = set(params.upper().split())
+
+    async def _login(self) -> None:
+        """使用AUTH PLAIN或AUTH LOGIN登录"""
+        if 'PLAIN' in self._auth_methods or not self._auth_methods:
+            token = base64.b64encode(f"\0{self.username}\0{self.password}".encode('utf-8')).decode('ascii')
+            code, text = await self._command(f"AUTH PLAIN {token}")
+        else:
+            code, text = await self._command("AUTH LOGIN")
+            if code == 334:
+                code, text = await self._command(base64.b64encode(self.username.encode('utf-8')).decode('ascii'))
+            if code == 334:
+                code, text = await self._command(base64.b64encode(self.password.encode('utf-8')).decode('ascii'))
+
+        if code != 235:
+            raise smtplib.SMTPAuthenticationError(code, text)
+
+    async def _connect(self) -> None:
+        """建立连接并登录"""
+        try:
+            ssl_context = ssl.create_default_context() if self.use_ssl else None
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+                self.timeout
+            )
+            code, text = await self._read_reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, text)
+
+            await self._ehlo()
+            if not self.use_ssl and self.starttls:
+                code, text = await self._command("STARTTLS")
+                if code != 220:
+                    raise smtplib.SMTPNotSupportedError(f"STARTTLS失败: {code} {text}")
+                await self._start_tls()
+                await self._ehlo()
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+            await self._discard()
+            raise EmailConnectionError(f"连接SMTP服务器失败: {str(e)}") from e
+
+        try:
+            await self._login()
+        except smtplib.SMTPAuthenticationError as e:
+            await self._discard()
+            raise EmailAuthError(f"SMTP认证失败: {str(e)}") from e
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+            await self._discard()
+            raise EmailConnectionError(f"SMTP登录失败: {str(e)}") from e
+
+        self._sent_count = 0
+        self._last_used = time.monotonic()
+        self.logger.info(f"已建立SMTP会话 ({self.host})")
+
+    async def _start_tls(self) -> None:
+        """
+        在当前连接上升级为TLS
+
+        使用loop.start_tls而不是StreamWriter.start_tls（后者需要Python 3.11），
+        升级后的传输层绑定新的StreamReader/StreamWriter
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport = await asyncio.wait_for(
+            loop.start_tls(
+                self._writer.transport,
+                protocol,
+                ssl.create_default_context(),
+                server_hostname=self.host
+            ),
+            self.timeout
+        )
+        self._plain_writer = self._writer
+        self._reader = reader
+        self._writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    async def _discard(self) -> None:
+        """关闭当前连接，忽略错误"""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            await asyncio.wait_for(writer.wait_closed(), 5)
+        except Exception:
+            pass
+        finally:
+            self._plain_writer = None
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """判断是否为需要重新连接的错误（连接断开、超时或421服务不可用）"""
+        if isinstance(error, (smtplib.SMTPServerDisconnected, asyncio.TimeoutError, asyncio.IncompleteReadError)):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421
+        # SMTPException是OSError的子类，其余SMTP错误（如收件人被拒）不需要重新连接
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    async def _ensure_connected(self) -> None:
+        """确保持有可用的连接，空闲过久时先用NOOP检测"""
+        if self._writer is not None and time.monotonic() - self._last_used >= self.check_interval:
+            try:
+                code, _ = await self._command("NOOP")
+                if code != 250:
+                    await self._discard()
+            except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+                await self._discard()
+
+        if self._writer is None:
+            await self._connect()
+
+    async def _transaction(self, data: bytes, recipients: List[str]) -> None:
+        """执行一次 MAIL/RCPT/DATA 事务"""
+        if self._sent_count > 0:
+            # 清除上一封邮件可能残留的事务状态
+            code, text = await self._command("RSET")
+            if code != 250:
+                raise smtplib.SMTPResponseException(code, text)
+
+        code, text = await self._command(f"MAIL FROM:<{self.username}>")
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, text, self.username)
+
+        refused = {}
+        for recipient in recipients:
+            code, text = await self._command(f"RCPT TO:<{recipient}>")
+            if code == 421:
+                raise smtplib.SMTPResponseException(code, text)
+            if code not in (250, 251):
+                refused[recipient] = (code, text)
+        if len(refused) == len(recipients):
+            await self._command("RSET")
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+        code, text = await self._command("DATA")
+        if code != 354:
+            raise smtplib.SMTPDataError(code, text)
+
+        payload = _DOT_STUFF.sub(b'..', data)
+        if not payload.endswith(b"\r\n"):
+            payload += b"\r\n"
+        self._writer.write(payload + b".\r\n")
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+
+        code, text = await self._read_reply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, text)
+
+    async def send_message(self, msg: Message, recipients: List[str]) -> None:
+        """
+        通过当前会话发送邮件
+
+        Args:
+            msg: 邮件对象
+            recipients: 实际投递的收件人（包含抄送和密送）
+
+        Raises:
+            EmailAuthError: 认证失败
+            EmailConnectionError: 无法建立连接
+            smtplib.SMTPException: 重新连接后仍然发送失败，或服务器拒绝该邮件
+        """
+        # 与smtplib.send_message相同的序列化方式（保留邮件自身的policy，换行使用CRLF）
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=msg.policy.clone(linesep='\r\n')).flatten(msg)
+        data = buffer.getvalue()
+
+        async with self._session_lock():
+            for attempt in range(2):
+                await self._ensure_connected()
+                try:
+                    await self._transaction(data, recipients)
+                    self._sent_count += 1
+                    self._last_used = time.monotonic()
+                    return
+                except (smtplib.SMTPException, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    if not self._is_connection_error(e):
+                        self._sent_count += 1
+                        self._last_used = time.monotonic()
+                        raise
+                    await self._discard()
+                    if attempt == 1:
+                        raise
+                    self.logger.warning(f"SMTP连接已断开，正在重新登录: {str(e)}")
+
+    async def close(self) -> None:
+        """结束会话（发送QUIT）"""
+        async with self._session_lock():
+            if self._writer is not None:
+                try:
+                    await self._command("QUIT")
+                except Exception:
+                    pass
+            await self._discard()
@@ -4,7 +4,7 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime
 
 
@@ -34,6 +34,16 @@ class EmailResult:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class OutgoingEmail:
+    """待发送的邮件"""
+    to: List[str]
+    subject: str
+    body: str
+    cc: Optional[List[str]] = None
+    bcc: Optional[List[str]] = None
+
+
 class EmailClientBase(ABC):
     """邮件客户端抽象基类"""
 
@@ -56,6 +66,10 @@ class EmailClientBase(ABC):
         """断开与邮件服务器的连接"""
         pass
 
+    def close(self) -> None:
+        """释放客户端持有的全部资源（默认等同于断开连接）"""
+        self.disconnect()
+
     @abstractmethod
     def fetch_emails(
         self,
@@ -78,6 +92,19 @@ class EmailClientBase(ABC):
         """
         pass
 
+    def commit_sync_state(self, result: EmailResult) -> None:
+        """
+        确认获取结果已处理完成，保存其中的增量同步状态
+
+        支持增量同步的客户端在fetch_emails时只把新状态放入metadata["sync_state"]，
+        调用方处理完邮件（如总结已发送）后再调用本方法，处理失败时下次运行会重新获取这些邮件。
+        不支持增量同步的客户端不做任何操作
+
+        Args:
+            result: fetch_emails返回的结果
+        """
+        pass
+
     @abstractmethod
     def send_email(
         self,
@@ -102,4 +129,44 @@ class EmailClientBase(ABC):
         """
         pass
 
+    def send_many(self, emails: Iterable[OutgoingEmail]) -> EmailResult:
+        """
+        按顺序发送一批邮件
+
+        支持SMTP会话的客户端会复用同一个已登录的连接，单封邮件失败不影响后续发送
 
+        Args:
+            emails: 待发送的邮件
+
+        Returns:
+            发送结果，metadata包含sent（成功数量）和failed（失败的邮件及原因）
+        """
+        sent = 0
+        failed = []
+
+        for outgoing in emails:
+            try:
+                if self.send_email(
+                    to=outgoing.to,
+                    subject=outgoing.subject,
+                    body=outgoing.body,
+                    cc=outgoing.cc,
+                    bcc=outgoing.bcc
+                ):
+                    sent += 1
+                    continue
+                failed.append({'email': outgoing, 'error': "发送失败"})
+            except Exception as e:
+                failed.append({'email': outgoing, 'error': str(e)})
+
+        error = None
+        if failed:
+            error = f"{len(failed)} 封邮件发送失败: " + "; ".join(
+                f"{', '.join(item['email'].to)}: {item['error']}" for item in failed
+            )
+
+        return EmailResult(
+            success=not failed,
+            error=error,
+            metadata={'sent': sent, 'failed': failed}
+        )
@@ -7,15 +7,20 @@
 import logging
 import smtplib
 import imaplib
-import email
+import re
 from datetime import datetime, timezone
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from email.header import decode_header
-from typing import Optional, List
+from email.parser import BytesHeaderParser
+from typing import Optional, List, Set, Tuple
 import time
 
 from .email_base import EmailClientBase, EmailResult, EmailMessage
+from .imap_fetch import fetch_messages_batched, DEFAULT_FETCH_BATCH_SIZE
+from .imap_sync_state import IMAPSyncState
+from .message_store import MessageStore
+from .imap_connection_pool import IMAPConnectionPool
+from .smtp_session import SMTPSession, build_message
+from .mime_scanner import scan_message
 from ...exceptions.email_exceptions import (
     SMTPError,
     EmailAuthError,
@@ -39,6 +44,9 @@ class GenericIMAPClient(EmailClientBase):
     - 等等...
     """
 
+    # 两阶段获取时第一阶段请求的邮件头字段
+    HEADER_FIELDS = "SUBJECT FROM DATE MESSAGE-ID"
+
     def __init__(
         self,
         email_address: Optional[str] = None,
@@ -47,7 +55,12 @@ class GenericIMAPClient(EmailClientBase):
         imap_port: Optional[int] = None,
         smtp_server: Optional[str] = None,
         smtp_port: Optional[int] = None,
-        use_ssl_for_smtp: Optional[bool] = None
+        use_ssl_for_smtp: Optional[bool] = None,
+        fetch_batch_size: Optional[int] = None,
+        header_first: Optional[bool] = None,
+        sync_state: Optional[IMAPSyncState] = None,
+        message_store: Optional[MessageStore] = None,
+        use_connection_pool: Optional[bool] = None
     ):
         """
         初始化通用IMAP客户端
@@ -60,6 +73,12 @@ class GenericIMAPClient(EmailClientBase):
             smtp_server: SMTP服务器地址
             smtp_port: SMTP端口（默认587，STARTTLS）
             use_ssl_for_smtp: SMTP是否使用SSL（True=465端口，False=587端口STARTTLS）
+            fetch_batch_size: 每条FETCH命令获取的邮件数量（默认200）
+            header_first: 需要客户端过滤时是否先只获取邮件头（默认True）
+            sync_state: 增量同步状态存储，设置后只获取上次同步之后的新邮件
+            message_store: 本地邮件存储，已保存的邮件不再重复下载和解析
+            use_connection_pool: 是否复用已认证的IMAP连接（默认False），
+                开启后disconnect只归还连接，不再登出
         """
         super().__init__()
 
@@ -78,9 +97,47 @@ class GenericIMAPClient(EmailClientBase):
         if self.use_ssl_for_smtp is None:
             self.use_ssl_for_smtp = ConfigManager.get_env('SMTP_USE_SSL', 'false').lower() == 'true'
 
+        # SMTP会话（多次发送复用同一个已登录的连接）
+        self.smtp_session = SMTPSession(
+            self.smtp_server,
+            self.smtp_port,
+            self.email_address,
+            self.password,
+            use_ssl=self.use_ssl_for_smtp
+        )
+
+        # 批量获取配置（每批一条FETCH命令，同时限制单批内存占用）
+        self.fetch_batch_size = fetch_batch_size or int(
+            ConfigManager.get_env('IMAP_FETCH_BATCH_SIZE', str(DEFAULT_FETCH_BATCH_SIZE))
+        )
+
+        # 两阶段获取：先获取邮件头过滤，再只下载匹配邮件的完整内容
+        self.header_first = header_first
+        if self.header_first is None:
+            self.header_first = ConfigManager.get_env('IMAP_HEADER_FIRST', 'true').lower() == 'true'
+
+        # 增量同步（基于UID高水位）
+        self.sync_state = sync_state
+
+        # 本地邮件存储（按Message-ID复用已下载的邮件）
+        self.message_store = message_store
+
         # IMAP连接
         self.imap_conn = None
 
+        # IMAP连接池（跨多次connect/disconnect复用已认证的连接）
+        if use_connection_pool is None:
+            use_connection_pool = ConfigManager.get_env('IMAP_CONNECTION_POOL', 'false').lower() == 'true'
+        self.connection_pool = None
+        if use_connection_pool:
+            self.connection_pool = IMAPConnectionPool(
+                self.imap_server,
+                self.imap_port,
+                self.email_address,
+                self.password
+            )
+            self.connection_pool.start_keepalive()
+
         # 日志配置
         self.logger = logging.getLogger(__name__)
 
@@ -91,6 +148,11 @@ class GenericIMAPClient(EmailClientBase):
         Returns:
             是否连接成功
         """
+        if self.connection_pool is not None:
+            # 从连接池获取（空闲过久的连接会先用NOOP检测，断开则自动重连）
+            self.imap_conn = self.connection_pool.acquire()
+            return True
+
         try:
             # 连接IMAP服务器
             self.logger.info(f"正在连接到IMAP服务器 {self.imap_server}:{self.imap_port}...")
@@ -113,7 +175,12 @@ class GenericIMAPClient(EmailClientBase):
             raise EmailConnectionError(error_msg) from e
 
     def disconnect(self) -> None:
-        """断开IMAP连接"""
+        """断开IMAP连接（使用连接池时归还连接）"""
+        if self.imap_conn and self.connection_pool is not None:
+            self.connection_pool.release(self.imap_conn)
+            self.imap_conn = None
+            return
+
         if self.imap_conn:
             try:
                 self.imap_conn.close()
@@ -124,6 +191,27 @@ class GenericIMAPClient(EmailClientBase):
             finally:
                 self.imap_conn = None
 
+    def close(self) -> None:
+        """断开连接，关闭连接池和SMTP会话"""
+        self.disconnect()
+        if self.connection_pool is not None:
+            self.connection_pool.close_all()
+        self.smtp_session.close()
+
+    def wait_for_new_mail(self, timeout: int = 29 * 60) -> bool:
+        """
+        使用IMAP IDLE等待收件箱的新邮件（需要启用连接池）
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否收到新邮件通知
+        """
+        if self.connection_pool is None:
+            raise EmailConnectionError("等待新邮件需要启用IMAP连接池")
+        return self.connection_pool.wait_for_new_mail('INBOX', timeout)
+
     def fetch_emails(
         self,
         subject: Optional[str] = None,
@@ -146,117 +234,465 @@ class GenericIMAPClient(EmailClientBase):
         if not self.imap_conn:
             self.connect()
 
-        try:
-            # 选择收件箱
-            self.imap_conn.select('INBOX')
-
-            # 构建IMAP搜索条件
-            # 注意：QQ邮箱对中文主题搜索支持不佳，使用客户端过滤
-            search_criteria = []
-            use_client_filter = False  # 是否需要客户端过滤
-            filter_subject = None
-            filter_sender = None
-
-            if since_date:
-                # IMAP日期格式: DD-Mon-YYYY (如: 01-Jan-2024)
-                date_str = since_date.strftime('%d-%b-%Y')
-                search_criteria.append(f'SINCE {date_str}')
-
-            if sender:
-                # 先尝试服务器端过滤
-                try:
-                    # 测试是否包含非ASCII字符
-                    sender.encode('ascii')
-                    search_criteria.append(f'FROM "{sender}"')
-                except UnicodeEncodeError:
-                    # 包含非ASCII，使用客户端过滤
-                    use_client_filter = True
-                    filter_sender = sender
-            else:
-                filter_sender = sender
+        # 使用连接池时，连接在获取过程中断开会自动重连并重试一次
+        max_attempts = 2 if self.connection_pool is not None else 1
 
-            if subject:
-                # 主题通常包含中文，使用客户端过滤
+        for attempt in range(max_attempts):
+            try:
+                return self._fetch_emails_once(subject, sender, since_date, limit)
+
+            except (imaplib.IMAP4.abort, OSError) as e:
+                if attempt < max_attempts - 1:
+                    self.logger.warning(f"IMAP连接中断，正在重新连接: {str(e)}")
+                    self.connection_pool.release(self.imap_conn, discard=True)
+                    self.imap_conn = None
+                    self.connect()
+                    continue
+                error_msg = f"获取邮件失败: {str(e)}"
+                self.logger.error(error_msg)
+                return EmailResult(success=False, error=error_msg)
+
+            except Exception as e:
+                error_msg = f"获取邮件失败: {str(e)}"
+                self.logger.error(error_msg)
+                return EmailResult(success=False, error=error_msg)
+
+        return EmailResult(success=False, error="获取邮件失败")
+
+    def _fetch_emails_once(
+        self,
+        subject: Optional[str],
+        sender: Optional[str],
+        since_date: Optional[datetime],
+        limit: Optional[int]
+    ) -> EmailResult:
+        """
+        在当前连接上执行一次邮件获取
+
+        Args:
+            subject: 邮件主题过滤
+            sender: 发件人过滤
+            since_date: 起始时间过滤
+            limit: 最大返回数量
+
+        Returns:
+            邮件结果
+        """
+        # 选择收件箱
+        self.imap_conn.select('INBOX')
+
+        # 构建IMAP搜索条件
+        # 注意：QQ邮箱对中文主题搜索支持不佳，使用客户端过滤
+        search_criteria = []
+
+        # 增量同步：只搜索上次记录的最大UID之后的邮件
+        use_uid = self.sync_state is not None
+        sync_key = None
+        uidvalidity = None
+        last_uid = 0
+        if use_uid:
+            sync_key = IMAPSyncState.mailbox_key(self.email_address, self.imap_server, 'INBOX')
+            uidvalidity = self._get_uidvalidity('INBOX')
+            state = self.sync_state.get(sync_key)
+            if state and state.get('uidvalidity') == uidvalidity:
+                last_uid = state.get('last_uid', 0)
+                search_criteria.append(f'UID {last_uid + 1}:*')
+            elif state:
+                self.logger.info(f"UIDVALIDITY已变化 ({state.get('uidvalidity')} -> {uidvalidity})，执行完整同步")
+        use_client_filter = False  # 是否需要客户端过滤
+        filter_subject = None
+        filter_sender = None
+
+        if since_date:
+            # IMAP日期格式: DD-Mon-YYYY (如: 01-Jan-2024)
+            date_str = since_date.strftime('%d-%b-%Y')
+            search_criteria.append(f'SINCE {date_str}')
+
+        if sender:
+            # 先尝试服务器端过滤
+            try:
+                # 测试是否包含非ASCII字符
+                sender.encode('ascii')
+                search_criteria.append(f'FROM "{sender}"')
+            except UnicodeEncodeError:
+                # 包含非ASCII，使用客户端过滤
                 use_client_filter = True
-                filter_subject = subject
+                filter_sender = sender
+        else:
+            filter_sender = sender
 
-            # 执行搜索
-            if search_criteria:
-                search_string = ' '.join(search_criteria)
-            else:
-                search_string = 'ALL'
+        if subject:
+            # 主题通常包含中文，使用客户端过滤
+            use_client_filter = True
+            filter_subject = subject
+
+        # 执行搜索
+        if search_criteria:
+            search_string = ' '.join(search_criteria)
+        else:
+            search_string = 'ALL'
 
-            self.logger.debug(f"IMAP搜索条件: {search_string}, 客户端过滤: {use_client_filter}")
+        self.logger.debug(f"IMAP搜索条件: {search_string}, 客户端过滤: {use_client_filter}")
 
-            # 搜索邮件
+        # 搜索邮件
+        if use_uid:
+            status, messages = self.imap_conn.uid('SEARCH', None, search_string)
+        else:
             status, messages = self.imap_conn.search(None, search_string)
-            
-            if status != 'OK':
-                error_msg = f"IMAP搜索失败: {status}"
-                self.logger.error(error_msg)
-                return EmailResult(success=False, error=error_msg)
 
-            # 获取邮件ID列表
-            message_ids = messages[0].split()
-            
-            # 如果有limit，只获取最新的N封
-            if limit and len(message_ids) > limit:
+        if status != 'OK':
+            error_msg = f"IMAP搜索失败: {status}"
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+
+        # 获取邮件ID列表
+        message_ids = messages[0].split()
+
+        if use_uid:
+            # "UID n:*" 在没有新邮件时仍会返回最大UID，需要再次过滤
+            message_ids = sorted(
+                (msg_id for msg_id in message_ids if int(msg_id) > last_uid),
+                key=int
+            )
+
+        # 如果有limit，只获取最新的N封
+        # 增量同步时改为先获取较早的新邮件，高水位只推进到已处理的部分，其余邮件下次运行继续获取
+        if limit and len(message_ids) > limit:
+            if use_uid and last_uid:
+                message_ids = message_ids[:limit]
+            else:
                 message_ids = message_ids[-limit:]
-            
-            # 反转列表，使最新的邮件在前
-            message_ids = list(reversed(message_ids))
-            
-            self.logger.info(f"找到 {len(message_ids)} 封符合条件的邮件")
 
-            # 获取邮件详情
-            email_messages = []
-            for msg_id in message_ids:
-                try:
-                    # 获取邮件
-                    status, msg_data = self.imap_conn.fetch(msg_id, '(RFC822)')
+        # 获取或解析失败的邮件，高水位停在第一封失败邮件之前，下次运行重试
+        failed_ids = set()
+        ascending_ids = list(message_ids)
 
-                    if status != 'OK':
-                        self.logger.warning(f"获取邮件 {msg_id} 失败")
-                        continue
+        # 反转列表，使最新的邮件在前
+        message_ids = list(reversed(message_ids))
+
+        self.logger.info(f"找到 {len(message_ids)} 封符合条件的邮件")
 
-                    # 解析邮件
-                    raw_email = msg_data[0][1]
-                    email_msg = email.message_from_bytes(raw_email)
-
-                    # 提取邮件信息
-                    parsed_msg = self._parse_email(email_msg, msg_id.decode())
-
-                    if parsed_msg:
-                        # 客户端过滤
-                        if use_client_filter:
-                            # 检查主题
-                            if filter_subject and filter_subject not in parsed_msg.subject:
-                                self.logger.debug(f"邮件 {msg_id} 主题不匹配 - 期望包含: '{filter_subject}', 实际: '{parsed_msg.subject}'")
-                                continue
-                            # 检查发件人
-                            if filter_sender and filter_sender not in parsed_msg.sender:
-                                self.logger.debug(f"邮件 {msg_id} 发件人不匹配 - 期望包含: '{filter_sender}', 实际: '{parsed_msg.sender}'")
-                                continue
-
-                        email_messages.append(parsed_msg)
-
-                except Exception as e:
-                    self.logger.warning(f"解析邮件 {msg_id} 失败: {str(e)}")
+        # 第一阶段：只获取邮件头，在本地过滤并读取Message-ID，
+        # 避免下载不匹配或已保存在本地的邮件正文和附件
+        if (use_client_filter and self.header_first) or self.message_store is not None:
+            candidates = self._filter_by_headers(
+                message_ids,
+                filter_subject if use_client_filter else None,
+                filter_sender if use_client_filter else None,
+                use_uid,
+                failed_ids
+            )
+            self.logger.info(f"邮件头过滤后剩余 {len(candidates)} 封邮件")
+        else:
+            candidates = [(msg_id, None) for msg_id in message_ids]
+
+        # 优先从本地邮件存储读取
+        messages_by_id = {}
+        fetch_ids = []
+        for msg_id, internet_message_id in candidates:
+            stored_msg = None
+            store_key = self._store_key(internet_message_id)
+            if store_key and self.message_store is not None:
+                stored_msg = self.message_store.get_message(store_key)
+            if stored_msg:
+                stored_msg.message_id = msg_id.decode()
+                messages_by_id[msg_id] = stored_msg
+            else:
+                fetch_ids.append(msg_id)
+
+        if messages_by_id:
+            self.logger.info(f"从本地邮件存储读取 {len(messages_by_id)} 封邮件")
+
+        # 第二阶段：获取邮件详情（按批次发送FETCH命令）
+        for msg_id, raw_email in fetch_messages_batched(
+            self.imap_conn,
+            fetch_ids,
+            '(RFC822)',
+            batch_size=self.fetch_batch_size,
+            use_uid=use_uid
+        ):
+            try:
+                if raw_email is None:
+                    self.logger.warning(f"获取邮件 {msg_id} 失败")
+                    failed_ids.add(msg_id)
                     continue
 
-            self.logger.info(f"成功获取 {len(email_messages)} 封邮件" +
-                           (f" (从 {len(message_ids)} 封中过滤)" if use_client_filter else ""))
+                # 解析邮件（单遍扫描，不解码附件）
+                parsed_msg = self._parse_email(raw_email, msg_id.decode())
+
+                if parsed_msg:
+                    # 客户端过滤
+                    if use_client_filter and not self._matches_filter(
+                        msg_id, parsed_msg.subject, parsed_msg.sender, filter_subject, filter_sender
+                    ):
+                        continue
+
+                    messages_by_id[msg_id] = parsed_msg
+                    self._save_to_store(raw_email, parsed_msg)
+                else:
+                    failed_ids.add(msg_id)
 
-            return EmailResult(
-                success=True,
-                messages=email_messages,
-                metadata={"total_count": len(email_messages)}
+            except Exception as e:
+                self.logger.warning(f"解析邮件 {msg_id} 失败: {str(e)}")
+                failed_ids.add(msg_id)
+                continue
+
+        email_messages = [
+            messages_by_id[msg_id] for msg_id, _ in candidates if msg_id in messages_by_id
+        ]
+
+        # 增量同步只返回新邮件，合并本地存储中时间窗口内的已有邮件
+        # 本地存储不经过服务器端FROM搜索，无论实时过滤在哪一端执行都要按原始条件过滤
+        if use_uid and self.message_store is not None:
+            email_messages = self._merge_stored_messages(
+                email_messages, since_date, subject, sender, limit
             )
 
-        except Exception as e:
-            error_msg = f"获取邮件失败: {str(e)}"
-            self.logger.error(error_msg)
-            return EmailResult(success=False, error=error_msg)
+        self.logger.info(f"成功获取 {len(email_messages)} 封邮件" +
+                       (f" (从 {len(message_ids)} 封中过滤)" if use_client_filter else ""))
+
+        metadata = {"total_count": len(email_messages)}
+
+        if use_uid:
+            # 新的高水位由调用方处理完邮件后通过commit_sync_state保存
+            highest_uid = self._high_water_mark(ascending_ids, failed_ids, last_uid)
+            metadata.update({
+                "incremental": True,
+                "uidvalidity": uidvalidity,
+                "last_uid": highest_uid,
+                "sync_state": {"key": sync_key, "uidvalidity": uidvalidity, "last_uid": highest_uid}
+            })
+
+        return EmailResult(
+            success=True,
+            messages=email_messages,
+            metadata=metadata
+        )
+
+
+    def commit_sync_state(self, result: EmailResult) -> None:
+        """
+        保存获取结果中的UID高水位（邮件处理完成后调用）
+
+        Args:
+            result: fetch_emails返回的结果
+        """
+        state = result.metadata.get("sync_state") if result.success else None
+        if self.sync_state is None or not state:
+            return
+        self.sync_state.update(state["key"], state["uidvalidity"], state["last_uid"])
+        self.logger.debug(f"已保存同步状态: {state['key']} last_uid={state['last_uid']}")
+
+    def _filter_by_headers(
+        self,
+        message_ids: List[bytes],
+        filter_subject: Optional[str],
+        filter_sender: Optional[str],
+        use_uid: bool = False,
+        failed_ids: Optional[Set[bytes]] = None
+    ) -> List[Tuple[bytes, Optional[str]]]:
+        """
+        只获取邮件头（主题、发件人、日期、Message-ID）进行过滤
+
+        使用BODY.PEEK获取，不会将邮件标记为已读
+
+        Args:
+            message_ids: 候选邮件ID列表
+            filter_subject: 主题过滤（包含匹配）
+            filter_sender: 发件人过滤（包含匹配）
+            use_uid: 邮件ID是否为UID
+            failed_ids: 收集获取或解析邮件头失败的邮件ID
+
+        Returns:
+            通过过滤的 (邮件ID, Message-ID) 列表（保持原有顺序）
+        """
+        header_parser = BytesHeaderParser()
+        matched = []
+
+        for msg_id, raw_header in fetch_messages_batched(
+            self.imap_conn,
+            message_ids,
+            f'(BODY.PEEK[HEADER.FIELDS ({self.HEADER_FIELDS})])',
+            batch_size=self.fetch_batch_size,
+            use_uid=use_uid
+        ):
+            if raw_header is None:
+                self.logger.warning(f"获取邮件头 {msg_id} 失败")
+                if failed_ids is not None:
+                    failed_ids.add(msg_id)
+                continue
+
+            try:
+                headers = header_parser.parsebytes(raw_header)
+                subject = self._decode_header(headers.get('Subject', ''))
+                sender = self._extract_email_address(headers.get('From', ''))
+                internet_message_id = (headers.get('Message-ID') or '').strip() or None
+            except Exception as e:
+                self.logger.warning(f"解析邮件头 {msg_id} 失败: {str(e)}")
+                if failed_ids is not None:
+                    failed_ids.add(msg_id)
+                continue
+
+            if self._matches_filter(msg_id, subject, sender, filter_subject, filter_sender):
+                matched.append((msg_id, internet_message_id))
+
+        return matched
+
+    @staticmethod
+    def _high_water_mark(ascending_ids: List[bytes], failed_ids: Set[bytes], last_uid: int) -> int:
+        """
+        计算新的高水位
+
+        按UID升序推进到第一封获取或解析失败的邮件之前；
+        被过滤条件排除或从本地存储读取的邮件视为已处理
+
+        Args:
+            ascending_ids: 本次处理的UID列表（升序，已按limit截取）
+            failed_ids: 获取或解析失败的UID
+            last_uid: 上次记录的高水位
+
+        Returns:
+            新的高水位
+        """
+        highest_uid = last_uid
+        for msg_id in ascending_ids:
+            if msg_id in failed_ids:
+                break
+            highest_uid = int(msg_id)
+        return highest_uid
+
+    def _message_source(self) -> str:
+        """获取本地邮件存储中的来源标识"""
+        return f"{self.email_address}@{self.imap_server}"
+
+    def _store_key(self, internet_message_id: Optional[str]) -> Optional[str]:
+        """
+        生成本地邮件存储键
+
+        Args:
+            internet_message_id: 邮件头中的Message-ID
+
+        Returns:
+            存储键，没有Message-ID时返回None
+        """
+        if not internet_message_id:
+            return None
+        return f"{self._message_source()}/{internet_message_id}"
+
+    def _save_to_store(self, raw_email: bytes, parsed_msg: EmailMessage) -> None:
+        """将下载的邮件保存到本地邮件存储（失败不影响主流程）"""
+        if self.message_store is None:
+            return
+
+        store_key = self._store_key(parsed_msg.metadata.get('internet_message_id'))
+        if not store_key:
+            return
+
+        try:
+            self.message_store.put(store_key, raw_email, parsed_msg, source=self._message_source())
+        except OSError as e:
+            self.logger.warning(f"保存邮件到本地存储失败: {str(e)}")
+
+    def _merge_stored_messages(
+        self,
+        email_messages: List[EmailMessage],
+        since_date: Optional[datetime],
+        filter_subject: Optional[str],
+        filter_sender: Optional[str],
+        limit: Optional[int]
+    ) -> List[EmailMessage]:
+        """
+        合并本地存储中时间窗口内的邮件（按接收时间从新到旧排序）
+
+        Args:
+            email_messages: 本次获取的新邮件
+            since_date: 起始时间过滤
+            filter_subject: 主题过滤（包含匹配）
+            filter_sender: 发件人过滤（包含匹配）
+            limit: 最大返回数量
+
+        Returns:
+            合并后的邮件列表
+        """
+        seen = {msg.metadata.get('internet_message_id') for msg in email_messages}
+        merged = list(email_messages)
+
+        for store_key, stored_msg in self.message_store.iter_messages(
+            source=self._message_source(),
+            since=since_date
+        ):
+            internet_message_id = stored_msg.metadata.get('internet_message_id')
+            if internet_message_id in seen:
+                continue
+            if not self._matches_filter(
+                store_key.encode(), stored_msg.subject, stored_msg.sender, filter_subject, filter_sender
+            ):
+                continue
+            seen.add(internet_message_id)
+            merged.append(stored_msg)
+
+        merged.sort(key=lambda msg: self._as_aware(msg.received_time), reverse=True)
+        return merged[:limit] if limit else merged
+
+    @staticmethod
+    def _as_aware(value: datetime) -> datetime:
+        """将无时区的时间视为UTC，便于比较"""
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+    def _get_uidvalidity(self, mailbox: str) -> int:
+        """
+        获取邮箱的UIDVALIDITY
+
+        优先使用SELECT返回的响应，缺失时再发送STATUS命令
+
+        Args:
+            mailbox: 已选择的邮箱文件夹
+
+        Returns:
+            UIDVALIDITY值
+        """
+        _, data = self.imap_conn.response('UIDVALIDITY')
+        if data and data[0]:
+            return int(data[0])
+
+        status, data = self.imap_conn.status(mailbox, '(UIDVALIDITY)')
+        if status == 'OK' and data and data[0]:
+            match = re.search(rb'UIDVALIDITY (\d+)', data[0])
+            if match:
+                return int(match.group(1))
+
+        raise EmailConnectionError(f"无法获取邮箱 {mailbox} 的UIDVALIDITY")
+
+    def _matches_filter(
+        self,
+        msg_id: bytes,
+        subject: str,
+        sender: str,
+        filter_subject: Optional[str],
+        filter_sender: Optional[str]
+    ) -> bool:
+        """
+        检查邮件是否符合客户端过滤条件
+
+        Args:
+            msg_id: 邮件ID（用于日志）
+            subject: 解码后的主题
+            sender: 发件人邮箱地址
+            filter_subject: 主题过滤（包含匹配）
+            filter_sender: 发件人过滤（包含匹配）
+
+        Returns:
+            是否匹配
+        """
+        # 检查主题
+        if filter_subject and filter_subject not in subject:
+            self.logger.debug(f"邮件 {msg_id} 主题不匹配 - 期望包含: '{filter_subject}', 实际: '{subject}'")
+            return False
+        # 检查发件人
+        if filter_sender and filter_sender not in sender:
+            self.logger.debug(f"邮件 {msg_id} 发件人不匹配 - 期望包含: '{filter_sender}', 实际: '{sender}'")
+            return False
+        return True
 
     def send_email(
         self,
@@ -280,62 +716,20 @@ class GenericIMAPClient(EmailClientBase):
             是否发送成功
         """
         max_retries = 3
-        
+        msg = build_message(self.email_address, to, subject, body, cc)
+        recipients = to + (cc or []) + (bcc or [])
+
         for attempt in range(max_retries):
             try:
-                # 创建邮件
-                msg = MIMEMultipart()
-                msg['From'] = self.email_address
-                msg['To'] = ', '.join(to)
-                msg['Subject'] = subject
-
-                if cc:
-                    msg['Cc'] = ', '.join(cc)
-
-                # 添加正文
-                msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-                # 根据配置选择SMTP连接方式
-                if self.use_ssl_for_smtp:
-                    # 使用SSL连接（端口465）
-                    self.logger.debug(f"使用SSL连接SMTP服务器 {self.smtp_server}:{self.smtp_port}")
-                    server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port, timeout=30)
-                    try:
-                        # 登录
-                        server.login(self.email_address, self.password)
-
-                        # 发送邮件
-                        recipients = to + (cc or []) + (bcc or [])
-                        server.send_message(msg, to_addrs=recipients)
-                    finally:
-                        try:
-                            server.quit()
-                        except Exception:
-                            pass
-                else:
-                    # 使用STARTTLS（端口587）
-                    self.logger.debug(f"使用STARTTLS连接SMTP服务器 {self.smtp_server}:{self.smtp_port}")
-                    with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30) as server:
-                        server.ehlo()
-                        server.starttls()
-                        server.ehlo()
-                        
-                        # 登录
-                        server.login(self.email_address, self.password)
-
-                        # 发送邮件
-                        recipients = to + (cc or []) + (bcc or [])
-                        server.send_message(msg, to_addrs=recipients)
-
+                self.smtp_session.send_message(msg, recipients)
                 self.logger.info(f"成功发送邮件到 {', '.join(to)}")
                 return True
 
-            except smtplib.SMTPAuthenticationError as e:
-                error_msg = f"SMTP认证失败: {str(e)}"
-                self.logger.error(error_msg)
-                raise EmailAuthError(error_msg) from e
+            except EmailAuthError as e:
+                self.logger.error(str(e))
+                raise
 
-            except smtplib.SMTPException as e:
+            except (smtplib.SMTPException, EmailConnectionError, OSError) as e:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt
                     self.logger.warning(f"SMTP发送失败，{wait_time}秒后重试: {str(e)}")
@@ -352,18 +746,23 @@ class GenericIMAPClient(EmailClientBase):
 
         return False
 
-    def _parse_email(self, email_msg: email.message.Message, message_id: str) -> Optional[EmailMessage]:
+    def _parse_email(self, raw_email: bytes, message_id: str) -> Optional[EmailMessage]:
         """
         解析IMAP邮件
 
+        只扫描一遍原始邮件：定位第一个文本正文并记录是否有附件，附件内容不会被解码
+
         Args:
-            email_msg: 原始邮件对象
+            raw_email: 原始邮件字节（RFC822）
             message_id: 邮件ID
 
         Returns:
             解析后的邮件消息
         """
         try:
+            scanned = scan_message(raw_email)
+            email_msg = scanned.headers
+
             # 解析主题
             subject = self._decode_header(email_msg.get('Subject', ''))
             
@@ -379,12 +778,15 @@ class GenericIMAPClient(EmailClientBase):
             date_str = email_msg.get('Date', '')
             received_time = self._parse_date(date_str)
             
-            # 解析邮件正文
-            body = self._get_email_body(email_msg)
-            
-            # 检查是否有附件
-            has_attachments = any(part.get_content_disposition() == 'attachment' 
-                                 for part in email_msg.walk())
+            # 邮件正文和附件标记（扫描时已得到）
+            body = scanned.body
+            has_attachments = scanned.has_attachments
+
+            # 邮件头中的Message-ID（用于本地存储和去重）
+            metadata = {}
+            internet_message_id = (email_msg.get('Message-ID') or '').strip()
+            if internet_message_id:
+                metadata['internet_message_id'] = internet_message_id
 
             return EmailMessage(
                 subject=subject,
@@ -394,7 +796,8 @@ class GenericIMAPClient(EmailClientBase):
                 received_time=received_time,
                 message_id=message_id,
                 has_attachments=has_attachments,
-                is_read=False  # IMAP不容易判断是否已读，默认为False
+                is_read=False,  # IMAP不容易判断是否已读，默认为False
+                metadata=metadata
             )
 
         except Exception as e:
@@ -465,54 +868,3 @@ class GenericIMAPClient(EmailClientBase):
             # 如果解析失败，返回当前时间
             return datetime.now(timezone.utc)
 
-    def _get_email_body(self, email_msg: email.message.Message) -> str:
-        """
-        获取邮件正文
-
-        Args:
-            email_msg: 邮件对象
-
-        Returns:
-            邮件正文文本
-        """
-        body = ""
-        
-        if email_msg.is_multipart():
-            # 多部分邮件，查找文本部分
-            for part in email_msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = part.get_content_disposition()
-                
-                # 跳过附件
-                if content_disposition == 'attachment':
-                    continue
-                
-                # 优先获取纯文本
-                if content_type == 'text/plain':
-                    try:
-                        charset = part.get_content_charset() or 'utf-8'
-                        body = part.get_payload(decode=True).decode(charset, errors='ignore')
-                        break
-                    except Exception as e:
-                        self.logger.warning(f"解析文本正文失败: {str(e)}")
-                
-                # 如果没有纯文本，获取HTML（可选）
-                elif content_type == 'text/html' and not body:
-                    try:
-                        charset = part.get_content_charset() or 'utf-8'
-                        html_body = part.get_payload(decode=True).decode(charset, errors='ignore')
-                        # 简单移除HTML标签
-                        import re
-                        body = re.sub(r'<[^>]+>', '', html_body)
-                    except Exception as e:
-                        self.logger.warning(f"解析HTML正文失败: {str(e)}")
-        else:
-            # 单部分邮件
-            try:
-                charset = email_msg.get_content_charset() or 'utf-8'
-                body = email_msg.get_payload(decode=True).decode(charset, errors='ignore')
-            except Exception as e:
-                self.logger.warning(f"解析邮件正文失败: {str(e)}")
-        
-        return body.strip()
-
@@ -0,0 +1,300 @@
+"""
+IMAP连接池
+复用已认证的IMAP连接，使用NOOP保活并检测断开的连接，支持IMAP IDLE等待新邮件
+"""
+
+import imaplib
+import logging
+import select
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from ...exceptions.email_exceptions import EmailAuthError, EmailConnectionError
+
+
+class IMAPConnectionPool:
+    """
+    IMAP连接池
+
+    连接在归还后保持登录状态，下次获取时如果空闲超过check_interval会先发送NOOP确认连接可用，
+    不可用则自动重新连接。可选的后台线程按keepalive_interval对空闲连接发送NOOP，
+    防止服务器因空闲超时断开。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        max_size: int = 2,
+        keepalive_interval: int = 300,
+        check_interval: int = 60,
+        timeout: int = 30
+    ):
+        """
+        初始化IMAP连接池
+
+        Args:
+            host: IMAP服务器地址
+            port: IMAP端口（SSL）
+            username: 登录用户名（邮箱地址）
+            password: 密码或授权码
+            max_size: 最大连接数
+            keepalive_interval: 后台保活间隔（秒）
+            check_interval: 空闲超过该时间的连接在获取时先用NOOP检测（秒）
+            timeout: 网络超时时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max(1, max_size)
+        self.keepalive_interval = keepalive_interval
+        self.check_interval = check_interval
+        self.timeout = timeout
+
+        # 空闲连接: (连接, 最后使用时间)
+        self._idle: List[Tuple[imaplib.IMAP4_SSL, float]] = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.logger = logging.getLogger(__name__)
+
+    def _create_connection(self) -> imaplib.IMAP4_SSL:
+        """创建并登录新连接"""
+        try:
+            self.logger.info(f"正在连接到IMAP服务器 {self.host}:{self.port}...")
+            conn = imaplib.IMAP4_SSL(self.host, self.port, timeout=self.timeout)
+            conn.login(self.username, self.password)
+            self.logger.info(f"成功连接到IMAP服务器 ({self.host})")
+            return conn
+        except imaplib.IMAP4.error as e:
+            error_msg = f"IMAP认证失败: {str(e)}"
+            self.logger.error(error_msg)
+            raise EmailAuthError(error_msg) from e
+        except Exception as e:
+            error_msg = f"连接IMAP服务器失败: {str(e)}"
+            self.logger.error(error_msg)
+            raise EmailConnectionError(error_msg) from e
+
+    @staticmethod
+    def _is_alive(conn: imaplib.IMAP4_SSL) -> bool:
+        """发送NOOP检测连接是否可用"""
+        try:
+            status, _ = conn.noop()
+            return status == 'OK'
+        except (imaplib.IMAP4.error, OSError):
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: imaplib.IMAP4_SSL) -> None:
+        """关闭连接，忽略错误"""
+        try:
+            conn.logout()
+        except Exception:
+            try:
+                conn.shutdown()
+            except Exception:
+                pass
+
+    def acquire(self) -> imaplib.IMAP4_SSL:
+        """
+        获取一个已认证的连接
+
+        Returns:
+            IMAP连接
+
+        Raises:
+            EmailConnectionError: 连接池已关闭或连接失败
+            EmailAuthError: 认证失败
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise EmailConnectionError("IMAP连接池已关闭")
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+
+                if self._in_use < self.max_size:
+                    conn, last_used = None, 0.0
+                    self._in_use += 1
+                    break
+
+                self._condition.wait()
+
+        try:
+            if conn is not None:
+                if time.monotonic() - last_used < self.check_interval or self._is_alive(conn):
+                    return conn
+                self.logger.info("IMAP连接已断开，正在重新连接...")
+                self._close_quietly(conn)
+            return self._create_connection()
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, conn: Optional[imaplib.IMAP4_SSL], discard: bool = False) -> None:
+        """
+        归还连接
+
+        Args:
+            conn: 要归还的连接
+            discard: 是否丢弃该连接（如发生网络错误后）
+        """
+        if conn is None:
+            return
+
+        with self._condition:
+            self._in_use = max(0, self._in_use - 1)
+            if discard or self._closed:
+                close_conn = True
+            else:
+                self._idle.append((conn, time.monotonic()))
+                close_conn = False
+            self._condition.notify()
+
+        if close_conn:
+            self._close_quietly(conn)
+
+    def start_keepalive(self) -> None:
+        """启动后台保活线程（重复调用无副作用）"""
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop,
+            name="imap-keepalive",
+            daemon=True
+        )
+        self._keepalive_thread.start()
+
+    def _keepalive_loop(self) -> None:
+        """对空闲连接定期发送NOOP，移除已断开的连接"""
+        while not self._stop_event.wait(self.keepalive_interval):
+            # 检测期间连接计入使用中，并发的acquire不会因此额外创建连接而超过max_size
+            with self._condition:
+                idle = self._idle
+                self._idle = []
+                self._in_use += len(idle)
+
+            alive = []
+            for conn, last_used in idle:
+                if self._is_alive(conn):
+                    alive.append((conn, time.monotonic()))
+                else:
+                    self.logger.info("移除已断开的空闲IMAP连接")
+                    self._close_quietly(conn)
+
+            with self._condition:
+                self._in_use = max(0, self._in_use - len(idle))
+                if self._closed:
+                    close_conns = alive
+                else:
+                    self._idle.extend(alive)
+                    close_conns = []
+                self._condition.notify_all()
+
+            for conn, _ in close_conns:
+                self._close_quietly(conn)
+
+    def wait_for_new_mail(self, mailbox: str = "INBOX", timeout: int = 29 * 60) -> bool:
+        """
+        使用IMAP IDLE等待新邮件
+
+        使用连接池中的独立连接，服务器不支持IDLE时退化为按NOOP轮询
+
+        Args:
+            mailbox: 监听的邮箱文件夹
+            timeout: 最长等待时间（秒），RFC 2177建议不超过29分钟
+
+        Returns:
+            是否收到新邮件通知
+        """
+        conn = self.acquire()
+        discard = False
+        try:
+            status, data = conn.select(mailbox, readonly=True)
+            if status != 'OK':
+                raise EmailConnectionError(f"选择邮箱 {mailbox} 失败: {status}")
+            if 'IDLE' in conn.capabilities:
+                return self._idle_once(conn, timeout)
+            return self._poll_once(conn, int(data[0]) if data and data[0] else 0, timeout)
+        except (imaplib.IMAP4.abort, OSError) as e:
+            discard = True
+            raise EmailConnectionError(f"IMAP IDLE失败: {str(e)}") from e
+        finally:
+            self.release(conn, discard=discard)
+
+    def _idle_once(self, conn: imaplib.IMAP4_SSL, timeout: int) -> bool:
+        """发送一次IDLE命令，等待EXISTS/RECENT通知或超时后发送DONE"""
+        tag = conn._new_tag()
+        conn.send(tag + b' IDLE\r\n')
+
+        response = conn.readline()
+        if not response.startswith(b'+'):
+            raise imaplib.IMAP4.abort(f"服务器拒绝IDLE: {response!r}")
+
+        sock = conn.socket()
+        deadline = time.monotonic() + timeout
+        new_mail = False
+
+        try:
+            while not new_mail:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # SSL层可能已缓存未读取的数据，此时不需要等待套接字
+                pending = sock.pending() if hasattr(sock, 'pending') else 0
+                if not pending:
+                    readable, _, _ = select.select([sock], [], [], remaining)
+                    if not readable:
+                        break
+                line = conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("IDLE期间连接被关闭")
+                if line.startswith(b'*') and (b'EXISTS' in line or b'RECENT' in line):
+                    new_mail = True
+        finally:
+            conn.send(b'DONE\r\n')
+            while True:
+                line = conn.readline()
+                if not line or line.startswith(tag):
+                    break
+
+        return new_mail
+
+    def _poll_once(self, conn: imaplib.IMAP4_SSL, initial_count: int, timeout: int) -> bool:
+        """不支持IDLE时按NOOP轮询邮件数量变化"""
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            time.sleep(min(self.check_interval, max(0.0, deadline - time.monotonic())))
+            conn.noop()
+            exists_data = conn.untagged_responses.pop('EXISTS', None)
+            if exists_data and int(exists_data[-1]) > initial_count:
+                return True
+
+        return False
+
+    def close_all(self) -> None:
+        """关闭连接池中的所有连接并停止保活线程"""
+        self._stop_event.set()
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._condition.notify_all()
+
+        for conn, _ in idle:
+            self._close_quietly(conn)
@@ -0,0 +1,141 @@
+"""
+IMAP批量获取工具
+将多个邮件ID合并为消息集（如: 1:500）通过一条FETCH命令获取，减少网络往返
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# FETCH响应行开头的消息序号，如: b'12 (RFC822 {3456}'
+_FETCH_SEQ_PATTERN = re.compile(rb'^(\d+) \(')
+# FETCH响应中的UID字段，如: b'UID 4821'
+_FETCH_UID_PATTERN = re.compile(rb'UID (\d+)')
+
+# 默认每批获取的邮件数量
+DEFAULT_FETCH_BATCH_SIZE = 200
+
+
+def build_message_set(message_ids: Sequence[bytes]) -> str:
+    """
+    将邮件ID列表压缩为IMAP消息集
+
+    只合并连续的ID，例如 [1, 2, 3, 5, 7, 8] -> "1:3,5,7:8"
+
+    Args:
+        message_ids: 邮件序号或UID列表
+
+    Returns:
+        IMAP消息集字符串
+    """
+    numbers = sorted({int(msg_id) for msg_id in message_ids})
+    if not numbers:
+        return ""
+
+    ranges = []
+    start = prev = numbers[0]
+    for number in numbers[1:]:
+        if number == prev + 1:
+            prev = number
+            continue
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        start = prev = number
+    ranges.append(f"{start}:{prev}" if start != prev else str(start))
+
+    return ','.join(ranges)
+
+
+def chunk_message_ids(message_ids: Sequence[bytes], chunk_size: int) -> Iterator[List[bytes]]:
+    """
+    按批次大小切分邮件ID列表
+
+    Args:
+        message_ids: 邮件ID列表
+        chunk_size: 每批数量（小于1时按1处理）
+
+    Yields:
+        邮件ID批次
+    """
+    chunk_size = max(1, chunk_size)
+    for start in range(0, len(message_ids), chunk_size):
+        yield list(message_ids[start:start + chunk_size])
+
+
+def parse_fetch_response(data: List, use_uid: bool = False) -> Dict[bytes, bytes]:
+    """
+    将一次FETCH命令的响应拆分为单封邮件
+
+    imaplib返回的列表中，每个带字面量的邮件是一个 (响应头, 内容) 元组，
+    之后跟随一个以 b')' 结尾的字节串；未请求的FLAGS等推送响应为普通字节串，直接忽略。
+
+    Args:
+        data: imaplib FETCH返回的数据列表
+        use_uid: 是否以UID作为键（否则使用消息序号）
+
+    Returns:
+        邮件ID到邮件内容的映射
+    """
+    messages: Dict[bytes, bytes] = {}
+
+    for index, item in enumerate(data):
+        if not isinstance(item, tuple) or len(item) < 2:
+            continue
+
+        header = item[0]
+        key: Optional[bytes] = None
+
+        if use_uid:
+            uid_match = _FETCH_UID_PATTERN.search(header)
+            if not uid_match and index + 1 < len(data) and isinstance(data[index + 1], bytes):
+                # 部分服务器将UID放在字面量之后，如: b' UID 4821)'
+                uid_match = _FETCH_UID_PATTERN.search(data[index + 1])
+            if uid_match:
+                key = uid_match.group(1)
+        else:
+            seq_match = _FETCH_SEQ_PATTERN.match(header)
+            if seq_match:
+                key = seq_match.group(1)
+
+        if key is not None:
+            messages[key] = item[1]
+
+    return messages
+
+
+def fetch_messages_batched(
+    imap_conn,
+    message_ids: Sequence[bytes],
+    message_parts: str = '(RFC822)',
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    use_uid: bool = False
+) -> Iterator[Tuple[bytes, Optional[bytes]]]:
+    """
+    批量获取邮件，每批只发送一条FETCH命令
+
+    按传入顺序逐封产出结果，内存占用受批次大小限制。
+
+    Args:
+        imap_conn: 已选择邮箱的IMAP连接
+        message_ids: 邮件序号或UID列表
+        message_parts: FETCH数据项，如 '(RFC822)'
+        batch_size: 每批获取的邮件数量
+        use_uid: 是否使用UID FETCH
+
+    Yields:
+        (邮件ID, 邮件内容)，服务器未返回的邮件内容为None
+    """
+    for chunk in chunk_message_ids(message_ids, batch_size):
+        message_set = build_message_set(chunk)
+
+        if use_uid:
+            status, data = imap_conn.uid('FETCH', message_set, message_parts)
+        else:
+            status, data = imap_conn.fetch(message_set, message_parts)
+
+        if status != 'OK':
+            for msg_id in chunk:
+                yield msg_id, None
+            continue
+
+        fetched = parse_fetch_response(data, use_uid=use_uid)
+        for msg_id in chunk:
+            yield msg_id, fetched.pop(msg_id, None)
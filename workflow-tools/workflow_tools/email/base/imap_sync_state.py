@@ -0,0 +1,82 @@
+"""
+IMAP增量同步状态存储
+按邮箱记录UIDVALIDITY和已处理的最大UID（高水位），用于只获取新邮件
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from ...utils.json_state import JsonStateFile
+
+
+class IMAPSyncState:
+    """
+    基于JSON文件的IMAP同步状态存储
+
+    文件格式:
+        {
+            "user@example.com@imap.example.com/INBOX": {
+                "uidvalidity": 1700000000,
+                "last_uid": 4821
+            }
+        }
+    """
+
+    def __init__(self, state_file: Union[str, Path] = ".cache/imap_sync_state.json"):
+        """
+        初始化同步状态存储
+
+        Args:
+            state_file: 状态文件路径
+        """
+        self.state_file = Path(state_file)
+        self._state = JsonStateFile(self.state_file)
+
+    @staticmethod
+    def mailbox_key(email_address: str, server: str, mailbox: str = "INBOX") -> str:
+        """
+        生成邮箱状态键
+
+        Args:
+            email_address: 邮箱地址
+            server: IMAP服务器地址
+            mailbox: 邮箱文件夹
+
+        Returns:
+            状态键
+        """
+        return f"{email_address}@{server}/{mailbox}"
+
+    def get(self, key: str) -> Optional[Dict[str, int]]:
+        """
+        获取邮箱同步状态
+
+        Args:
+            key: 邮箱状态键
+
+        Returns:
+            包含uidvalidity和last_uid的字典，不存在则返回None
+        """
+        return self._state.read().get(key)
+
+    def update(self, key: str, uidvalidity: int, last_uid: int) -> None:
+        """
+        更新邮箱同步状态
+
+        Args:
+            key: 邮箱状态键
+            uidvalidity: 当前UIDVALIDITY
+            last_uid: 已处理的最大UID
+        """
+        with self._state.modify() as data:
+            data[key] = {'uidvalidity': uidvalidity, 'last_uid': last_uid}
+
+    def reset(self, key: str) -> None:
+        """
+        清除邮箱同步状态（下次获取时执行完整同步）
+
+        Args:
+            key: 邮箱状态键
+        """
+        with self._state.modify() as data:
+            data.pop(key, None)
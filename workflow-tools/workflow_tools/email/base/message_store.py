@@ -0,0 +1,250 @@
+"""
+本地邮件存储
+原始邮件按内容哈希去重后追加写入分段文件，通过偏移索引（mmap）随机读取，
+同时保存解析后的EmailMessage，避免每次运行重复下载和解析
+"""
+
+import hashlib
+import json
+import mmap
+import threading
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from .email_base import EmailMessage
+
+# 分段文件位置: (分段编号, 偏移, 长度)
+_Location = Tuple[int, int, int]
+
+
+class MessageStore:
+    """
+    基于追加写入分段文件的邮件存储
+
+    目录结构:
+        store_dir/
+            segments/segment_000001.dat   # 原始邮件和解析结果（追加写入）
+            index.jsonl                    # 索引记录（追加写入，启动时加载）
+
+    内存中只保存键到偏移的索引，邮件内容按需通过mmap读取
+    """
+
+    INDEX_FILE = "index.jsonl"
+    SEGMENT_DIR = "segments"
+
+    def __init__(
+        self,
+        store_dir: Union[str, Path] = ".cache/messages",
+        segment_max_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        初始化邮件存储
+
+        Args:
+            store_dir: 存储目录
+            segment_max_bytes: 单个分段文件的最大字节数，超过后写入新分段
+        """
+        self.store_dir = Path(store_dir)
+        self.segment_dir = self.store_dir / self.SEGMENT_DIR
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.store_dir / self.INDEX_FILE
+        self.segment_max_bytes = segment_max_bytes
+
+        self._lock = threading.Lock()
+        # 内容哈希 -> 原始邮件位置
+        self._blobs: Dict[str, _Location] = {}
+        # 键 -> 索引条目
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._mmaps: Dict[int, mmap.mmap] = {}
+
+        self._active_segment = 1
+        self._load_index()
+
+    def _segment_path(self, segment: int) -> Path:
+        """获取分段文件路径"""
+        return self.segment_dir / f"segment_{segment:06d}.dat"
+
+    def _load_index(self) -> None:
+        """加载索引文件（忽略写入中断导致的损坏行）"""
+        segments = sorted(self.segment_dir.glob("segment_*.dat"))
+        if segments:
+            self._active_segment = int(segments[-1].stem.split('_')[1])
+
+        if not self.index_path.exists():
+            return
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entry['raw'] = tuple(entry['raw'])
+                    entry['parsed'] = tuple(entry['parsed'])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                self._blobs[entry['sha256']] = entry['raw']
+                self._entries[entry['key']] = entry
+
+    def _append(self, data: bytes) -> _Location:
+        """追加写入数据到当前分段"""
+        path = self._segment_path(self._active_segment)
+        if path.exists() and path.stat().st_size + len(data) > self.segment_max_bytes:
+            self._active_segment += 1
+            path = self._segment_path(self._active_segment)
+
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+
+        return self._active_segment, offset, len(data)
+
+    def _read(self, location: _Location) -> bytes:
+        """通过mmap读取分段中的数据"""
+        segment, offset, length = location
+        if length == 0:
+            return b""
+
+        mapped = self._mmaps.get(segment)
+        if mapped is None or offset + length > len(mapped):
+            # 分段在映射后又被追加写入，需要重新映射
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps[segment] = mapped
+
+        return mapped[offset:offset + length]
+
+    @staticmethod
+    def _serialize_message(message: EmailMessage) -> bytes:
+        """序列化解析后的邮件"""
+        data = asdict(message)
+        data['received_time'] = message.received_time.isoformat()
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+    @staticmethod
+    def _deserialize_message(data: bytes) -> EmailMessage:
+        """反序列化解析后的邮件"""
+        fields = json.loads(data.decode('utf-8'))
+        fields['received_time'] = datetime.fromisoformat(fields['received_time'])
+        return EmailMessage(**fields)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: str, raw: bytes, message: EmailMessage, source: str = "") -> str:
+        """
+        保存邮件
+
+        相同内容的原始邮件只写入一次
+
+        Args:
+            key: 邮件键（如Message-ID或UID）
+            raw: 原始邮件字节（RFC822或API返回的JSON）
+            message: 解析后的邮件
+            source: 邮件来源（如邮箱地址），用于按来源查询
+
+        Returns:
+            原始邮件的SHA-256哈希
+        """
+        content_hash = hashlib.sha256(raw).hexdigest()
+        received_time = message.received_time
+        if received_time.tzinfo is None:
+            received_time = received_time.replace(tzinfo=timezone.utc)
+
+        with self._lock:
+            raw_location = self._blobs.get(content_hash)
+            if raw_location is None:
+                raw_location = self._append(raw)
+                self._blobs[content_hash] = raw_location
+
+            entry = {
+                'key': key,
+                'sha256': content_hash,
+                'source': source,
+                'received_ts': received_time.timestamp(),
+                'raw': raw_location,
+                'parsed': self._append(self._serialize_message(message))
+            }
+
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            self._entries[key] = entry
+
+        return content_hash
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        读取原始邮件
+
+        Args:
+            key: 邮件键
+
+        Returns:
+            原始邮件字节，不存在则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return self._read(entry['raw']) if entry else None
+
+    def get_message(self, key: str) -> Optional[EmailMessage]:
+        """
+        读取解析后的邮件
+
+        Args:
+            key: 邮件键
+
+        Returns:
+            邮件消息，不存在则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            data = self._read(entry['parsed'])
+        return self._deserialize_message(data)
+
+    def iter_messages(
+        self,
+        source: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> Iterator[Tuple[str, EmailMessage]]:
+        """
+        按来源和时间遍历已保存的邮件
+
+        Args:
+            source: 邮件来源过滤
+            since: 起始时间过滤（按邮件接收时间）
+
+        Yields:
+            (邮件键, 邮件消息)
+        """
+        since_ts = None
+        if since is not None:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            since_ts = since.timestamp()
+
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if (source is None or entry['source'] == source)
+                and (since_ts is None or entry['received_ts'] >= since_ts)
+            ]
+
+        for key in keys:
+            message = self.get_message(key)
+            if message is not None:
+                yield key, message
+
+    def close(self) -> None:
+        """关闭所有mmap映射"""
+        with self._lock:
+            for mapped in self._mmaps.values():
+                mapped.close()
+            self._mmaps.clear()
@@ -0,0 +1,182 @@
+"""
+单遍MIME扫描
+按boundary在原始邮件字节上定位各个部分，只解析部分的头信息，
+只解码选中的正文部分，附件内容不会被解析、复制或base64解码
+"""
+
+import email
+import re
+from dataclasses import dataclass
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Optional, Tuple
+
+# 头部与正文之间的空行
+_HEADER_END = re.compile(rb'\r?\n\r?\n')
+# 嵌套multipart的最大深度（防止恶意构造的邮件）
+MAX_DEPTH = 10
+
+_header_parser = BytesHeaderParser()
+
+
+@dataclass
+class ScannedMessage:
+    """单遍扫描结果"""
+    headers: Message
+    body: str = ""
+    has_attachments: bool = False
+
+
+@dataclass
+class _ScanState:
+    """扫描过程中的状态"""
+    plain: Optional[Tuple[int, int]] = None
+    html: Optional[Tuple[int, int]] = None
+    has_attachments: bool = False
+
+    @property
+    def done(self) -> bool:
+        """已找到纯文本正文和附件时无需继续扫描"""
+        return self.plain is not None and self.has_attachments
+
+
+def _split_headers(raw: bytes, start: int, end: int) -> Tuple[Message, int]:
+    """
+    解析[start, end)范围内部分的头信息
+
+    Args:
+        raw: 原始邮件字节
+        start: 部分起始位置
+        end: 部分结束位置
+
+    Returns:
+        (头信息, 正文起始位置)
+    """
+    # 部分以空行开头表示没有头信息
+    for newline in (b"\r\n", b"\n"):
+        if raw.startswith(newline, start, end):
+            return Message(), start + len(newline)
+
+    match = _HEADER_END.search(raw, start, end)
+    if match is None:
+        # 没有空行：只有头部（或只有正文），按RFC 2046视为没有正文
+        return _header_parser.parsebytes(raw[start:end]), end
+    return _header_parser.parsebytes(raw[start:match.start()] + b"\r\n"), match.end()
+
+
+def _iter_parts(raw: bytes, start: int, end: int, boundary: bytes):
+    """
+    按boundary分隔行定位multipart中的各个部分
+
+    Args:
+        raw: 原始邮件字节
+        start: multipart正文起始位置
+        end: multipart正文结束位置
+        boundary: 分隔符（不含前导--）
+
+    Yields:
+        (部分起始位置, 部分结束位置)
+    """
+    delimiter = b"--" + boundary
+    part_start = None
+    pos = start
+
+    while True:
+        index = raw.find(delimiter, pos, end)
+        if index < 0:
+            break
+
+        # 分隔符必须位于行首
+        if index != start and raw[index - 1:index] != b"\n":
+            pos = index + len(delimiter)
+            continue
+
+        if part_start is not None:
+            # 分隔符前的换行属于分隔符
+            part_end = index - 1
+            if part_end > part_start and raw[part_end - 1:part_end] == b"\r":
+                part_end -= 1
+            yield part_start, max(part_start, part_end)
+
+        after = index + len(delimiter)
+        if raw[after:after + 2] == b"--":
+            return
+
+        line_end = raw.find(b"\n", after, end)
+        if line_end < 0:
+            return
+        part_start = line_end + 1
+        pos = part_start
+
+
+def _scan_part(raw: bytes, start: int, end: int, headers: Message, body_start: int,
+               state: _ScanState, depth: int) -> None:
+    """递归扫描一个部分，记录正文位置和附件"""
+    if headers.get_content_disposition() == 'attachment':
+        state.has_attachments = True
+        return
+
+    content_type = headers.get_content_type()
+
+    if headers.get_content_maintype() == 'multipart':
+        boundary = headers.get_param('boundary')
+        if not boundary or depth >= MAX_DEPTH:
+            return
+        for part_start, part_end in _iter_parts(raw, body_start, end, str(boundary).encode('utf-8', 'ignore')):
+            part_headers, part_body_start = _split_headers(raw, part_start, part_end)
+            _scan_part(raw, part_start, part_end, part_headers, part_body_start, state, depth + 1)
+            if state.done:
+                return
+        return
+
+    if content_type == 'text/plain' and state.plain is None:
+        state.plain = (start, end)
+    elif content_type == 'text/html' and state.html is None:
+        state.html = (start, end)
+
+
+def _decode_text(part_bytes: bytes) -> str:
+    """解码单个文本部分（只解析该部分，不涉及邮件中的其他内容）"""
+    part = email.message_from_bytes(part_bytes)
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='ignore')
+    except LookupError:
+        return payload.decode('utf-8', errors='ignore')
+
+
+def scan_message(raw: bytes) -> ScannedMessage:
+    """
+    单遍扫描原始邮件
+
+    正文优先选择第一个非附件的text/plain部分，没有时使用第一个text/html部分（移除标签）；
+    单部分邮件直接解码整个正文
+
+    Args:
+        raw: 原始邮件字节（RFC822）
+
+    Returns:
+        扫描结果
+    """
+    headers, body_start = _split_headers(raw, 0, len(raw))
+    result = ScannedMessage(headers=headers)
+
+    if headers.get_content_maintype() != 'multipart':
+        result.has_attachments = headers.get_content_disposition() == 'attachment'
+        if not result.has_attachments:
+            result.body = _decode_text(raw).strip()
+        return result
+
+    state = _ScanState()
+    _scan_part(raw, 0, len(raw), headers, body_start, state, 0)
+    result.has_attachments = state.has_attachments
+
+    if state.plain is not None:
+        result.body = _decode_text(raw[state.plain[0]:state.plain[1]]).strip()
+    elif state.html is not None:
+        html_body = _decode_text(raw[state.html[0]:state.html[1]])
+        # 简单移除HTML标签
+        result.body = re.sub(r'<[^>]+>', '', html_body).strip()
+
+    return result
@@ -0,0 +1,216 @@
+"""
+可复用的SMTP会话
+保持一个已认证的SMTP连接用于多次发送，邮件之间发送RSET，
+连接被服务器关闭（421/超时）时自动重新连接并登录
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional, Union
+
+from ...exceptions.email_exceptions import EmailAuthError, EmailConnectionError
+
+SMTPConnection = Union[smtplib.SMTP, smtplib.SMTP_SSL]
+
+
+def build_message(
+    sender: str,
+    to: List[str],
+    subject: str,
+    body: str,
+    cc: Optional[List[str]] = None
+) -> MIMEMultipart:
+    """
+    构建纯文本邮件
+
+    Args:
+        sender: 发件人
+        to: 收件人列表
+        subject: 邮件主题
+        body: 邮件正文（纯文本）
+        cc: 抄送列表
+
+    Returns:
+        MIME邮件对象
+    """
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ', '.join(to)
+    msg['Subject'] = subject
+
+    if cc:
+        msg['Cc'] = ', '.join(cc)
+
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    return msg
+
+
+class SMTPSession:
+    """
+    SMTP会话管理
+
+    第一次发送时建立连接并登录，之后的发送复用同一连接。
+    连接空闲超过check_interval时先发送NOOP确认可用；
+    服务器返回421或连接超时/断开时自动重新登录并重发一次。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        use_ssl: bool = False,
+        timeout: int = 30,
+        check_interval: int = 30
+    ):
+        """
+        初始化SMTP会话
+
+        Args:
+            host: SMTP服务器地址
+            port: SMTP端口
+            username: 登录用户名（邮箱地址）
+            password: 密码或授权码
+            use_ssl: 是否使用SSL连接（465端口），否则使用STARTTLS（587端口）
+            timeout: 网络超时时间（秒）
+            check_interval: 空闲超过该时间的连接在发送前先用NOOP检测（秒）
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.check_interval = check_interval
+
+        self._server: Optional[SMTPConnection] = None
+        self._last_used = 0.0
+        self._sent_count = 0
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def is_connected(self) -> bool:
+        """是否持有已登录的连接"""
+        return self._server is not None
+
+    def _connect(self) -> None:
+        """建立连接并登录"""
+        try:
+            if self.use_ssl:
+                self.logger.debug(f"使用SSL连接SMTP服务器 {self.host}:{self.port}")
+                server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+            else:
+                self.logger.debug(f"使用STARTTLS连接SMTP服务器 {self.host}:{self.port}")
+                server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                server.ehlo()
+                server.starttls()
+                server.ehlo()
+        except (smtplib.SMTPException, OSError) as e:
+            raise EmailConnectionError(f"连接SMTP服务器失败: {str(e)}") from e
+
+        try:
+            server.login(self.username, self.password)
+        except smtplib.SMTPAuthenticationError as e:
+            self._quit_quietly(server)
+            raise EmailAuthError(f"SMTP认证失败: {str(e)}") from e
+        except (smtplib.SMTPException, OSError) as e:
+            self._quit_quietly(server)
+            raise EmailConnectionError(f"SMTP登录失败: {str(e)}") from e
+
+        self._server = server
+        self._sent_count = 0
+        self._last_used = time.monotonic()
+        self.logger.info(f"已建立SMTP会话 ({self.host})")
+
+    @staticmethod
+    def _quit_quietly(server: SMTPConnection) -> None:
+        """关闭连接，忽略错误"""
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _discard(self) -> None:
+        """丢弃当前连接"""
+        if self._server is not None:
+            self._quit_quietly(self._server)
+            self._server = None
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """判断是否为需要重新连接的错误（连接断开、超时或421服务不可用）"""
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421
+        # SMTPException是OSError的子类，其余SMTP错误（如收件人被拒）不需要重新连接
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    def _ensure_connected(self) -> SMTPConnection:
+        """获取可用的连接，空闲过久时先用NOOP检测"""
+        if self._server is not None and time.monotonic() - self._last_used >= self.check_interval:
+            try:
+                code, _ = self._server.noop()
+                if code != 250:
+                    self._discard()
+            except (smtplib.SMTPException, OSError):
+                self._discard()
+
+        if self._server is None:
+            self._connect()
+
+        return self._server
+
+    def send_message(self, msg: MIMEMultipart, recipients: List[str]) -> None:
+        """
+        通过当前会话发送邮件
+
+        Args:
+            msg: MIME邮件对象
+            recipients: 实际投递的收件人（包含抄送和密送）
+
+        Raises:
+            EmailAuthError: 认证失败
+            EmailConnectionError: 无法建立连接
+            smtplib.SMTPException: 重新连接后仍然发送失败，或服务器拒绝该邮件
+        """
+        with self._lock:
+            for attempt in range(2):
+                server = self._ensure_connected()
+                try:
+                    if self._sent_count > 0:
+                        # 清除上一封邮件可能残留的事务状态
+                        server.rset()
+                    server.send_message(msg, to_addrs=recipients)
+                    self._sent_count += 1
+                    self._last_used = time.monotonic()
+                    return
+                except (smtplib.SMTPException, OSError) as e:
+                    if not self._is_connection_error(e):
+                        self._last_used = time.monotonic()
+                        raise
+                    self._discard()
+                    if attempt == 1:
+                        raise
+                    self.logger.warning(f"SMTP连接已断开，正在重新登录: {str(e)}")
+
+    def close(self) -> None:
+        """结束会话（发送QUIT）"""
+        with self._lock:
+            self._discard()
+
+    def __enter__(self) -> "SMTPSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
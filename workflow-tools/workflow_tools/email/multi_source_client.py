@@ -0,0 +1,297 @@
+"""
+多邮箱聚合客户端
+并发从多个邮件客户端获取邮件，按接收时间合并并按Message-ID去重
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from .base.email_base import EmailClientBase, EmailResult, EmailMessage, OutgoingEmail
+
+
+class MultiSourceEmailClient(EmailClientBase):
+    """
+    多邮箱聚合客户端
+
+    获取邮件: 每个邮箱在线程池中独立执行 connect → fetch_emails → disconnect，
+    单个邮箱超时或失败不影响其他邮箱，总耗时取决于最慢的邮箱
+    发送邮件: 使用第一个邮箱（或指定的发送邮箱）
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, EmailClientBase],
+        timeout: float = 120,
+        timeouts: Optional[Dict[str, float]] = None,
+        sender: Optional[str] = None
+    ):
+        """
+        初始化多邮箱客户端
+
+        Args:
+            sources: 邮箱名称到客户端的映射（按优先级排列，去重时保留靠前邮箱的邮件）
+            timeout: 每个邮箱的默认获取超时时间（秒）
+            timeouts: 按邮箱名称单独设置的超时时间
+            sender: 用于发送邮件的邮箱名称（默认第一个）
+        """
+        super().__init__()
+
+        if not sources:
+            raise ValueError("至少需要一个邮件客户端")
+        if sender is not None and sender not in sources:
+            raise ValueError(f"发送邮箱 {sender} 不在邮箱列表中")
+
+        self.sources = dict(sources)
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.sender = sender or next(iter(self.sources))
+
+        # 超时的获取仍在后台运行时，不会对同一邮箱发起新的获取
+        self._source_locks = {name: threading.Lock() for name in self.sources}
+
+        # 日志配置
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def send_client(self) -> EmailClientBase:
+        """用于发送邮件的客户端"""
+        return self.sources[self.sender]
+
+    def connect(self) -> bool:
+        """
+        连接到邮件服务器
+
+        各邮箱在获取邮件时分别连接，这里不做任何操作
+
+        Returns:
+            始终为True
+        """
+        return True
+
+    def disconnect(self) -> None:
+        """
+        断开空闲邮箱的连接
+
+        各邮箱的工作线程在获取结束后自行断开；超时后仍在后台获取的邮箱会被跳过，
+        避免在其他线程使用连接时关闭连接（或向连接池重复归还）
+        """
+        self._for_idle_sources("disconnect", "断开")
+
+    def close(self) -> None:
+        """释放空闲邮箱客户端的资源（仍在后台获取的邮箱会被跳过）"""
+        self._for_idle_sources("close", "关闭")
+
+    def _for_idle_sources(self, method: str, action: str) -> None:
+        """
+        对没有正在进行获取的邮箱调用指定方法
+
+        Args:
+            method: 客户端方法名（disconnect或close）
+            action: 日志中的操作名称
+        """
+        for name, client in self.sources.items():
+            lock = self._source_locks[name]
+            if not lock.acquire(blocking=False):
+                self.logger.warning(f"邮箱 {name} 仍在后台获取邮件，跳过{action}")
+                continue
+            try:
+                getattr(client, method)()
+            except Exception as e:
+                self.logger.warning(f"{action}邮箱 {name} 时出错: {str(e)}")
+            finally:
+                lock.release()
+
+    def _fetch_source(
+        self,
+        name: str,
+        subject: Optional[str],
+        sender: Optional[str],
+        since_date: Optional[datetime],
+        limit: Optional[int]
+    ) -> EmailResult:
+        """在工作线程中获取单个邮箱的邮件"""
+        lock = self._source_locks[name]
+        if not lock.acquire(blocking=False):
+            return EmailResult(success=False, error="上一次获取仍在进行")
+
+        client = self.sources[name]
+        try:
+            client.connect()
+            try:
+                return client.fetch_emails(subject=subject, sender=sender, since_date=since_date, limit=limit)
+            finally:
+                client.disconnect()
+        except Exception as e:
+            return EmailResult(success=False, error=str(e))
+        finally:
+            lock.release()
+
+    def fetch_emails(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> EmailResult:
+        """
+        并发获取所有邮箱的邮件
+
+        Args:
+            subject: 邮件主题过滤
+            sender: 发件人过滤
+            since_date: 起始时间过滤
+            limit: 合并后的最大返回数量
+
+        Returns:
+            邮件结果，至少一个邮箱成功时success为True；
+            metadata包含每个邮箱的邮件数量（sources）、失败原因（failed_sources）
+            和待确认的同步状态（sync_state，由commit_sync_state保存）
+        """
+        results: Dict[str, EmailResult] = {}
+        start_time = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="email-source")
+        try:
+            futures = {
+                name: executor.submit(self._fetch_source, name, subject, sender, since_date, limit)
+                for name in self.sources
+            }
+
+            for name, future in futures.items():
+                deadline = start_time + self.timeouts.get(name, self.timeout)
+                try:
+                    results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    results[name] = EmailResult(
+                        success=False,
+                        error=f"获取超时（{self.timeouts.get(name, self.timeout)}秒）"
+                    )
+        finally:
+            # 不等待超时的邮箱，它们会在后台结束（每个邮箱一个工作线程，没有排队的任务需要取消）
+            executor.shutdown(wait=False)
+
+        failed_sources = {}
+        for name, result in results.items():
+            if result.success:
+                self.logger.info(f"邮箱 {name}: 获取 {len(result.messages)} 封邮件")
+            else:
+                failed_sources[name] = result.error
+                self.logger.error(f"邮箱 {name} 获取失败: {result.error}")
+
+        if len(failed_sources) == len(self.sources):
+            return EmailResult(
+                success=False,
+                error="所有邮箱获取失败: " + "; ".join(f"{name}: {error}" for name, error in failed_sources.items()),
+                metadata={"failed_sources": failed_sources}
+            )
+
+        messages = self._merge_results(results)
+        if limit:
+            messages = messages[:limit]
+
+        elapsed = time.monotonic() - start_time
+        self.logger.info(f"合并 {len(self.sources)} 个邮箱共 {len(messages)} 封邮件，耗时 {elapsed:.1f}秒")
+
+        return EmailResult(
+            success=True,
+            messages=messages,
+            metadata={
+                "total_count": len(messages),
+                "sources": {
+                    name: len(result.messages) for name, result in results.items() if result.success
+                },
+                "failed_sources": failed_sources,
+                "sync_state": {
+                    name: result.metadata["sync_state"]
+                    for name, result in results.items()
+                    if result.success and result.metadata.get("sync_state")
+                }
+            }
+        )
+
+    def commit_sync_state(self, result: EmailResult) -> None:
+        """
+        保存各邮箱的增量同步状态（邮件处理完成后调用）
+
+        Args:
+            result: fetch_emails返回的结果
+        """
+        if not result.success:
+            return
+        for name, state in result.metadata.get("sync_state", {}).items():
+            try:
+                self.sources[name].commit_sync_state(EmailResult(metadata={"sync_state": state}))
+            except Exception as e:
+                self.logger.warning(f"保存邮箱 {name} 的同步状态失败: {str(e)}")
+
+    @staticmethod
+    def _merge_results(results: Dict[str, EmailResult]) -> List[EmailMessage]:
+        """
+        按接收时间（从新到旧）合并各邮箱的邮件，并按Message-ID去重
+
+        Args:
+            results: 邮箱名称到获取结果的映射（按优先级排列）
+
+        Returns:
+            合并后的邮件列表
+        """
+        seen = set()
+        merged = []
+
+        for name, result in results.items():
+            if not result.success:
+                continue
+            for message in result.messages:
+                internet_message_id = message.metadata.get('internet_message_id')
+                dedup_key = internet_message_id or (name, message.message_id)
+                if dedup_key in seen:
+                    continue
+                seen.add(dedup_key)
+                message.metadata.setdefault('source', name)
+                merged.append(message)
+
+        def sort_key(message: EmailMessage) -> datetime:
+            received = message.received_time
+            return received if received.tzinfo else received.replace(tzinfo=timezone.utc)
+
+        merged.sort(key=sort_key, reverse=True)
+        return merged
+
+    def send_email(
+        self,
+        to: List[str],
+        subject: str,
+        body: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> bool:
+        """
+        使用发送邮箱发送邮件
+
+        Args:
+            to: 收件人列表
+            subject: 邮件主题
+            body: 邮件正文
+            cc: 抄送列表
+            bcc: 密送列表
+
+        Returns:
+            是否发送成功
+        """
+        return self.send_client.send_email(to=to, subject=subject, body=body, cc=cc, bcc=bcc)
+
+    def send_many(self, emails: Iterable[OutgoingEmail]) -> EmailResult:
+        """
+        使用发送邮箱批量发送邮件
+
+        Args:
+            emails: 待发送的邮件
+
+        Returns:
+            发送结果
+        """
+        return self.send_client.send_many(emails)
@@ -3,7 +3,9 @@ Outlook邮件客户端
 """
 
 from .outlook_client import OutlookClient
+from .async_outlook_client import AsyncOutlookClient
+from .graph_delta_state import GraphDeltaState
 
-__all__ = ["OutlookClient"]
+__all__ = ["OutlookClient", "AsyncOutlookClient", "GraphDeltaState"]
 
 
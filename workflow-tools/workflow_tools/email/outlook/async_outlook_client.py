@@ -0,0 +1,317 @@
+"""
+异步Outlook邮件客户端实现
+使用aiohttp异步调用Microsoft Graph API读取邮件
+使用异步SMTP会话发送邮件
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+
+try:
+    from msal import ConfidentialClientApplication
+    MSAL_AVAILABLE = True
+except ImportError:
+    MSAL_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from ..base.async_email_base import AsyncEmailClientBase
+from ..base.async_smtp_session import AsyncSMTPSession
+from ..base.email_base import EmailResult
+from ..base.smtp_session import build_message
+from .outlook_client import OutlookClient, parse_graph_messages
+from ...exceptions.email_exceptions import (
+    OutlookAPIError,
+    SMTPError,
+    EmailAuthError,
+    EmailConnectionError
+)
+from ...utils.config_manager import ConfigManager
+
+
+class AsyncOutlookClient(AsyncEmailClientBase):
+    """
+    异步Outlook邮件客户端
+
+    读取邮件: 使用aiohttp调用Microsoft Graph API，多个请求共享一个连接池
+    发送邮件: 使用异步SMTP会话
+    查询参数、过滤规则和邮件解析与OutlookClient一致
+    """
+
+    GRAPH_API_ENDPOINT = OutlookClient.GRAPH_API_ENDPOINT
+    AUTHORITY = OutlookClient.AUTHORITY
+    SCOPE = OutlookClient.SCOPE
+    FIELDS = OutlookClient.SUMMARY_FIELDS + ",body"
+    GRAPH_PAGE_SIZE = OutlookClient.GRAPH_PAGE_SIZE
+    TOKEN_REFRESH_MARGIN = OutlookClient.TOKEN_REFRESH_MARGIN
+
+    SMTP_SERVER = OutlookClient.SMTP_SERVER
+    SMTP_PORT = OutlookClient.SMTP_PORT
+
+    def __init__(
+        self,
+        email_address: Optional[str] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        smtp_password: Optional[str] = None,
+        timeout: int = 30
+    ):
+        """
+        初始化异步Outlook客户端
+
+        Args:
+            email_address: 邮箱地址
+            client_id: Azure应用客户端ID (用于Graph API读取)
+            client_secret: Azure应用客户端密钥 (用于Graph API读取)
+            tenant_id: Azure租户ID (用于Graph API读取)
+            smtp_password: SMTP应用专用密码 (用于发送邮件)
+            timeout: HTTP请求超时时间（秒）
+        """
+        # 检查依赖
+        if not MSAL_AVAILABLE:
+            raise ImportError("请安装msal: pip install msal")
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("请安装aiohttp: pip install aiohttp")
+
+        # 获取配置
+        self.email_address = email_address or ConfigManager.get_required_env('OUTLOOK_EMAIL')
+        self.client_id = client_id or ConfigManager.get_required_env('OUTLOOK_CLIENT_ID')
+        self.client_secret = client_secret or ConfigManager.get_required_env('OUTLOOK_CLIENT_SECRET')
+        self.tenant_id = tenant_id or ConfigManager.get_required_env('OUTLOOK_TENANT_ID')
+        self.smtp_password = smtp_password or ConfigManager.get_required_env('OUTLOOK_SMTP_PASSWORD')
+        self.timeout = timeout
+
+        # SMTP会话（多次发送复用同一个已登录的连接）
+        self.smtp_session = AsyncSMTPSession(
+            self.SMTP_SERVER,
+            self.SMTP_PORT,
+            self.email_address,
+            self.smtp_password,
+            timeout=timeout
+        )
+
+        # Graph API认证
+        self.app = None
+        self.access_token = None
+        self.token_expires_at = 0.0
+
+        # HTTP会话需要在事件循环中创建，首次请求时初始化
+        self.session: Optional["aiohttp.ClientSession"] = None
+
+        # 日志配置
+        self.logger = logging.getLogger(__name__)
+
+    def _token_valid(self) -> bool:
+        """当前访问令牌是否可用（距过期超过刷新提前量）"""
+        return bool(self.access_token) and time.time() < self.token_expires_at - self.TOKEN_REFRESH_MARGIN
+
+    def _acquire_token(self) -> dict:
+        """获取访问令牌（同步调用MSAL，在线程中执行）"""
+        if self.app is None:
+            self.app = ConfidentialClientApplication(
+                self.client_id,
+                authority=self.AUTHORITY.format(tenant_id=self.tenant_id),
+                client_credential=self.client_secret
+            )
+        return self.app.acquire_token_for_client(scopes=self.SCOPE)
+
+    async def connect(self) -> bool:
+        """
+        连接到Outlook (获取访问令牌)
+
+        MSAL的令牌请求是阻塞调用，在线程中执行以免阻塞事件循环
+
+        Returns:
+            是否连接成功
+        """
+        if self._token_valid():
+            return True
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, self._acquire_token)
+        except Exception as e:
+            self.logger.error("连接Outlook失败: %s", str(e))
+            raise EmailConnectionError(f"连接失败: {str(e)}") from e
+
+        if "access_token" not in result:
+            error_msg = result.get("error_description", "未知错误")
+            self.logger.error("获取访问令牌失败: %s", error_msg)
+            raise EmailAuthError(f"认证失败: {error_msg}")
+
+        self.access_token = result["access_token"]
+        self.token_expires_at = time.time() + int(result.get("expires_in", 0))
+        self.logger.info("成功连接到Outlook Graph API")
+        return True
+
+    async def disconnect(self) -> None:
+        """断开连接（访问令牌保留，下次连接时复用）"""
+        self.logger.debug("已断开Outlook连接")
+
+    async def close(self) -> None:
+        """关闭HTTP会话和SMTP会话"""
+        await self.disconnect()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        await self.smtp_session.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """获取（必要时创建）HTTP会话"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    async def _iter_pages(self, url: str, headers: dict, params: Optional[dict] = None) -> AsyncIterator[dict]:
+        """
+        按@odata.nextLink逐页获取查询结果
+
+        Args:
+            url: 第一页的请求地址
+            headers: 请求头
+            params: 第一页的查询参数（nextLink中已包含查询参数）
+
+        Yields:
+            每一页的响应数据
+
+        Raises:
+            OutlookAPIError: 请求失败
+        """
+        session = self._get_session()
+        next_url = url
+        while next_url:
+            async with session.get(next_url, headers=headers, params=params) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise OutlookAPIError(f"API请求失败: {response.status} - {text}")
+                page = await response.json()
+
+            yield page
+
+            next_url = page.get("@odata.nextLink")
+            params = None
+
+    async def fetch_emails(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> EmailResult:
+        """
+        获取邮件列表
+
+        Args:
+            subject: 邮件主题过滤（完全匹配）
+            sender: 发件人过滤（完全匹配）
+            since_date: 起始时间过滤
+            limit: 最大返回数量
+
+        Returns:
+            邮件结果
+        """
+        try:
+            if not self._token_valid():
+                await self.connect()
+
+            filters = []
+            if subject:
+                OutlookClient._validate_filter_input(subject, "邮件主题")
+                filters.append(f"subject eq '{OutlookClient._escape_odata_string(subject)}'")
+            if sender:
+                OutlookClient._validate_filter_input(sender, "发件人邮箱")
+                filters.append(f"from/emailAddress/address eq '{OutlookClient._escape_odata_string(sender)}'")
+            if since_date:
+                date_str = since_date.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                filters.append(f"receivedDateTime ge {date_str}")
+
+            params = {
+                "$orderby": "receivedDateTime desc",
+                "$select": self.FIELDS,
+                "$top": str(min(limit, self.GRAPH_PAGE_SIZE) if limit else self.GRAPH_PAGE_SIZE)
+            }
+            if filters:
+                params["$filter"] = " and ".join(filters)
+
+            headers = {
+                "Authorization": f"Bearer {self.access_token}",
+                "Content-Type": "application/json"
+            }
+
+            raw_messages = []
+            url = f"{self.GRAPH_API_ENDPOINT}/users/{self.email_address}/messages"
+            async for page in self._iter_pages(url, headers, params):
+                raw_messages.extend(page.get("value", []))
+                if limit and len(raw_messages) >= limit:
+                    raw_messages = raw_messages[:limit]
+                    break
+
+            # 解析逻辑与同步客户端共用
+            messages = parse_graph_messages(raw_messages, self.logger)
+            self.logger.info("成功获取 %d 封邮件", len(messages))
+
+            return EmailResult(
+                success=True,
+                messages=messages,
+                metadata={"total_count": len(messages)}
+            )
+
+        except (EmailAuthError, EmailConnectionError, OutlookAPIError) as e:
+            error_msg = str(e)
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+        except ValueError as e:
+            error_msg = f"输入验证失败: {str(e)}"
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+        except Exception as e:
+            error_msg = f"获取邮件失败: {str(e)}"
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
+
+    async def send_email(
+        self,
+        to: List[str],
+        subject: str,
+        body: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> bool:
+        """
+        使用SMTP发送邮件
+
+        Args:
+            to: 收件人列表
+            subject: 邮件主题
+            body: 邮件正文（纯文本）
+            cc: 抄送列表
+            bcc: 密送列表
+
+        Returns:
+            是否发送成功
+        """
+        msg = build_message(self.email_address, to, subject, body, cc)
+        recipients = to + (cc or []) + (bcc or [])
+
+        try:
+            await self.smtp_session.send_message(msg, recipients)
+        except EmailAuthError as e:
+            self.logger.error(str(e))
+            raise
+        except Exception as e:
+            error_msg = f"SMTP发送失败: {str(e)}"
+            self.logger.error(error_msg)
+            raise SMTPError(error_msg) from e
+
+        self.logger.info("成功发送邮件到 %s", ', '.join(to))
+        return True
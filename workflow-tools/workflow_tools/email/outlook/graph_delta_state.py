@@ -0,0 +1,77 @@
+"""
+Graph增量查询状态存储
+按邮箱文件夹记录上次delta查询返回的@odata.deltaLink，用于只获取变化的邮件
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ...utils.json_state import JsonStateFile
+
+
+class GraphDeltaState:
+    """
+    基于JSON文件的Graph增量查询状态存储
+
+    文件格式:
+        {
+            "user@example.com/inbox": "https://graph.microsoft.com/v1.0/...delta?$deltatoken=..."
+        }
+    """
+
+    def __init__(self, state_file: Union[str, Path] = ".cache/graph_delta_state.json"):
+        """
+        初始化增量查询状态存储
+
+        Args:
+            state_file: 状态文件路径
+        """
+        self.state_file = Path(state_file)
+        self._state = JsonStateFile(self.state_file)
+
+    @staticmethod
+    def folder_key(email_address: str, folder: str = "inbox") -> str:
+        """
+        生成文件夹状态键
+
+        Args:
+            email_address: 邮箱地址
+            folder: 邮件文件夹
+
+        Returns:
+            状态键
+        """
+        return f"{email_address}/{folder}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        获取上次保存的deltaLink
+
+        Args:
+            key: 文件夹状态键
+
+        Returns:
+            deltaLink，不存在则返回None
+        """
+        return self._state.read().get(key)
+
+    def update(self, key: str, delta_link: str) -> None:
+        """
+        保存deltaLink
+
+        Args:
+            key: 文件夹状态键
+            delta_link: delta查询最后一页返回的@odata.deltaLink
+        """
+        with self._state.modify() as data:
+            data[key] = delta_link
+
+    def reset(self, key: str) -> None:
+        """
+        清除deltaLink（下次获取时执行完整同步）
+
+        Args:
+            key: 文件夹状态键
+        """
+        with self._state.modify() as data:
+            data.pop(key, None)
@@ -4,28 +4,36 @@ Outlook邮件客户端实现
 使用SMTP进行邮件发送
 """
 
+import json
 import logging
+import os
 import smtplib
 from datetime import datetime, timezone
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator, Tuple, Union
+from urllib.parse import quote
 import time
 
 try:
-    from msal import ConfidentialClientApplication
+    from msal import ConfidentialClientApplication, SerializableTokenCache
     MSAL_AVAILABLE = True
 except ImportError:
     MSAL_AVAILABLE = False
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     REQUESTS_AVAILABLE = True
 except ImportError:
     REQUESTS_AVAILABLE = False
 
 from ..base.email_base import EmailClientBase, EmailResult, EmailMessage
+from ..base.message_store import MessageStore
+from ..base.smtp_session import SMTPSession, build_message
+from .graph_delta_state import GraphDeltaState
 from ...exceptions.email_exceptions import (
+    OutlookAPIError,
+    GraphDeltaExpiredError,
     SMTPError,
     EmailAuthError,
     EmailConnectionError
@@ -47,6 +55,17 @@ class OutlookClient(EmailClientBase):
     AUTHORITY = "https://login.microsoftonline.com/{tenant_id}"
     SCOPE = ["https://graph.microsoft.com/.default"]
 
+    # 邮件查询字段（不含正文）
+    SUMMARY_FIELDS = "subject,from,toRecipients,receivedDateTime,id,hasAttachments,isRead,internetMessageId"
+    # JSON批量请求单次最多包含的请求数
+    GRAPH_BATCH_LIMIT = 20
+    # 分页查询每页邮件数
+    GRAPH_PAGE_SIZE = 100
+    # 增量查询的邮件文件夹
+    DELTA_FOLDER = "inbox"
+    # 访问令牌在过期前多少秒主动刷新
+    TOKEN_REFRESH_MARGIN = 300
+
     # SMTP配置
     SMTP_SERVER = "smtp-mail.outlook.com"
     SMTP_PORT = 587
@@ -57,7 +76,10 @@ class OutlookClient(EmailClientBase):
         client_id: Optional[str] = None,
         client_secret: Optional[str] = None,
         tenant_id: Optional[str] = None,
-        smtp_password: Optional[str] = None
+        smtp_password: Optional[str] = None,
+        message_store: Optional[MessageStore] = None,
+        delta_state: Optional[GraphDeltaState] = None,
+        token_cache_file: Optional[Union[str, Path]] = None
     ):
         """
         初始化Outlook客户端
@@ -68,6 +90,9 @@ class OutlookClient(EmailClientBase):
             client_secret: Azure应用客户端密钥 (用于Graph API读取)
             tenant_id: Azure租户ID (用于Graph API读取)
             smtp_password: SMTP应用专用密码 (用于发送邮件)
+            message_store: 本地邮件存储，已保存的邮件不再重复下载正文
+            delta_state: 增量查询状态存储，提供时使用delta查询只获取上次运行后变化的邮件
+            token_cache_file: MSAL令牌缓存文件，提供时令牌在进程重启后仍可复用（默认只缓存在内存中）
         """
         super().__init__()
 
@@ -84,35 +109,102 @@ class OutlookClient(EmailClientBase):
         self.tenant_id = tenant_id or ConfigManager.get_required_env('OUTLOOK_TENANT_ID')
         self.smtp_password = smtp_password or ConfigManager.get_required_env('OUTLOOK_SMTP_PASSWORD')
 
-        # Graph API认证
+        # SMTP会话（多次发送复用同一个已登录的连接）
+        self.smtp_session = SMTPSession(
+            self.SMTP_SERVER,
+            self.SMTP_PORT,
+            self.email_address,
+            self.smtp_password
+        )
+
+        # Graph API认证（MSAL应用和令牌缓存在客户端生命周期内复用）
         self.app = None
         self.access_token = None
+        self.token_expires_at = 0.0
+        self.token_cache_file = Path(token_cache_file) if token_cache_file else None
+        self.token_cache = SerializableTokenCache()
+        self._load_token_cache()
+
+        # 本地邮件存储
+        self.message_store = message_store
+
+        # 增量查询状态（None表示每次完整查询）
+        self.delta_state = delta_state
+
+        # HTTP会话（复用TCP/TLS连接）
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
 
         # 日志配置
         self.logger = logging.getLogger(__name__)
 
+    def _load_token_cache(self) -> None:
+        """从文件加载MSAL令牌缓存（文件不存在或损坏时使用空缓存）"""
+        if not self.token_cache_file or not self.token_cache_file.exists():
+            return
+        try:
+            self.token_cache.deserialize(self.token_cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            self.logger.warning("加载令牌缓存失败，将重新认证: %s", str(e))
+
+    def _save_token_cache(self) -> None:
+        """令牌缓存有变化时原子写入文件（仅当前用户可读写）"""
+        if not self.token_cache_file or not self.token_cache.has_state_changed:
+            return
+        try:
+            self.token_cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.token_cache_file.with_suffix(self.token_cache_file.suffix + ".tmp")
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.token_cache.serialize())
+            os.replace(tmp_file, self.token_cache_file)
+            self.token_cache.has_state_changed = False
+        except OSError as e:
+            self.logger.warning("保存令牌缓存失败: %s", str(e))
+
+    def _token_valid(self) -> bool:
+        """当前访问令牌是否可用（距过期超过刷新提前量）"""
+        return bool(self.access_token) and time.time() < self.token_expires_at - self.TOKEN_REFRESH_MARGIN
+
     def connect(self) -> bool:
         """
         连接到Outlook (获取访问令牌)
 
+        令牌未接近过期时直接复用；否则先从MSAL令牌缓存获取，缓存中没有可用令牌时才向服务器认证
+
         Returns:
             是否连接成功
         """
+        if self._token_valid():
+            return True
+
         try:
-            # 创建MSAL应用
-            authority = self.AUTHORITY.format(tenant_id=self.tenant_id)
-            self.app = ConfidentialClientApplication(
-                self.client_id,
-                authority=authority,
-                client_credential=self.client_secret
-            )
+            # 创建MSAL应用（只创建一次，令牌缓存随应用复用）
+            if self.app is None:
+                authority = self.AUTHORITY.format(tenant_id=self.tenant_id)
+                self.app = ConfidentialClientApplication(
+                    self.client_id,
+                    authority=authority,
+                    client_credential=self.client_secret,
+                    token_cache=self.token_cache
+                )
 
-            # 获取访问令牌
+            # 获取访问令牌（MSAL优先返回缓存中未过期的令牌）
             result = self.app.acquire_token_for_client(scopes=self.SCOPE)
 
             if "access_token" in result:
                 self.access_token = result["access_token"]
-                self.logger.info("成功连接到Outlook Graph API")
+                self.token_expires_at = time.time() + int(result.get("expires_in", 0))
+                self._save_token_cache()
+
+                if result.get("token_source") == "cache":
+                    self.logger.debug("使用缓存的Graph API访问令牌")
+                else:
+                    self.logger.info("成功连接到Outlook Graph API")
+
+                # 缓存中的令牌已接近过期时强制刷新
+                if not self._token_valid():
+                    return self._refresh_token()
                 return True
             else:
                 error_msg = result.get("error_description", "未知错误")
@@ -125,11 +217,38 @@ class OutlookClient(EmailClientBase):
             self.logger.error("连接Outlook失败: %s", str(e))
             raise EmailConnectionError(f"连接失败: {str(e)}") from e
 
+    def _refresh_token(self) -> bool:
+        """
+        跳过缓存，从服务器获取新的访问令牌
+
+        Returns:
+            是否获取成功
+        """
+        self.logger.info("访问令牌即将过期，正在刷新...")
+        # search()返回缓存的实时视图，先复制为列表再删除
+        for token_item in list(self.token_cache.search(SerializableTokenCache.CredentialType.ACCESS_TOKEN)):
+            self.token_cache.remove_at(token_item)
+
+        result = self.app.acquire_token_for_client(scopes=self.SCOPE)
+        if "access_token" not in result:
+            error_msg = result.get("error_description", "未知错误")
+            raise EmailAuthError(f"认证失败: {error_msg}")
+
+        self.access_token = result["access_token"]
+        self.token_expires_at = time.time() + int(result.get("expires_in", 0))
+        self._save_token_cache()
+        return True
+
     def disconnect(self) -> None:
-        """断开连接（清除令牌）"""
-        self.access_token = None
-        self.app = None
-        self.logger.info("已断开Outlook连接")
+        """断开连接（访问令牌和MSAL应用保留，下次连接时复用）"""
+        self.logger.debug("已断开Outlook连接")
+
+    def close(self) -> None:
+        """断开连接，关闭HTTP会话和SMTP会话"""
+        self.disconnect()
+        self._save_token_cache()
+        self.session.close()
+        self.smtp_session.close()
 
     @staticmethod
     def _escape_odata_string(value: str) -> str:
@@ -203,7 +322,7 @@ class OutlookClient(EmailClientBase):
         Returns:
             邮件结果
         """
-        if not self.access_token:
+        if not self._token_valid():
             self.connect()
 
         try:
@@ -226,24 +345,19 @@ class OutlookClient(EmailClientBase):
                 filters.append(f"from/emailAddress/address eq '{escaped_sender}'")
                 self.logger.debug("添加发件人过滤器: %s", escaped_sender)
             
+            date_filter = None
             if since_date:
                 # 转换为UTC时间并格式化为ISO 8601
                 utc_date = since_date.astimezone(timezone.utc)
                 date_str = utc_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-                filters.append(f"receivedDateTime ge {date_str}")
+                date_filter = f"receivedDateTime ge {date_str}"
+                filters.append(date_filter)
                 self.logger.debug("添加时间过滤器: %s", date_str)
 
-            # 构建查询参数
-            params = {
-                "$orderby": "receivedDateTime desc",
-                "$select": "subject,from,toRecipients,body,receivedDateTime,id,hasAttachments,isRead"
-            }
-
-            if filters:
-                params["$filter"] = " and ".join(filters)
-
-            if limit:
-                params["$top"] = limit
+            # 构建查询参数（启用本地存储时先不获取正文）
+            select_fields = self.SUMMARY_FIELDS
+            if self.message_store is None:
+                select_fields += ",body"
 
             # 发送请求
             headers = {
@@ -251,24 +365,67 @@ class OutlookClient(EmailClientBase):
                 "Content-Type": "application/json"
             }
 
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-
-            if response.status_code == 200:
-                data = response.json()
-                messages = self._parse_messages(data.get("value", []))
-                
-                self.logger.info("成功获取 %d 封邮件", len(messages))
-                
-                return EmailResult(
-                    success=True,
-                    messages=messages,
-                    metadata={"total_count": len(messages)}
-                )
+            metadata = {}
+            if self.delta_state is not None:
+                # 增量查询只支持按接收时间过滤，主题和发件人在本地过滤；
+                # 重放deltaLink时会返回所有有变化的邮件（包括被标记已读或移动的旧邮件），接收时间也要在本地过滤
+                raw_messages, delta_link = self._fetch_delta(select_fields, date_filter, headers)
+                raw_messages = [
+                    raw_msg for raw_msg in raw_messages
+                    if self._received_since(raw_msg, since_date) and self._matches_filter(
+                        raw_msg.get("subject", ""),
+                        raw_msg.get("from", {}).get("emailAddress", {}).get("address", ""),
+                        subject,
+                        sender
+                    )
+                ]
             else:
-                error_msg = f"API请求失败: {response.status_code} - {response.text}"
-                self.logger.error(error_msg)
-                return EmailResult(success=False, error=error_msg)
+                params = {
+                    "$orderby": "receivedDateTime desc",
+                    "$select": select_fields,
+                    "$top": min(limit, self.GRAPH_PAGE_SIZE) if limit else self.GRAPH_PAGE_SIZE
+                }
+
+                if filters:
+                    params["$filter"] = " and ".join(filters)
+
+                raw_messages = []
+                for page in self._iter_pages(url, headers, params):
+                    raw_messages.extend(page.get("value", []))
+                    if limit and len(raw_messages) >= limit:
+                        raw_messages = raw_messages[:limit]
+                        break
+
+            if self.message_store is not None:
+                messages = self._load_messages_with_store(raw_messages, headers)
+            else:
+                messages = self._parse_messages(raw_messages)
+
+            if self.delta_state is not None:
+                if self.message_store is not None:
+                    # 合并之前运行已保存的、时间窗口内的邮件
+                    messages = self._merge_stored_messages(messages, since_date, subject, sender)
+                messages.sort(key=lambda msg: msg.received_time, reverse=True)
+                if limit:
+                    messages = messages[:limit]
+
+                # deltaLink由调用方处理完邮件后通过commit_sync_state保存，处理失败时下次运行会重新获取
+                metadata["incremental"] = True
+                metadata["sync_state"] = {"key": self._delta_key(), "delta_link": delta_link}
+
+            self.logger.info("成功获取 %d 封邮件", len(messages))
+
+            metadata["total_count"] = len(messages)
+            return EmailResult(
+                success=True,
+                messages=messages,
+                metadata=metadata
+            )
 
+        except OutlookAPIError as e:
+            error_msg = str(e)
+            self.logger.error(error_msg)
+            return EmailResult(success=False, error=error_msg)
         except ValueError as e:
             # 捕获输入验证错误
             error_msg = f"输入验证失败: {str(e)}"
@@ -279,6 +436,289 @@ class OutlookClient(EmailClientBase):
             self.logger.error(error_msg)
             return EmailResult(success=False, error=error_msg)
 
+    @staticmethod
+    def _received_since(raw_msg: dict, since_date: Optional[datetime]) -> bool:
+        """
+        检查Graph邮件的接收时间是否不早于起始时间
+
+        Args:
+            raw_msg: Graph API返回的邮件数据
+            since_date: 起始时间，为None时不过滤
+
+        Returns:
+            是否在时间范围内（接收时间无法解析时保留，由解析步骤处理）
+        """
+        if since_date is None:
+            return True
+        try:
+            received_time = datetime.fromisoformat(raw_msg.get("receivedDateTime", "").replace('Z', '+00:00'))
+        except ValueError:
+            return True
+        return received_time >= since_date.astimezone(timezone.utc)
+
+    def commit_sync_state(self, result: EmailResult) -> None:
+        """
+        保存获取结果中的deltaLink（邮件处理完成后调用）
+
+        Args:
+            result: fetch_emails返回的结果
+        """
+        state = result.metadata.get("sync_state") if result.success else None
+        if self.delta_state is None or not state:
+            return
+        self.delta_state.update(state["key"], state["delta_link"])
+        self.logger.debug("已保存deltaLink: %s", state["key"])
+
+    def _iter_pages(self, url: str, headers: dict, params: Optional[dict] = None) -> Iterator[dict]:
+        """
+        按@odata.nextLink逐页获取查询结果
+
+        Args:
+            url: 第一页的请求地址
+            headers: 请求头
+            params: 第一页的查询参数（nextLink中已包含查询参数）
+
+        Yields:
+            每一页的响应数据
+
+        Raises:
+            GraphDeltaExpiredError: 增量查询令牌已失效
+            OutlookAPIError: 请求失败
+        """
+        next_url = url
+        while next_url:
+            response = self.session.get(next_url, headers=headers, params=params, timeout=30)
+
+            if response.status_code == 410:
+                raise GraphDeltaExpiredError(f"增量查询令牌已失效: {response.text}")
+            if response.status_code != 200:
+                raise OutlookAPIError(f"API请求失败: {response.status_code} - {response.text}")
+
+            page = response.json()
+            yield page
+
+            next_url = page.get("@odata.nextLink")
+            params = None
+
+    def _delta_key(self) -> str:
+        """获取增量查询状态键"""
+        return GraphDeltaState.folder_key(self.email_address, self.DELTA_FOLDER)
+
+    def _fetch_delta(
+        self,
+        select_fields: str,
+        date_filter: Optional[str],
+        headers: dict
+    ) -> Tuple[List[dict], str]:
+        """
+        使用delta查询获取上次运行后新增或变化的邮件
+
+        没有保存的deltaLink或deltaLink已失效时执行完整同步
+
+        Args:
+            select_fields: 查询字段
+            date_filter: 接收时间过滤条件（仅完整同步时使用）
+            headers: 请求头
+
+        Returns:
+            (邮件列表, 新的deltaLink)
+        """
+        # delta查询不支持$top，通过Prefer头控制每页数量
+        headers = dict(headers, Prefer=f"odata.maxpagesize={self.GRAPH_PAGE_SIZE}")
+
+        delta_link = self.delta_state.get(self._delta_key())
+        if delta_link:
+            try:
+                return self._collect_delta_pages(delta_link, headers, None)
+            except GraphDeltaExpiredError as e:
+                self.logger.warning("%s，执行完整同步", str(e))
+                self.delta_state.reset(self._delta_key())
+
+        url = (
+            f"{self.GRAPH_API_ENDPOINT}/users/{self.email_address}"
+            f"/mailFolders/{self.DELTA_FOLDER}/messages/delta"
+        )
+        params = {"$select": select_fields}
+        if date_filter:
+            params["$filter"] = date_filter
+        return self._collect_delta_pages(url, headers, params)
+
+    def _collect_delta_pages(
+        self,
+        url: str,
+        headers: dict,
+        params: Optional[dict]
+    ) -> Tuple[List[dict], str]:
+        """
+        获取delta查询的所有页面，直到返回@odata.deltaLink
+
+        Args:
+            url: 请求地址（初始delta地址或保存的deltaLink）
+            headers: 请求头
+            params: 查询参数
+
+        Returns:
+            (邮件列表（不含已删除的邮件）, 新的deltaLink)
+        """
+        raw_messages = []
+        delta_link = None
+
+        for page in self._iter_pages(url, headers, params):
+            for raw_msg in page.get("value", []):
+                # 已删除或移出文件夹的邮件
+                if "@removed" in raw_msg:
+                    continue
+                raw_messages.append(raw_msg)
+            delta_link = page.get("@odata.deltaLink", delta_link)
+
+        if not delta_link:
+            raise OutlookAPIError("增量查询未返回deltaLink")
+
+        return raw_messages, delta_link
+
+    @staticmethod
+    def _matches_filter(
+        subject: str,
+        sender: str,
+        filter_subject: Optional[str],
+        filter_sender: Optional[str]
+    ) -> bool:
+        """本地检查主题和发件人是否完全匹配（与Graph的eq过滤一致，不区分大小写）"""
+        if filter_subject and (subject or "").lower() != filter_subject.lower():
+            return False
+        if filter_sender and (sender or "").lower() != filter_sender.lower():
+            return False
+        return True
+
+    def _merge_stored_messages(
+        self,
+        messages: List[EmailMessage],
+        since_date: Optional[datetime],
+        filter_subject: Optional[str],
+        filter_sender: Optional[str]
+    ) -> List[EmailMessage]:
+        """
+        合并本地存储中时间窗口内的邮件
+
+        Args:
+            messages: 本次增量查询得到的邮件
+            since_date: 起始时间过滤
+            filter_subject: 主题过滤
+            filter_sender: 发件人过滤
+
+        Returns:
+            合并后的邮件列表
+        """
+        seen = {msg.message_id for msg in messages}
+        merged = list(messages)
+
+        for _, stored_msg in self.message_store.iter_messages(source=self._message_source(), since=since_date):
+            if stored_msg.message_id in seen:
+                continue
+            if not self._matches_filter(stored_msg.subject, stored_msg.sender, filter_subject, filter_sender):
+                continue
+            seen.add(stored_msg.message_id)
+            merged.append(stored_msg)
+
+        return merged
+
+    def _store_key(self, graph_id: Optional[str]) -> Optional[str]:
+        """生成本地邮件存储键"""
+        if not graph_id:
+            return None
+        return f"{self._message_source()}/{graph_id}"
+
+    def _message_source(self) -> str:
+        """获取本地邮件存储中的来源标识"""
+        return f"{self.email_address}@graph"
+
+    def _load_messages_with_store(self, raw_messages: List[dict], headers: dict) -> List[EmailMessage]:
+        """
+        结合本地邮件存储加载邮件，只为本地没有的邮件下载正文
+
+        Args:
+            raw_messages: 不含正文的邮件列表
+            headers: 请求头
+
+        Returns:
+            邮件消息列表（保持原有顺序）
+        """
+        missing_ids = [
+            raw_msg["id"] for raw_msg in raw_messages
+            if raw_msg.get("id") and self._store_key(raw_msg["id"]) not in self.message_store
+        ]
+        bodies = self._fetch_bodies(missing_ids, headers) if missing_ids else {}
+
+        if len(raw_messages) > len(missing_ids):
+            self.logger.info("从本地邮件存储读取 %d 封邮件", len(raw_messages) - len(missing_ids))
+
+        messages = []
+        for raw_msg in raw_messages:
+            store_key = self._store_key(raw_msg.get("id"))
+            stored_msg = self.message_store.get_message(store_key) if store_key else None
+            if stored_msg:
+                messages.append(stored_msg)
+                continue
+
+            if raw_msg.get("id") not in bodies:
+                self.logger.warning("获取邮件正文失败: %s", raw_msg.get("id"))
+                continue
+
+            full_msg = dict(raw_msg, body=bodies[raw_msg["id"]])
+            parsed = self._parse_messages([full_msg])
+            if not parsed:
+                continue
+
+            messages.append(parsed[0])
+            try:
+                raw_bytes = json.dumps(full_msg, ensure_ascii=False).encode('utf-8')
+                self.message_store.put(store_key, raw_bytes, parsed[0], source=self._message_source())
+            except OSError as e:
+                self.logger.warning("保存邮件到本地存储失败: %s", str(e))
+
+        return messages
+
+    def _fetch_bodies(self, message_ids: List[str], headers: dict) -> Dict[str, dict]:
+        """
+        通过JSON批量请求获取邮件正文（每次最多20封）
+
+        Args:
+            message_ids: Graph邮件ID列表
+            headers: 请求头
+
+        Returns:
+            邮件ID到正文对象的映射
+        """
+        bodies = {}
+        for start in range(0, len(message_ids), self.GRAPH_BATCH_LIMIT):
+            chunk = message_ids[start:start + self.GRAPH_BATCH_LIMIT]
+            batch_request = {
+                "requests": [
+                    {
+                        "id": str(index),
+                        "method": "GET",
+                        "url": f"/users/{self.email_address}/messages/{quote(msg_id, safe='')}?$select=body"
+                    }
+                    for index, msg_id in enumerate(chunk)
+                ]
+            }
+
+            response = self.session.post(
+                f"{self.GRAPH_API_ENDPOINT}/$batch",
+                headers=headers,
+                json=batch_request,
+                timeout=30
+            )
+            if response.status_code != 200:
+                self.logger.warning("批量获取邮件正文失败: %d - %s", response.status_code, response.text)
+                continue
+
+            for item in response.json().get("responses", []):
+                if item.get("status") == 200:
+                    bodies[chunk[int(item["id"])]] = item.get("body", {}).get("body", {})
+
+        return bodies
+
     def send_email(
         self,
         to: List[str],
@@ -301,43 +741,20 @@ class OutlookClient(EmailClientBase):
             是否发送成功
         """
         max_retries = 3
-        
+        msg = build_message(self.email_address, to, subject, body, cc)
+        recipients = to + (cc or []) + (bcc or [])
+
         for attempt in range(max_retries):
             try:
-                # 创建邮件
-                msg = MIMEMultipart()
-                msg['From'] = self.email_address
-                msg['To'] = ', '.join(to)
-                msg['Subject'] = subject
-
-                if cc:
-                    msg['Cc'] = ', '.join(cc)
-
-                # 添加正文
-                msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-                # 连接SMTP服务器
-                with smtplib.SMTP(self.SMTP_SERVER, self.SMTP_PORT, timeout=30) as server:
-                    server.ehlo()
-                    server.starttls()
-                    server.ehlo()
-                    
-                    # 登录
-                    server.login(self.email_address, self.smtp_password)
-
-                    # 发送邮件
-                    recipients = to + (cc or []) + (bcc or [])
-                    server.send_message(msg, to_addrs=recipients)
-
+                self.smtp_session.send_message(msg, recipients)
                 self.logger.info("成功发送邮件到 %s", ', '.join(to))
                 return True
 
-            except smtplib.SMTPAuthenticationError as e:
-                error_msg = f"SMTP认证失败: {str(e)}"
-                self.logger.error(error_msg)
-                raise EmailAuthError(error_msg) from e
+            except EmailAuthError as e:
+                self.logger.error(str(e))
+                raise
 
-            except smtplib.SMTPException as e:
+            except (smtplib.SMTPException, EmailConnectionError, OSError) as e:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt
                     self.logger.warning("SMTP发送失败，%d秒后重试: %s", wait_time, str(e))
@@ -364,45 +781,64 @@ class OutlookClient(EmailClientBase):
         Returns:
             解析后的邮件消息列表
         """
-        messages = []
+        return parse_graph_messages(raw_messages, self.logger)
 
-        for raw_msg in raw_messages:
-            try:
-                # 解析发件人
-                sender = raw_msg.get("from", {}).get("emailAddress", {}).get("address", "")
 
-                # 解析收件人
-                recipients = [
-                    recipient.get("emailAddress", {}).get("address", "")
-                    for recipient in raw_msg.get("toRecipients", [])
-                ]
+def parse_graph_messages(raw_messages: List[dict], logger: Optional[logging.Logger] = None) -> List[EmailMessage]:
+    """
+    解析Graph API返回的邮件数据（同步和异步Outlook客户端共用）
 
-                # 解析接收时间
-                received_time_str = raw_msg.get("receivedDateTime", "")
-                received_time = datetime.fromisoformat(received_time_str.replace('Z', '+00:00'))
-
-                # 解析邮件正文（获取纯文本内容）
-                body_data = raw_msg.get("body", {})
-                body = body_data.get("content", "")
-
-                # 创建EmailMessage对象
-                message = EmailMessage(
-                    subject=raw_msg.get("subject", ""),
-                    sender=sender,
-                    recipients=recipients,
-                    body=body,
-                    received_time=received_time,
-                    message_id=raw_msg.get("id"),
-                    has_attachments=raw_msg.get("hasAttachments", False),
-                    is_read=raw_msg.get("isRead", False)
-                )
+    Args:
+        raw_messages: 原始邮件数据
+        logger: 记录解析失败的日志器（默认使用本模块的日志器）
 
-                messages.append(message)
+    Returns:
+        解析后的邮件消息列表，无法解析的邮件会被跳过
+    """
+    logger = logger or logging.getLogger(__name__)
+    messages = []
 
-            except Exception as e:
-                self.logger.warning("解析邮件失败: %s", str(e))
-                continue
+    for raw_msg in raw_messages:
+        try:
+            # 解析发件人
+            sender = raw_msg.get("from", {}).get("emailAddress", {}).get("address", "")
+
+            # 解析收件人
+            recipients = [
+                recipient.get("emailAddress", {}).get("address", "")
+                for recipient in raw_msg.get("toRecipients", [])
+            ]
+
+            # 解析接收时间
+            received_time_str = raw_msg.get("receivedDateTime", "")
+            received_time = datetime.fromisoformat(received_time_str.replace('Z', '+00:00'))
+
+            # 解析邮件正文（获取纯文本内容）
+            body_data = raw_msg.get("body", {})
+            body = body_data.get("content", "")
+
+            # 邮件头中的Message-ID（用于去重）
+            metadata = {}
+            if raw_msg.get("internetMessageId"):
+                metadata["internet_message_id"] = raw_msg["internetMessageId"]
+
+            # 创建EmailMessage对象
+            message = EmailMessage(
+                subject=raw_msg.get("subject", ""),
+                sender=sender,
+                recipients=recipients,
+                body=body,
+                received_time=received_time,
+                message_id=raw_msg.get("id"),
+                has_attachments=raw_msg.get("hasAttachments", False),
+                is_read=raw_msg.get("isRead", False),
+                metadata=metadata
+            )
 
-        return messages
+            messages.append(message)
 
+        except Exception as e:
+            logger.warning("解析邮件失败: %s", str(e))
+            continue
 
+    return messages
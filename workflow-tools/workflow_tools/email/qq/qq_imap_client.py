@@ -42,7 +42,8 @@ class QQIMAPClient(GenericIMAPClient):
         self,
         email_address: Optional[str] = None,
         password: Optional[str] = None,
-        use_ssl_for_smtp: bool = False
+        use_ssl_for_smtp: bool = False,
+        **kwargs
     ):
         """
         初始化QQ邮箱客户端
@@ -51,6 +52,7 @@ class QQIMAPClient(GenericIMAPClient):
             email_address: QQ邮箱地址（如: xxxxx@qq.com）
             password: QQ邮箱授权码（不是QQ密码！）
             use_ssl_for_smtp: SMTP是否使用SSL（True=465端口，False=587端口）
+            **kwargs: 传递给GenericIMAPClient的其他参数（如fetch_batch_size、sync_state）
         """
         # 根据SSL配置选择端口
         smtp_port = self.DEFAULT_SMTP_SSL_PORT if use_ssl_for_smtp else self.DEFAULT_SMTP_PORT
@@ -63,6 +65,7 @@ class QQIMAPClient(GenericIMAPClient):
             imap_port=self.DEFAULT_IMAP_PORT,
             smtp_server=self.DEFAULT_SMTP_SERVER,
             smtp_port=smtp_port,
-            use_ssl_for_smtp=use_ssl_for_smtp
+            use_ssl_for_smtp=use_ssl_for_smtp,
+            **kwargs
         )
 
@@ -2,14 +2,22 @@
 异常定义模块
 """
 
-from .ai_exceptions import AIClientError, GeminiAPIError, OpenAIAPIError
+from .ai_exceptions import AIClientError, GeminiAPIError, GeminiStreamError, OpenAIAPIError
 from .notes_exceptions import NotesClientError, NotionAPIError
 from .storage_exceptions import StorageClientError, R2StorageError, S3StorageError
-from .email_exceptions import EmailClientError, OutlookAPIError, SMTPError, EmailAuthError, EmailConnectionError
+from .email_exceptions import (
+    EmailClientError,
+    OutlookAPIError,
+    GraphDeltaExpiredError,
+    SMTPError,
+    EmailAuthError,
+    EmailConnectionError
+)
 
 __all__ = [
     "AIClientError",
     "GeminiAPIError",
+    "GeminiStreamError",
     "OpenAIAPIError",
     "NotesClientError",
     "NotionAPIError",
@@ -18,6 +26,7 @@ __all__ = [
     "S3StorageError",
     "EmailClientError",
     "OutlookAPIError",
+    "GraphDeltaExpiredError",
     "SMTPError",
     "EmailAuthError",
     "EmailConnectionError"
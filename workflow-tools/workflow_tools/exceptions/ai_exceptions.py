@@ -13,6 +13,14 @@ class GeminiAPIError(AIClientError):
     pass
 
 
+class GeminiStreamError(GeminiAPIError):
+    """Gemini流式生成中断异常（包含已经收到的部分内容，可用于续写）"""
+
+    def __init__(self, message: str, partial_content: str = ""):
+        super().__init__(message)
+        self.partial_content = partial_content
+
+
 class OpenAIAPIError(AIClientError):
     """OpenAI API异常"""
     pass
@@ -13,6 +13,11 @@ class OutlookAPIError(EmailClientError):
     pass
 
 
+class GraphDeltaExpiredError(OutlookAPIError):
+    """Graph增量查询令牌已失效（需要完整同步）"""
+    pass
+
+
 class SMTPError(EmailClientError):
     """SMTP发送异常"""
     pass
@@ -2,6 +2,6 @@
 存储客户端基类
 """
 
-from .storage_base import StorageClientBase, StorageResult
+from .storage_base import StorageClientBase, StorageResult, ProgressCallback
 
-__all__ = ["StorageClientBase", "StorageResult"]
\ No newline at end of file
+__all__ = ["StorageClientBase", "StorageResult", "ProgressCallback"]
\ No newline at end of file
@@ -5,7 +5,10 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Callable, Union
+
+# 进度回调类型定义（消息, 当前进度, 总数）
+ProgressCallback = Callable[[str, int, int], None]
 
 
 @dataclass
@@ -2,6 +2,7 @@
 Cloudflare R2存储客户端
 """
 
-from .r2_client import R2Client, R2Result
+from .r2_client import R2Client, R2Result, R2Object
+from .multipart_state import MultipartUploadState
 
-__all__ = ["R2Client", "R2Result"]
\ No newline at end of file
+__all__ = ["R2Client", "R2Result", "R2Object", "MultipartUploadState"]
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+R2分片上传状态存储
+记录未完成的分片上传（upload ID和分片大小），上传中断后再次上传同一文件时从已完成的分片继续
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from ...utils.json_state import JsonStateFile
+
+
+class MultipartUploadState:
+    """
+    基于JSON文件的分片上传状态存储
+
+    文件格式:
+        {
+            "bucket/archive/2024.zip": {
+                "upload_id": "...",
+                "part_size": 8388608,
+                "file_size": 4294967296,
+                "mtime_ns": 1700000000000000000,
+                "local_path": "/data/archive/2024.zip"
+            }
+        }
+
+    已完成的分片以服务器返回的列表（list_parts）为准，这里只保存续传所需的标识
+    """
+
+    def __init__(self, state_file: Union[str, Path] = ".cache/r2_multipart_uploads.json"):
+        """
+        初始化分片上传状态存储
+
+        Args:
+            state_file: 状态文件路径
+        """
+        self.state_file = Path(state_file)
+        self._state = JsonStateFile(self.state_file)
+
+    @staticmethod
+    def upload_key(bucket_name: str, object_name: str) -> str:
+        """
+        生成上传状态键
+
+        Args:
+            bucket_name: 存储桶名称
+            object_name: 远程对象名称
+
+        Returns:
+            状态键
+        """
+        return f"{bucket_name}/{object_name}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取未完成的上传
+
+        Args:
+            key: 上传状态键
+
+        Returns:
+            上传状态，不存在则返回None
+        """
+        return self._state.read().get(key)
+
+    def save(self, key: str, upload: Dict[str, Any]) -> None:
+        """
+        保存上传状态
+
+        Args:
+            key: 上传状态键
+            upload: 上传状态（upload_id、part_size、file_size、mtime_ns、local_path）
+        """
+        with self._state.modify() as data:
+            data[key] = upload
+
+    def remove(self, key: str) -> None:
+        """
+        删除上传状态（上传完成或放弃后）
+
+        Args:
+            key: 上传状态键
+        """
+        with self._state.modify() as data:
+            data.pop(key, None)
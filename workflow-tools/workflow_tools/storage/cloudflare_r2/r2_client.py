@@ -2,22 +2,38 @@
 Cloudflare R2存储客户端实现
 """
 
+import hashlib
 import logging
-from dataclasses import dataclass
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Sequence, Tuple, Iterator
 from urllib.parse import quote
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.client import Config
     from botocore.exceptions import ClientError, NoCredentialsError
 except ImportError:
     raise ImportError("请安装boto3: pip install boto3 botocore")
 
-from ..base.storage_base import StorageClientBase, StorageResult
+from ..base.storage_base import StorageClientBase, StorageResult, ProgressCallback
 from ...exceptions.storage_exceptions import R2StorageError
 from ...utils.config_manager import ConfigManager
+from ...utils.file_utils import get_file_hash
+from .multipart_state import MultipartUploadState
+
+MB = 1024 * 1024
+
+# S3/R2分片上传的最大分片数
+MAX_UPLOAD_PARTS = 10000
+
+# DeleteObjects每次请求的最大对象数
+DELETE_BATCH_SIZE = 1000
 
 
 @dataclass
@@ -26,6 +42,51 @@ class R2Result(StorageResult):
     raw_response: Optional[Any] = None
 
 
+@dataclass
+class R2Object:
+    """存储桶中的对象，使用分隔符列出时也可以是"目录"前缀（is_prefix为True）"""
+    key: str
+    size: int = 0
+    last_modified: Optional[datetime] = None
+    etag: Optional[str] = None
+    is_prefix: bool = False
+    client: Optional["R2Client"] = field(default=None, repr=False, compare=False)
+
+    def get_url(self, use_presigned: bool = True, expires_in: int = 3600) -> str:
+        """
+        获取对象访问URL（需要时才生成预签名URL）
+
+        Args:
+            use_presigned: 是否使用预签名URL
+            expires_in: 预签名URL过期时间（秒）
+
+        Returns:
+            对象访问URL
+        """
+        return self.client.get_file_url(self.key, use_presigned=use_presigned, expires_in=expires_in)
+
+    @property
+    def url(self) -> str:
+        """对象访问URL（默认1小时有效的预签名URL）"""
+        return self.get_url()
+
+
+class _TransferProgress:
+    """把boto3按字节增量的回调转换为(消息, 当前字节数, 总字节数)回调，可在多个线程中调用"""
+
+    def __init__(self, callback: ProgressCallback, message: str, total: int, transferred: int = 0):
+        self.callback = callback
+        self.message = message
+        self.total = total
+        self.transferred = transferred
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.transferred += bytes_amount
+            self.callback(self.message, self.transferred, self.total)
+
+
 class R2Client(StorageClientBase):
     """Cloudflare R2存储客户端"""
 
@@ -35,7 +96,11 @@ class R2Client(StorageClientBase):
         secret_access_key: Optional[str] = None,
         endpoint_url: Optional[str] = None,
         bucket_name: Optional[str] = None,
-        custom_domain: Optional[str] = None
+        custom_domain: Optional[str] = None,
+        multipart_threshold: Optional[int] = None,
+        multipart_chunksize: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        upload_state_file: Union[str, Path] = ".cache/r2_multipart_uploads.json"
     ):
         """
         初始化R2客户端
@@ -46,6 +111,11 @@ class R2Client(StorageClientBase):
             endpoint_url: R2端点URL
             bucket_name: 存储桶名称
             custom_domain: 自定义域名（用于公共访问）
+            multipart_threshold: 达到该字节数的文件使用分片传输，
+                如果为None则从环境变量R2_MULTIPART_THRESHOLD_MB获取（默认16MB）
+            multipart_chunksize: 分片大小（字节），如果为None则从环境变量R2_MULTIPART_CHUNKSIZE_MB获取（默认16MB）
+            max_concurrency: 并发传输的分片数，如果为None则从环境变量R2_MAX_CONCURRENCY获取（默认8）
+            upload_state_file: 未完成的分片上传状态文件（用于断点续传）
         """
         super().__init__()
 
@@ -57,6 +127,18 @@ class R2Client(StorageClientBase):
         self.bucket_name = bucket_name or config.get('r2_bucket_name')
         self.custom_domain = custom_domain
 
+        # 传输参数
+        self.multipart_threshold = multipart_threshold or config['r2_multipart_threshold_mb'] * MB
+        self.multipart_chunksize = multipart_chunksize or config['r2_multipart_chunksize_mb'] * MB
+        self.max_concurrency = max_concurrency or config['r2_max_concurrency']
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
+            use_threads=self.max_concurrency > 1
+        )
+        self.upload_state = MultipartUploadState(upload_state_file)
+
         if not all([self.access_key_id, self.secret_access_key, self.endpoint_url, self.bucket_name]):
             raise R2StorageError("R2配置不完整，请检查环境变量")
 
@@ -67,7 +149,8 @@ class R2Client(StorageClientBase):
                 endpoint_url=self.endpoint_url,
                 aws_access_key_id=self.access_key_id,
                 aws_secret_access_key=self.secret_access_key,
-                config=Config(signature_version='s3v4'),
+                # 连接池至少要容纳并发传输的分片数
+                config=Config(signature_version='s3v4', max_pool_connections=max(10, self.max_concurrency)),
                 region_name='auto'
             )
             self.logger = logging.getLogger(__name__)
@@ -79,15 +162,20 @@ class R2Client(StorageClientBase):
         self,
         file_path: Union[str, Path],
         object_name: Optional[str] = None,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[ProgressCallback] = None
     ) -> R2Result:
         """
         上传文件到R2
 
+        达到分片阈值的文件并发上传分片，上传ID保存在状态文件中，
+        中断后再次上传同一文件（大小和修改时间未变）时只上传剩余的分片
+
         Args:
             file_path: 本地文件路径
             object_name: 远程对象名称，如果为None则使用文件名
             metadata: 文件元数据
+            progress_callback: 进度回调函数（消息, 已上传字节数, 总字节数）
 
         Returns:
             上传结果
@@ -118,12 +206,24 @@ class R2Client(StorageClientBase):
             extra_args['ACL'] = 'public-read'
 
             # 上传文件
-            self.client.upload_file(
-                str(file_path),
-                self.bucket_name,
-                object_name,
-                ExtraArgs=extra_args
-            )
+            file_size = file_path.stat().st_size
+            if file_size >= self.multipart_threshold:
+                resumed_parts = self._resumable_multipart_upload(
+                    file_path, object_name, extra_args, progress_callback
+                )
+            else:
+                resumed_parts = 0
+                self.client.upload_file(
+                    str(file_path),
+                    self.bucket_name,
+                    object_name,
+                    ExtraArgs=extra_args,
+                    Config=self.transfer_config,
+                    Callback=(
+                        _TransferProgress(progress_callback, f"上传中: {object_name}", file_size)
+                        if progress_callback else None
+                    )
+                )
 
             # 生成访问URL（24小时有效期）
             file_url = self.get_file_url(object_name, use_presigned=True, expires_in=86400)
@@ -135,8 +235,9 @@ class R2Client(StorageClientBase):
                 metadata={
                     'bucket': self.bucket_name,
                     'object_name': object_name,
-                    'file_size': file_path.stat().st_size,
-                    'local_path': str(file_path)
+                    'file_size': file_size,
+                    'local_path': str(file_path),
+                    'resumed_parts': resumed_parts
                 }
             )
 
@@ -152,17 +253,145 @@ class R2Client(StorageClientBase):
             self.logger.error(error_msg)
             return R2Result(success=False, error=error_msg)
 
+    def _part_size(self, file_size: int) -> int:
+        """计算分片大小（不超过最大分片数）"""
+        return max(self.multipart_chunksize, math.ceil(file_size / MAX_UPLOAD_PARTS))
+
+    def _resumable_multipart_upload(
+        self,
+        file_path: Path,
+        object_name: str,
+        extra_args: Dict[str, Any],
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> int:
+        """
+        可续传的分片上传
+
+        Args:
+            file_path: 本地文件路径
+            object_name: 远程对象名称
+            extra_args: 对象参数（ContentType、ACL、Metadata）
+            progress_callback: 进度回调函数
+
+        Returns:
+            续传时复用的已完成分片数
+
+        Raises:
+            ClientError: 分片上传失败（状态保留，下次上传时续传）
+        """
+        stat = file_path.stat()
+        state_key = MultipartUploadState.upload_key(self.bucket_name, object_name)
+        upload = self.upload_state.get(state_key)
+        completed: Dict[int, Dict[str, Any]] = {}
+
+        if upload and (upload.get('file_size'), upload.get('mtime_ns')) != (stat.st_size, stat.st_mtime_ns):
+            # 文件已变化，放弃旧的上传
+            self.logger.info(f"文件已变化，重新开始分片上传: {object_name}")
+            self._abort_multipart_upload(object_name, upload['upload_id'])
+            self.upload_state.remove(state_key)
+            upload = None
+
+        if upload:
+            try:
+                completed = self._list_uploaded_parts(object_name, upload['upload_id'])
+                self.logger.info(f"续传分片上传: {object_name}，已完成 {len(completed)} 个分片")
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+                    raise
+                # 上传已过期或被清理，重新开始
+                self.upload_state.remove(state_key)
+                upload = None
+
+        if not upload:
+            response = self.client.create_multipart_upload(Bucket=self.bucket_name, Key=object_name, **extra_args)
+            upload = {
+                'upload_id': response['UploadId'],
+                'part_size': self._part_size(stat.st_size),
+                'file_size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'local_path': str(file_path)
+            }
+            self.upload_state.save(state_key, upload)
+
+        part_size = upload['part_size']
+        part_count = max(1, math.ceil(stat.st_size / part_size))
+        # R2要求除最后一个分片外所有分片大小相同，大小不符的分片重新上传
+        completed = {
+            number: part for number, part in completed.items()
+            if number <= part_count and part['Size'] == min(part_size, stat.st_size - (number - 1) * part_size)
+        }
+
+        progress = None
+        if progress_callback:
+            progress = _TransferProgress(
+                progress_callback, f"上传中: {object_name}", stat.st_size,
+                transferred=sum(part['Size'] for part in completed.values())
+            )
+
+        def upload_part(number: int) -> Dict[str, Any]:
+            offset = (number - 1) * part_size
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                body = f.read(part_size)
+            response = self.client.upload_part(
+                Bucket=self.bucket_name,
+                Key=object_name,
+                UploadId=upload['upload_id'],
+                PartNumber=number,
+                Body=body
+            )
+            if progress:
+                progress(len(body))
+            return {'PartNumber': number, 'ETag': response['ETag']}
+
+        pending = [number for number in range(1, part_count + 1) if number not in completed]
+        parts = [{'PartNumber': number, 'ETag': part['ETag']} for number, part in completed.items()]
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency), thread_name_prefix="r2-upload") as executor:
+            futures = [executor.submit(upload_part, number) for number in pending]
+            for future in as_completed(futures):
+                parts.append(future.result())
+
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=object_name,
+            UploadId=upload['upload_id'],
+            MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])}
+        )
+        self.upload_state.remove(state_key)
+        return len(completed)
+
+    def _list_uploaded_parts(self, object_name: str, upload_id: str) -> Dict[int, Dict[str, Any]]:
+        """获取服务器上已完成的分片: 分片号 -> {ETag, Size}"""
+        parts = {}
+        paginator = self.client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=self.bucket_name, Key=object_name, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts[part['PartNumber']] = {'ETag': part['ETag'], 'Size': part['Size']}
+        return parts
+
+    def _abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        """放弃未完成的分片上传（释放已上传分片占用的存储）"""
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=object_name, UploadId=upload_id)
+        except ClientError as e:
+            self.logger.warning(f"放弃分片上传失败: {object_name}: {str(e)}")
+
     def download_file(
         self,
         object_name: str,
-        local_path: Union[str, Path]
+        local_path: Union[str, Path],
+        progress_callback: Optional[ProgressCallback] = None
     ) -> R2Result:
         """
         从R2下载文件
 
+        达到分片阈值的文件按范围并发下载
+
         Args:
             object_name: 远程对象名称
             local_path: 本地保存路径
+            progress_callback: 进度回调函数（消息, 已下载字节数, 总字节数）
 
         Returns:
             下载结果
@@ -173,11 +402,18 @@ class R2Client(StorageClientBase):
             # 确保本地目录存在
             local_path.parent.mkdir(parents=True, exist_ok=True)
 
+            callback = None
+            if progress_callback:
+                total = self.client.head_object(Bucket=self.bucket_name, Key=object_name)['ContentLength']
+                callback = _TransferProgress(progress_callback, f"下载中: {object_name}", total)
+
             # 下载文件
             self.client.download_file(
                 self.bucket_name,
                 object_name,
-                str(local_path)
+                str(local_path),
+                Config=self.transfer_config,
+                Callback=callback
             )
 
             result = R2Result(
@@ -276,42 +512,95 @@ class R2Client(StorageClientBase):
         # 注意：实际的R2公共URL格式可能需要根据具体配置调整
         return f"{self.endpoint_url}/{self.bucket_name}/{encoded_object_name}"
 
-    def list_files(self, prefix: Optional[str] = None) -> R2Result:
+    def iter_files(
+        self,
+        prefix: Optional[str] = None,
+        delimiter: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[R2Object]:
+        """
+        逐个返回存储桶中的对象
+
+        按页懒加载（每次只保存一页），访问URL在调用R2Object.url时才生成
+
+        Args:
+            prefix: 文件名前缀过滤
+            delimiter: 分隔符（如"/"），指定时只列出prefix下一级的对象，
+                更深的对象按"目录"前缀返回（is_prefix为True）
+            page_size: 每页对象数（最多1000）
+
+        Yields:
+            存储桶中的对象或目录前缀
+
+        Raises:
+            ClientError: 列出对象失败
+        """
+        kwargs: Dict[str, Any] = {
+            'Bucket': self.bucket_name,
+            'PaginationConfig': {'PageSize': page_size}
+        }
+        if prefix:
+            kwargs['Prefix'] = prefix
+        if delimiter:
+            kwargs['Delimiter'] = delimiter
+
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(**kwargs):
+            for common_prefix in page.get('CommonPrefixes', []):
+                yield R2Object(key=common_prefix['Prefix'], is_prefix=True, client=self)
+            for obj in page.get('Contents', []):
+                yield R2Object(
+                    key=obj['Key'],
+                    size=obj['Size'],
+                    last_modified=obj.get('LastModified'),
+                    etag=obj.get('ETag', '').strip('"') or None,
+                    client=self
+                )
+
+    def list_files(
+        self,
+        prefix: Optional[str] = None,
+        delimiter: Optional[str] = None,
+        include_urls: bool = True
+    ) -> R2Result:
         """
         列出存储桶中的文件
 
+        大存储桶请使用iter_files逐个处理，避免一次读入全部列表
+
         Args:
             prefix: 文件名前缀过滤
+            delimiter: 分隔符（如"/"），指定时只列出prefix下一级的文件，子目录前缀放在metadata['prefixes']中
+            include_urls: 是否为每个文件生成访问URL（只需要名称和大小时设为False）
 
         Returns:
             文件列表结果
         """
         try:
-            kwargs = {'Bucket': self.bucket_name}
-            if prefix:
-                kwargs['Prefix'] = prefix
-
-            paginator = self.client.get_paginator('list_objects_v2')
-
             files = []
-            for page in paginator.paginate(**kwargs):
-                for obj in page.get('Contents', []):
-                    files.append({
-                        'key': obj['Key'],
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'],
-                        'url': self.get_file_url(obj['Key'])
-                    })
-
-            result = R2Result(
-                success=True,
-                metadata={
-                    'bucket': self.bucket_name,
-                    'prefix': prefix,
-                    'file_count': len(files),
-                    'files': files
+            prefixes = []
+            for obj in self.iter_files(prefix=prefix, delimiter=delimiter):
+                if obj.is_prefix:
+                    prefixes.append(obj.key)
+                    continue
+                file_info = {
+                    'key': obj.key,
+                    'size': obj.size,
+                    'last_modified': obj.last_modified
                 }
-            )
+                if include_urls:
+                    file_info['url'] = obj.url
+                files.append(file_info)
+
+            metadata = {
+                'bucket': self.bucket_name,
+                'prefix': prefix,
+                'file_count': len(files),
+                'files': files
+            }
+            if delimiter:
+                metadata['prefixes'] = prefixes
+            result = R2Result(success=True, metadata=metadata)
 
             self.logger.info(f"文件列表获取成功，共 {len(files)} 个文件")
             return result
@@ -343,6 +632,223 @@ class R2Client(StorageClientBase):
         except Exception:
             return False
 
+    def upload_many(
+        self,
+        files: Sequence[Union[str, Path, Tuple[Union[str, Path], str]]],
+        metadata: Optional[Dict[str, str]] = None,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> List[R2Result]:
+        """
+        并发上传多个文件
+
+        Args:
+            files: 本地文件路径列表，元素也可以是 (本地文件路径, 远程对象名称)
+            metadata: 所有文件共用的元数据
+            max_workers: 同时上传的文件数，如果为None则使用max_concurrency
+            progress_callback: 进度回调函数（消息, 已完成文件数, 文件总数）
+
+        Returns:
+            上传结果列表，顺序与files一致；单个文件失败不影响其他文件
+        """
+        items = [item if isinstance(item, tuple) else (item, None) for item in files]
+        results: List[Optional[R2Result]] = [None] * len(items)
+        if not items:
+            return []
+
+        completed = 0
+        progress_lock = threading.Lock()
+        workers = max(1, min(max_workers or self.max_concurrency, len(items)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="r2-upload-many") as executor:
+            futures = {
+                executor.submit(self.upload_file, file_path, object_name, metadata): index
+                for index, (file_path, object_name) in enumerate(items)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if progress_callback:
+                    with progress_lock:
+                        completed += 1
+                        progress_callback(f"上传完成: {Path(items[index][0]).name}", completed, len(items))
+
+        failed = sum(not result.success for result in results)
+        self.logger.info(f"批量上传完成: 成功 {len(items) - failed} 个，失败 {failed} 个")
+        return results
+
+    def delete_many(self, object_names: Sequence[str], max_workers: Optional[int] = None) -> R2Result:
+        """
+        批量删除文件（DeleteObjects，每次请求最多1000个对象）
+
+        Args:
+            object_names: 远程对象名称列表
+            max_workers: 同时发送的删除请求数，如果为None则使用max_concurrency
+
+        Returns:
+            删除结果，metadata包含deleted（已删除的对象）和errors（删除失败的对象和原因）
+        """
+        keys = list(dict.fromkeys(object_names))
+        batches = [keys[i:i + DELETE_BATCH_SIZE] for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+        deleted: List[str] = []
+        errors: List[Dict[str, str]] = []
+
+        def delete_batch(batch: List[str]) -> Tuple[List[str], List[Dict[str, str]]]:
+            try:
+                response = self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except Exception as e:
+                return [], [{'key': key, 'error': str(e)} for key in batch]
+            # Quiet模式只返回失败的对象
+            batch_errors = [
+                {'key': error['Key'], 'error': f"{error.get('Code')}: {error.get('Message')}"}
+                for error in response.get('Errors', [])
+            ]
+            failed_keys = {error['key'] for error in batch_errors}
+            return [key for key in batch if key not in failed_keys], batch_errors
+
+        if batches:
+            workers = max(1, min(max_workers or self.max_concurrency, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="r2-delete-many") as executor:
+                for batch_deleted, batch_errors in executor.map(delete_batch, batches):
+                    deleted.extend(batch_deleted)
+                    errors.extend(batch_errors)
+
+        self.logger.info(f"批量删除完成: 成功 {len(deleted)} 个，失败 {len(errors)} 个")
+        return R2Result(
+            success=not errors,
+            error=f"{len(errors)} 个对象删除失败" if errors else None,
+            metadata={
+                'bucket': self.bucket_name,
+                'operation': 'delete',
+                'deleted': deleted,
+                'errors': errors
+            }
+        )
+
+    def _list_object_etags(self, prefix: str) -> Dict[str, Dict[str, Any]]:
+        """列出前缀下的对象: 对象名称 -> {size, etag}（不生成访问URL）"""
+        return {obj.key: {'size': obj.size, 'etag': obj.etag or ''} for obj in self.iter_files(prefix=prefix)}
+
+    def _local_etag(self, file_path: Path, remote_etag: str) -> str:
+        """
+        按远程ETag的格式计算本地文件的ETag
+
+        单次上传的ETag是文件MD5；分片上传的ETag是各分片MD5拼接后的MD5加"-分片数"，
+        分片大小与upload_file使用的一致
+
+        Args:
+            file_path: 本地文件路径
+            remote_etag: 远程对象的ETag（不含引号）
+
+        Returns:
+            本地文件的ETag
+        """
+        if '-' not in remote_etag:
+            return get_file_hash(file_path, algorithm="md5")
+
+        part_size = self._part_size(file_path.stat().st_size)
+        part_digests = []
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(part_size)
+                if not chunk:
+                    break
+                part_digests.append(hashlib.md5(chunk).digest())
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+    def sync_directory(
+        self,
+        local_dir: Union[str, Path],
+        prefix: str = "",
+        delete_removed: bool = False,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> R2Result:
+        """
+        把本地目录同步到存储桶
+
+        按文件大小和ETag与存储桶中的对象比较，只上传新增或变化的文件
+
+        Args:
+            local_dir: 本地目录
+            prefix: 远程对象名称前缀（如"history/"）
+            delete_removed: 是否删除本地已不存在的远程对象
+            max_workers: 同时上传的文件数，如果为None则使用max_concurrency
+            progress_callback: 进度回调函数（消息, 已上传文件数, 需要上传的文件数）
+
+        Returns:
+            同步结果，metadata包含uploaded、skipped、deleted和failed
+        """
+        local_dir = Path(local_dir)
+        if not local_dir.is_dir():
+            return R2Result(success=False, error=f"目录不存在: {local_dir}")
+        if prefix and not prefix.endswith('/'):
+            prefix += '/'
+
+        try:
+            remote_objects = self._list_object_etags(prefix)
+
+            local_files: Dict[str, Path] = {}
+            for file_path in sorted(local_dir.rglob('*')):
+                if file_path.is_file():
+                    local_files[prefix + file_path.relative_to(local_dir).as_posix()] = file_path
+
+            to_upload = []
+            skipped = []
+            for object_name, file_path in local_files.items():
+                remote = remote_objects.get(object_name)
+                if (remote is not None and remote['size'] == file_path.stat().st_size
+                        and remote['etag'] == self._local_etag(file_path, remote['etag'])):
+                    skipped.append(object_name)
+                else:
+                    to_upload.append((file_path, object_name))
+
+            self.logger.info(
+                f"同步 {local_dir} -> {prefix or '/'}: 需要上传 {len(to_upload)} 个文件，"
+                f"{len(skipped)} 个文件未变化"
+            )
+            upload_results = self.upload_many(to_upload, max_workers=max_workers, progress_callback=progress_callback)
+            uploaded = [r.file_key for r in upload_results if r.success]
+            failed = [
+                {'key': object_name, 'error': r.error}
+                for (_, object_name), r in zip(to_upload, upload_results) if not r.success
+            ]
+
+            deleted: List[str] = []
+            if delete_removed:
+                removed = [name for name in remote_objects if name not in local_files]
+                if removed:
+                    delete_result = self.delete_many(removed, max_workers=max_workers)
+                    deleted = delete_result.metadata['deleted']
+                    failed.extend(delete_result.metadata['errors'])
+
+        except ClientError as e:
+            error_msg = f"同步目录失败: {str(e)}"
+            self.logger.error(error_msg)
+            return R2Result(success=False, error=error_msg)
+        except Exception as e:
+            error_msg = f"同步目录时发生未知错误: {str(e)}"
+            self.logger.error(error_msg)
+            return R2Result(success=False, error=error_msg)
+
+        self.logger.info(f"同步完成: 上传 {len(uploaded)} 个，跳过 {len(skipped)} 个，删除 {len(deleted)} 个，失败 {len(failed)} 个")
+        return R2Result(
+            success=not failed,
+            error=f"{len(failed)} 个文件同步失败" if failed else None,
+            metadata={
+                'bucket': self.bucket_name,
+                'prefix': prefix,
+                'local_dir': str(local_dir),
+                'uploaded': uploaded,
+                'skipped': skipped,
+                'deleted': deleted,
+                'failed': failed
+            }
+        )
+
     @staticmethod
     def validate_r2_config() -> 'R2ValidationResult':
         """
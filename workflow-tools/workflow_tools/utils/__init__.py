@@ -3,12 +3,22 @@
 """
 
 from .file_utils import sanitize_filename, get_file_hash
-from .cache_manager import CacheManager
+from .cache_manager import CacheManager, CacheStats
 from .config_manager import ConfigManager
+from .token_utils import estimate_tokens, split_by_token_budget, compress_text
+from .rate_limiter import RateLimiter, RetryPolicy
+from .json_state import JsonStateFile
 
 __all__ = [
     "sanitize_filename",
     "get_file_hash",
     "CacheManager",
-    "ConfigManager"
+    "CacheStats",
+    "ConfigManager",
+    "estimate_tokens",
+    "split_by_token_budget",
+    "compress_text",
+    "RateLimiter",
+    "RetryPolicy",
+    "JsonStateFile"
 ]
\ No newline at end of file
@@ -4,43 +4,334 @@
 
 import hashlib
 import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
 import time
+import weakref
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from .file_lock import file_lock
+from .serializers import Serializer, get_serializer
+
+T = TypeVar('T')
+
+# 旧版本缓存文件名（键的SHA-256哈希）
+_LEGACY_FILE_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# 支持的压缩算法
+COMPRESSIONS = ("zlib", "zstd")
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # 因超过容量上限被淘汰的条目数（内存层和磁盘层分别计数）
+    expirations: int = 0
+
+    @property
+    def hits(self) -> int:
+        """总命中次数"""
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（没有请求时为0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 
 class CacheManager:
-    """基于文件的缓存管理器"""
+    """
+    内存+磁盘两级缓存管理器
+
+    目录结构:
+        cache_dir/
+            index.sqlite            # 键哈希 -> 大小、编码、写入时间、最后访问时间
+            3f/3fa2...c1.cache      # 缓存值（按键哈希前两位分片存放）
+            locks/3fa2...c1.lock    # get_or_compute计算期间持有的键锁
+
+    内存层是有容量上限的LRU，命中时不访问磁盘（返回的对象被多次读取共享，调用方不应修改）；
+    磁盘层是否命中、是否过期只查询索引，不打开缓存文件，超过最大字节数或最大条目数时
+    按最近最少使用淘汰，后台线程定期清理过期条目。较大的值写入磁盘前可以压缩。
+    缓存文件先写临时文件再原子替换，读取方不会看到写了一半的文件；
+    get_or_compute按键加锁（线程锁+跨进程文件锁），同一个键并发未命中时只计算一次
+    """
+
+    INDEX_FILE = "index.sqlite"
+    LOCK_DIR = "locks"
 
-    def __init__(self, cache_dir: str = ".cache", ttl: int = 3600):
+    def __init__(
+        self,
+        cache_dir: str = ".cache",
+        ttl: int = 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_entries: int = 10000,
+        sweep_interval: float = 600,
+        memory_entries: int = 256,
+        serializer: Union[str, Serializer] = "json",
+        compression: Optional[str] = None,
+        compress_threshold: int = 4096
+    ):
         """
         初始化缓存管理器
 
         Args:
             cache_dir: 缓存目录
             ttl: 缓存生存时间（秒）
+            max_bytes: 缓存值总字节数上限（0表示不限制）
+            max_entries: 缓存条目数上限（0表示不限制）
+            sweep_interval: 后台清理过期条目的间隔（秒，0表示不启动后台清理）
+            memory_entries: 内存层条目数上限（0表示不使用内存层）
+            serializer: 序列化器名称（json、msgpack、pickle）或序列化器实例
+            compression: 磁盘层压缩算法（zlib、zstd，None表示不压缩）
+            compress_threshold: 序列化后达到该字节数才压缩
+
+        Raises:
+            ValueError: 未知的压缩算法
+            ImportError: 使用zstd压缩但未安装zstandard
         """
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"未知的压缩算法: {compression}，可选: {', '.join(COMPRESSIONS)}")
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise ImportError("请安装zstandard: pip install zstandard")
+
         self.cache_dir = Path(cache_dir)
         self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.serializer = get_serializer(serializer)
+        self.compression = compression
+        self.compress_threshold = compress_threshold
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def _get_cache_file(self, key: str) -> Path:
+        self._lock = threading.Lock()
+        # 内存层: 键哈希 -> (缓存值, 写入时间)，按访问顺序排列
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # 内存层命中的访问时间，写入或淘汰前批量更新到索引，避免每次命中都写磁盘
+        self._pending_access: Dict[str, float] = {}
+        # 键哈希 -> [线程锁, 等待和持有的线程数]
+        self._key_locks: Dict[str, list] = {}
+        self._stats = CacheStats()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / self.INDEX_FILE),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._init_index()
+        self._migrate_legacy_files()
+
+        self._stop_sweeper = threading.Event()
+        if sweep_interval > 0:
+            self._start_sweeper(sweep_interval)
+
+    def _init_index(self) -> None:
+        """创建索引表"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key_hash TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries (created_at)")
+            # 旧版本索引没有编码列
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+            for column in ("serializer", "codec"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+
+    def _start_sweeper(self, interval: float) -> None:
+        """启动后台清理线程（只持有弱引用，缓存管理器被回收后线程自动退出）"""
+        manager_ref = weakref.ref(self)
+        stop_event = self._stop_sweeper
+
+        def sweep() -> None:
+            while not stop_event.wait(interval):
+                manager = manager_ref()
+                if manager is None:
+                    return
+                try:
+                    manager.purge_expired()
+                except sqlite3.Error:
+                    pass
+                del manager
+
+        threading.Thread(target=sweep, name="cache-sweeper", daemon=True).start()
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
         """
-        获取缓存文件路径
-        
+        计算缓存键的哈希
+
         使用SHA-256哈希来安全地处理缓存键，防止路径遍历攻击
         """
-        # 计算key的SHA-256哈希
-        key_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()
-        
-        # 确保文件名安全且确定性
-        safe_filename = f"{key_hash}.json"
-        
-        return self.cache_dir / safe_filename
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _get_cache_file(self, key_hash: str) -> Path:
+        """获取缓存文件路径（按哈希前两位分片，避免单个目录文件过多）"""
+        return self.cache_dir / key_hash[:2] / f"{key_hash}.cache"
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        """检查条目是否过期"""
+        return now - created_at > self.ttl
+
+    def _remove_files(self, key_hashes: List[str]) -> None:
+        """删除缓存文件（文件不存在时忽略）"""
+        for key_hash in key_hashes:
+            try:
+                self._get_cache_file(key_hash).unlink()
+            except OSError:
+                pass
+
+    def _delete_entries(self, key_hashes: List[str]) -> None:
+        """删除索引条目和内存层条目（调用方需持有锁）"""
+        self._conn.executemany("DELETE FROM entries WHERE key_hash = ?", [(h,) for h in key_hashes])
+        for key_hash in key_hashes:
+            self._memory.pop(key_hash, None)
+            self._pending_access.pop(key_hash, None)
+
+    def _remember(self, key_hash: str, value: Any, created_at: float) -> None:
+        """放入内存层，超过上限时淘汰最久未使用的条目（调用方需持有锁）"""
+        if self.memory_entries <= 0:
+            return
+        self._memory[key_hash] = (value, created_at)
+        self._memory.move_to_end(key_hash)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _encode(self, value: Any) -> Tuple[bytes, str]:
+        """
+        序列化并按需压缩缓存值
+
+        Returns:
+            (写入磁盘的字节, 压缩算法名称，未压缩为空字符串)
+        """
+        payload = self.serializer.dumps(value)
+        if self.compression is None or len(payload) < self.compress_threshold:
+            return payload, ''
+
+        if self.compression == "zstd":
+            compressed = zstandard.ZstdCompressor().compress(payload)
+        else:
+            compressed = zlib.compress(payload)
+        # 压缩后没有变小（如已压缩的数据）时保存原始字节
+        if len(compressed) >= len(payload):
+            return payload, ''
+        return compressed, self.compression
+
+    def _decode(self, data: bytes, codec: str) -> Any:
+        """解压并反序列化缓存值"""
+        if codec == "zstd":
+            if not ZSTD_AVAILABLE:
+                raise ImportError("请安装zstandard: pip install zstandard")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        elif codec == "zlib":
+            data = zlib.decompress(data)
+        return self.serializer.loads(data)
+
+    def _migrate_legacy_files(self) -> None:
+        """将旧版本平铺在缓存目录下的缓存文件迁移到分片目录并写入索引"""
+        for legacy_file in self.cache_dir.glob("*.json"):
+            if not _LEGACY_FILE_PATTERN.match(legacy_file.stem):
+                continue
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                self._write_entry(legacy_file.stem, cache_data['value'], cache_data['timestamp'])
+            except (json.JSONDecodeError, KeyError, TypeError, OSError):
+                pass
+            try:
+                legacy_file.unlink()
+            except OSError:
+                pass
+
+    def _write_entry(self, key_hash: str, value: Any, created_at: float) -> None:
+        """写入缓存文件、索引条目和内存层，然后按上限淘汰"""
+        payload, codec = self._encode(value)
+        cache_file = self._get_cache_file(key_hash)
+        cache_file.parent.mkdir(exist_ok=True)
+
+        # 先写临时文件再原子替换，并发读取只会看到旧文件或完整的新文件
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, prefix=f".{key_hash[:16]}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key_hash, size, created_at, accessed_at, serializer, codec) VALUES (?, ?, ?, ?, ?, ?)",
+                (key_hash, len(payload), created_at, time.time(), self.serializer.name, codec)
+            )
+            evicted = self._evict()
+            self._remember(key_hash, value, created_at)
+        self._remove_files(evicted)
+
+    def _flush_access_times(self) -> None:
+        """把内存层命中的访问时间写入索引（调用方需持有锁）"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key_hash = ?",
+                [(accessed_at, key_hash) for key_hash, accessed_at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def _evict(self) -> List[str]:
+        """
+        按最近最少使用淘汰条目直到满足上限（调用方需持有锁）
+
+        Returns:
+            被淘汰条目的键哈希（调用方负责删除文件）
+        """
+        self._flush_access_times()
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        over_entries = count > self.max_entries > 0
+        over_bytes = total_bytes > self.max_bytes > 0
+        if not over_entries and not over_bytes:
+            return []
+
+        evicted = []
+        for key_hash, size in self._conn.execute("SELECT key_hash, size FROM entries ORDER BY accessed_at"):
+            if not count > self.max_entries > 0 and not total_bytes > self.max_bytes > 0:
+                break
+            evicted.append(key_hash)
+            count -= 1
+            total_bytes -= size
+        self._delete_entries(evicted)
+        self._stats.evictions += len(evicted)
+        return evicted
 
     def get(self, key: str) -> Optional[Any]:
         """
-        获取缓存值
+        获取缓存值（先查内存层，再查磁盘层）
 
         Args:
             key: 缓存键
@@ -48,28 +339,62 @@ class CacheManager:
         Returns:
             缓存值，如果不存在或过期则返回None
         """
-        cache_file = self._get_cache_file(key)
+        return self._get(key)
 
-        if not cache_file.exists():
-            return None
+    def _get(self, key: str, record_miss: bool = True) -> Optional[Any]:
+        """获取缓存值，record_miss为False时未命中不计入统计（用于加锁后的二次检查）"""
+        key_hash = self._hash_key(key)
+        now = time.time()
 
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
+        with self._lock:
+            memory_entry = self._memory.get(key_hash)
+            if memory_entry is not None and not self._is_expired(memory_entry[1], now):
+                self._memory.move_to_end(key_hash)
+                self._pending_access[key_hash] = now
+                self._stats.memory_hits += 1
+                return memory_entry[0]
 
-            # 检查是否过期
-            if time.time() - cache_data['timestamp'] > self.ttl:
-                cache_file.unlink()  # 删除过期缓存
+            row = self._conn.execute(
+                "SELECT created_at, serializer, codec FROM entries WHERE key_hash = ?", (key_hash,)
+            ).fetchone()
+            if row is None:
+                self._stats.misses += record_miss
                 return None
+            created_at, serializer_name, codec = row
+            if self._is_expired(created_at, now):
+                self._delete_entries([key_hash])
+                self._stats.misses += record_miss
+                self._stats.expirations += 1
+                expired = True
+            else:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key_hash = ?", (now, key_hash))
+                expired = False
 
-            return cache_data['value']
+        if expired:
+            self._remove_files([key_hash])
+            return None
 
-        except (json.JSONDecodeError, KeyError, OSError):
-            # 缓存文件损坏，删除它
-            if cache_file.exists():
-                cache_file.unlink()
+        try:
+            # 序列化器变化后旧条目无法读取，按未命中处理
+            if serializer_name != self.serializer.name:
+                raise ValueError(f"缓存条目使用的序列化器为{serializer_name}")
+            value = self._decode(self._get_cache_file(key_hash).read_bytes(), codec)
+        except Exception:
+            # 缓存文件丢失、损坏或无法解码，删除条目（期间已被重新写入的条目保留）
+            with self._lock:
+                discarded = self._conn.execute(
+                    "DELETE FROM entries WHERE key_hash = ? AND created_at = ?", (key_hash, created_at)
+                ).rowcount
+                self._stats.misses += record_miss
+            if discarded:
+                self._remove_files([key_hash])
             return None
 
+        with self._lock:
+            self._stats.disk_hits += 1
+            self._remember(key_hash, value, created_at)
+        return value
+
     def set(self, key: str, value: Any) -> None:
         """
         设置缓存值
@@ -78,28 +403,123 @@ class CacheManager:
             key: 缓存键
             value: 缓存值
         """
-        cache_file = self._get_cache_file(key)
-
-        cache_data = {
-            'timestamp': time.time(),
-            'value': value
-        }
-
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        except OSError as e:
+            self._write_entry(self._hash_key(key), value, time.time())
+        except (OSError, sqlite3.Error) as e:
             # 缓存写入失败，记录但不影响主流程
             print(f"警告：缓存写入失败: {e}")
 
+    @contextmanager
+    def _key_lock(self, key_hash: str) -> Iterator[None]:
+        """持有键锁：先获取本进程的线程锁，再获取跨进程的文件锁"""
+        with self._lock:
+            entry = self._key_locks.setdefault(key_hash, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                with file_lock(self.cache_dir / self.LOCK_DIR / f"{key_hash}.lock"):
+                    yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key_hash]
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        should_cache: Callable[[T], bool] = lambda value: value is not None
+    ) -> Tuple[T, bool]:
+        """
+        获取缓存值，未命中时计算并写入缓存
+
+        同一个键并发未命中时（包括其他进程），只有一个调用方执行compute，
+        其他调用方等待其完成后直接读取缓存；compute抛出异常时不写入缓存，
+        等待的调用方会自己重新计算
+
+        Args:
+            key: 缓存键
+            compute: 计算缓存值的函数
+            should_cache: 判断计算结果是否写入缓存（默认不缓存None）
+
+        Returns:
+            (缓存值, 是否来自缓存)
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._key_lock(self._hash_key(key)):
+            # 等待锁期间可能已有其他调用方写入
+            value = self._get(key, record_miss=False)
+            if value is not None:
+                return value, True
+
+            value = compute()
+            if should_cache(value):
+                self.set(key, value)
+            return value, False
+
+    def delete(self, key: str) -> None:
+        """
+        删除缓存值
+
+        Args:
+            key: 缓存键
+        """
+        key_hash = self._hash_key(key)
+        with self._lock:
+            self._delete_entries([key_hash])
+        self._remove_files([key_hash])
+
+    def purge_expired(self) -> int:
+        """
+        清理所有过期条目
+
+        Returns:
+            删除的条目数量
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT key_hash FROM entries WHERE created_at < ?", (cutoff,)
+            )]
+            self._delete_entries(expired)
+            self._stats.expirations += len(expired)
+        self._remove_files(expired)
+        return len(expired)
+
     def clear(self) -> None:
         """清除所有缓存"""
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                cache_file.unlink()
-            except OSError:
-                pass
+        with self._lock:
+            key_hashes = [row[0] for row in self._conn.execute("SELECT key_hash FROM entries")]
+            self._conn.execute("DELETE FROM entries")
+            self._memory.clear()
+            self._pending_access.clear()
+        self._remove_files(key_hashes)
+
+    def stats(self) -> CacheStats:
+        """
+        获取命中统计（本进程内累计）
+
+        Returns:
+            统计快照
+        """
+        with self._lock:
+            return CacheStats(**vars(self._stats))
 
     def exists(self, key: str) -> bool:
-        """检查缓存是否存在且未过期"""
-        return self.get(key) is not None
\ No newline at end of file
+        """检查缓存是否存在且未过期（只查询索引）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM entries WHERE key_hash = ?", (self._hash_key(key),)
+            ).fetchone()
+        return row is not None and not self._is_expired(row[0], time.time())
+
+    def close(self) -> None:
+        """停止后台清理线程并关闭索引连接"""
+        self._stop_sweeper.set()
+        with self._lock:
+            self._flush_access_times()
+            self._conn.close()
@@ -100,6 +100,9 @@ class ConfigManager:
             'r2_secret_access_key': cls.get_env('R2_SECRET_ACCESS_KEY'),
             'r2_endpoint': cls.get_env('R2_ENDPOINT'),
             'r2_bucket_name': cls.get_env('R2_BUCKET_NAME'),
+            'r2_multipart_threshold_mb': int(cls.get_env('R2_MULTIPART_THRESHOLD_MB', '16')),
+            'r2_multipart_chunksize_mb': int(cls.get_env('R2_MULTIPART_CHUNKSIZE_MB', '16')),
+            'r2_max_concurrency': int(cls.get_env('R2_MAX_CONCURRENCY', '8')),
             'aws_access_key_id': cls.get_env('AWS_ACCESS_KEY_ID'),
             'aws_secret_access_key': cls.get_env('AWS_SECRET_ACCESS_KEY'),
             'aws_region': cls.get_env('AWS_REGION', 'us-east-1'),
@@ -0,0 +1,89 @@
+"""
+跨进程文件锁
+基于操作系统的建议锁（POSIX flock / Windows msvcrt.locking），进程退出时自动释放
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    MSVCRT_AVAILABLE = False
+
+
+def _lock_fd(fd: int) -> None:
+    """阻塞直到获得文件描述符上的排他锁"""
+    if FCNTL_AVAILABLE:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    elif MSVCRT_AVAILABLE:
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK重试10次（约10秒）后失败，继续等待
+                time.sleep(0.1)
+
+
+def _unlock_fd(fd: int) -> None:
+    """释放文件描述符上的锁"""
+    if FCNTL_AVAILABLE:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif MSVCRT_AVAILABLE:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(lock_path: Union[str, Path], remove: bool = True) -> Iterator[None]:
+    """
+    获取跨进程的排他文件锁
+
+    两个系统都不支持时只在本进程内有效（调用方通常还持有线程锁）
+
+    Args:
+        lock_path: 锁文件路径（不存在时自动创建）
+        remove: 释放锁时是否删除锁文件（避免锁文件越积越多）
+    """
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+    while True:
+        fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _lock_fd(fd)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        # 等待期间锁文件可能已被持有者删除，此时锁住的是已删除的文件，需要重新打开
+        try:
+            if os.path.samestat(os.fstat(fd), os.stat(lock_path)):
+                break
+        except FileNotFoundError:
+            pass
+        _unlock_fd(fd)
+        os.close(fd)
+
+    try:
+        yield
+    finally:
+        if remove:
+            try:
+                # Windows不能删除已打开的文件，忽略失败
+                os.unlink(lock_path)
+            except OSError:
+                pass
+        _unlock_fd(fd)
+        os.close(fd)
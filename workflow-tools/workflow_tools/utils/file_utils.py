@@ -4,8 +4,28 @@
 
 import re
 import hashlib
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Union
+from typing import Any, Tuple, Union
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# 分块读取的块大小（大文件不整体读入内存）
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 缓存键使用的哈希算法（BLAKE2比MD5更快，摘要截断为16字节，与MD5长度相同）
+CACHE_KEY_HASH_ALGORITHM = "blake2b"
+
+# 文件哈希备忘录: (路径, inode, 大小, 修改时间, 算法) -> 哈希值，文件未变化时不重新计算
+HASH_MEMO_MAX_ENTRIES = 4096
+_hash_memo: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+_hash_memo_lock = threading.Lock()
 
 
 def sanitize_filename(filename: str, max_length: int = 100) -> str:
@@ -36,23 +56,87 @@ def sanitize_filename(filename: str, max_length: int = 100) -> str:
     return safe_name
 
 
-def get_file_hash(file_path: Union[str, Path]) -> str:
+def _new_hasher(algorithm: str) -> Any:
+    """
+    创建哈希对象
+
+    Args:
+        algorithm: hashlib支持的算法名称（md5、sha256、blake2b等）或xxhash算法（xxh64、xxh3_128等）
+
+    Returns:
+        哈希对象
+    """
+    if algorithm.startswith("xxh"):
+        if not XXHASH_AVAILABLE:
+            raise ImportError("请安装xxhash: pip install xxhash")
+        constructor = getattr(xxhash, algorithm, None)
+        if constructor is None:
+            raise ValueError(f"不支持的哈希算法: {algorithm}")
+        return constructor()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.new(algorithm)
+
+
+def _stat_key(file_path: Path, algorithm: str) -> Tuple[Any, ...]:
+    """生成备忘录键（文件内容变化时大小或修改时间会变化）"""
+    stat = os.stat(file_path)
+    return (str(file_path.resolve()), stat.st_ino, stat.st_size, stat.st_mtime_ns, algorithm)
+
+
+def get_file_hash(file_path: Union[str, Path], algorithm: str = "md5", use_memo: bool = True) -> str:
     """
-    基于文件内容生成MD5哈希值
+    基于文件内容生成哈希值
+
+    分块读取文件，不会把整个文件读入内存；路径、inode、大小和修改时间都没有变化的文件
+    直接返回上次计算的结果
 
     Args:
         file_path: 文件路径
+        algorithm: 哈希算法（默认md5，可选sha256、blake2b，安装xxhash后可选xxh64、xxh3_128等）
+        use_memo: 是否使用备忘录
 
     Returns:
-        文件内容的MD5哈希值
+        文件内容的哈希值（十六进制）
     """
     file_path = Path(file_path)
 
     if not file_path.exists():
         raise FileNotFoundError(f"文件不存在: {file_path}")
 
+    memo_key = _stat_key(file_path, algorithm) if use_memo else None
+    if memo_key is not None:
+        with _hash_memo_lock:
+            file_hash = _hash_memo.get(memo_key)
+            if file_hash is not None:
+                _hash_memo.move_to_end(memo_key)
+                return file_hash
+
+    hasher = _new_hasher(algorithm)
     with open(file_path, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+        buffer = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            hasher.update(view[:size])
+    file_hash = hasher.hexdigest()
+
+    # 计算期间文件被修改时不记录，下次重新计算
+    if memo_key is not None and _stat_key(file_path, algorithm) == memo_key:
+        with _hash_memo_lock:
+            _hash_memo[memo_key] = file_hash
+            while len(_hash_memo) > HASH_MEMO_MAX_ENTRIES:
+                _hash_memo.popitem(last=False)
+
+    return file_hash
+
+
+def clear_file_hash_memo() -> None:
+    """清空文件哈希备忘录"""
+    with _hash_memo_lock:
+        _hash_memo.clear()
 
 
 def get_cache_key(file_path: Union[str, Path], prompt: str) -> str:
@@ -66,6 +150,6 @@ def get_cache_key(file_path: Union[str, Path], prompt: str) -> str:
     Returns:
         缓存键
     """
-    file_hash = get_file_hash(file_path)
+    file_hash = get_file_hash(file_path, algorithm=CACHE_KEY_HASH_ALGORITHM)
     prompt_hash = hashlib.md5(prompt.encode('utf-8')).hexdigest()
     return f"{file_hash}_{prompt_hash}"
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+JSON状态文件
+同步状态、上传登记表等小型状态文件的共用读写实现：整体读取、在锁内修改、原子替换写回
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+from .file_lock import file_lock
+
+
+class JsonStateFile:
+    """
+    进程内和跨进程安全的JSON状态文件
+
+    读取不加锁（写入通过os.replace原子替换，读到的总是完整文件）；
+    修改时同时持有线程锁和文件锁，保证多个进程读-改-写同一文件时不会互相覆盖
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        初始化状态文件
+
+        Args:
+            path: 状态文件路径（父目录不存在时自动创建）
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self._thread_lock = threading.Lock()
+
+    def read(self) -> Dict[str, Any]:
+        """
+        读取状态
+
+        Returns:
+            状态字典，文件不存在或损坏时返回空字典
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        """原子写入状态文件（写入同目录下的唯一临时文件后替换）"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def modify(self) -> Iterator[Dict[str, Any]]:
+        """
+        在锁内修改状态，退出时内容有变化才写回
+
+        用法:
+            with state.modify() as data:
+                data[key] = value
+
+        代码块抛出异常时不写回
+
+        Yields:
+            可直接修改的状态字典
+        """
+        with self._thread_lock, file_lock(self._lock_path):
+            data = self.read()
+            before = json.dumps(data, sort_keys=True)
+            yield data
+            if json.dumps(data, sort_keys=True) != before:
+                self._write(data)
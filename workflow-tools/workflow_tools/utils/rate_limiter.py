@@ -0,0 +1,249 @@
+"""
+速率限制与重试策略
+令牌桶限制请求速率，重试策略使用带抖动的指数退避并遵循服务器的Retry-After提示，
+两者都是线程安全的，可以在多个线程（或多个客户端）之间共享
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+# 形如 "30s"、"1.5s" 的时长（Google API RetryInfo.retryDelay）
+_DURATION_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*s?\s*$')
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """
+    解析服务器返回的重试等待时间
+
+    支持秒数（"30"、30）、带单位的时长（"30s"）和HTTP日期格式
+
+    Args:
+        value: Retry-After头或retryDelay字段的值
+
+    Returns:
+        等待秒数，无法解析时返回None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return max(0.0, float(value))
+
+    text = str(value)
+    match = _DURATION_PATTERN.match(text)
+    if match:
+        return float(match.group(1))
+
+    try:
+        retry_at = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """
+    令牌桶速率限制器
+
+    每秒补充rate个令牌，最多积累capacity个；每次请求消耗一个令牌，令牌不足时等待。
+    收到服务器限流提示时调用pause()，所有共享该限制器的线程都会暂停请求
+    """
+
+    def __init__(self, rate: float = 0, capacity: Optional[float] = None):
+        """
+        初始化限制器
+
+        Args:
+            rate: 每秒补充的令牌数（0表示不限制速率，只处理pause）
+            capacity: 令牌桶容量（允许的突发请求数，默认等于每秒速率且至少为1）
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: Optional[float] = None) -> "RateLimiter":
+        """
+        按每分钟请求数创建限制器
+
+        Args:
+            requests_per_minute: 每分钟允许的请求数（0表示不限制）
+            burst: 允许的突发请求数（默认1，即请求均匀分布）
+
+        Returns:
+            速率限制器
+        """
+        return cls(rate=requests_per_minute / 60.0, capacity=burst if burst is not None else 1.0)
+
+    def _refill(self, now: float) -> None:
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        if now <= self._updated_at:
+            return
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌，不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            是否获取成功（超时返回False）
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:
+                    return True
+                elif self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                else:
+                    wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        暂停所有请求一段时间（如服务器返回429和Retry-After）
+
+        Args:
+            seconds: 暂停秒数
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # 暂停结束时最多只有一个令牌，避免所有等待的线程同时发出请求
+            self._tokens = min(self._tokens, 1.0)
+            self._updated_at = self._paused_until
+        self.logger.warning(f"收到限流提示，暂停请求 {seconds:.1f} 秒")
+
+
+class RetryPolicy:
+    """
+    重试策略
+
+    使用带抖动的指数退避（服务器返回等待时间时以其为准），
+    超过最大尝试次数或总截止时间时不再重试
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        deadline: Optional[float] = 600.0,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            max_attempts: 最大尝试次数（包括第一次）
+            base_delay: 第一次重试的基础等待时间（秒）
+            max_delay: 单次退避的最大等待时间（秒，不限制服务器要求的等待时间）
+            deadline: 从第一次尝试开始的总截止时间（秒），None表示不限制
+            rate_limiter: 每次尝试前获取令牌的速率限制器，服务器要求等待时暂停该限制器
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter
+
+        self.logger = logging.getLogger(__name__)
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第attempt次失败后的等待时间
+
+        Args:
+            attempt: 已失败的次数（从1开始）
+            retry_after: 服务器要求的等待时间（秒）
+
+        Returns:
+            等待秒数
+        """
+        if retry_after is not None:
+            # 服务器提示优先，加少量抖动避免多个线程同时重试
+            return retry_after + random.uniform(0, self.base_delay)
+
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # 等量抖动：至少等待一半，另一半随机
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def call(
+        self,
+        func: Callable[[], T],
+        is_retryable: Callable[[Exception], bool] = lambda error: True,
+        retry_after: Callable[[Exception], Optional[float]] = lambda error: None
+    ) -> T:
+        """
+        按策略执行函数，失败时重试
+
+        Args:
+            func: 要执行的函数
+            is_retryable: 判断异常是否可以重试
+            retry_after: 从异常中读取服务器要求的等待时间
+
+        Returns:
+            函数返回值
+
+        Raises:
+            Exception: 不可重试的异常，或重试次数/截止时间用完后的最后一个异常
+        """
+        start_time = time.monotonic()
+
+        for attempt in range(1, self.max_attempts + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            try:
+                return func()
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+
+                server_delay = retry_after(e)
+                delay = self.compute_delay(attempt, server_delay)
+                if self.deadline is not None and time.monotonic() - start_time + delay > self.deadline:
+                    self.logger.warning(f"重试等待 {delay:.1f} 秒将超过截止时间 {self.deadline} 秒，不再重试")
+                    raise
+
+                if server_delay is not None and self.rate_limiter is not None:
+                    self.rate_limiter.pause(server_delay)
+
+                self.logger.warning(
+                    f"调用失败（第 {attempt}/{self.max_attempts} 次），{delay:.1f} 秒后重试: {str(e)}"
+                )
+                time.sleep(delay)
+
+        raise RuntimeError("重试策略未执行任何尝试")
@@ -0,0 +1,138 @@
+"""
+缓存值序列化器
+CacheManager通过序列化器把缓存值转换为字节，可以按名称选择或传入自定义实现
+"""
+
+import io
+import json
+import pickle
+from typing import Any, Dict, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+class Serializer:
+    """序列化器基类"""
+
+    name = "base"
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        序列化缓存值
+
+        Args:
+            value: 缓存值
+
+        Returns:
+            序列化后的字节
+        """
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        """
+        反序列化缓存值
+
+        Args:
+            data: 序列化后的字节
+
+        Returns:
+            缓存值
+        """
+        raise NotImplementedError
+
+
+class JsonSerializer(Serializer):
+    """紧凑JSON序列化器（默认）"""
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data.decode('utf-8'))
+
+
+class MsgpackSerializer(Serializer):
+    """MessagePack序列化器（比JSON更紧凑，解析更快）"""
+
+    name = "msgpack"
+
+    def __init__(self):
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("请安装msgpack: pip install msgpack")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    """只允许基础类型的Unpickler，防止缓存文件被篡改后执行任意代码"""
+
+    ALLOWED_GLOBALS = {
+        ('builtins', 'set'),
+        ('builtins', 'frozenset'),
+        ('builtins', 'bytearray'),
+        ('builtins', 'complex'),
+        ('datetime', 'datetime'),
+        ('datetime', 'date'),
+        ('datetime', 'time'),
+        ('datetime', 'timedelta'),
+        ('datetime', 'timezone'),
+    }
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in self.ALLOWED_GLOBALS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"不允许反序列化的类型: {module}.{name}")
+
+
+class SafePickleSerializer(Serializer):
+    """
+    受限pickle序列化器
+
+    支持JSON无法表示的基础类型（bytes、set、tuple、datetime等），
+    反序列化时拒绝其他任何类
+    """
+
+    name = "pickle"
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return _SafeUnpickler(io.BytesIO(data)).load()
+
+
+SERIALIZERS: Dict[str, type] = {
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+    SafePickleSerializer.name: SafePickleSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, Serializer]) -> Serializer:
+    """
+    获取序列化器
+
+    Args:
+        serializer: 序列化器名称（json、msgpack、pickle）或序列化器实例
+
+    Returns:
+        序列化器实例
+
+    Raises:
+        ValueError: 未知的序列化器名称
+    """
+    if isinstance(serializer, Serializer):
+        return serializer
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"未知的序列化器: {serializer}，可选: {', '.join(SERIALIZERS)}")
+    return SERIALIZERS[serializer]()
@@ -0,0 +1,122 @@
+"""
+Token估算与按Token预算分块工具
+"""
+
+import math
+import re
+from typing import Iterable, List
+
+# 中日韩字符（含全角标点）通常每个字符约占1个token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+# 其他字符平均约4个字符一个token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数量（不调用模型API）
+
+    中日韩字符按每字1个token计算，其余字符按每4个字符1个token计算，
+    对中文内容偏保守，适合用于分块和预算判断
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        估算的token数量
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / CHARS_PER_TOKEN)
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """按行（单行过长时按字符）切分超过预算的文本"""
+    pieces = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if estimate_tokens(line) > max_tokens:
+            if current:
+                pieces.append(current)
+                current = ""
+            # 每个字符最多1个token，按max_tokens个字符切分一定不超过预算
+            pieces.extend(line[start:start + max_tokens] for start in range(0, len(line), max_tokens))
+            continue
+        if current and estimate_tokens(current + line) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_by_token_budget(sections: Iterable[str], max_tokens: int, separator: str = "\n") -> List[str]:
+    """
+    将多段文本按token预算合并为若干块
+
+    尽量保持每段完整（如一封邮件），多段合并到同一块直到接近预算；
+    单段超过预算时按行切分
+
+    Args:
+        sections: 文本段落（保持原有顺序）
+        max_tokens: 每块的最大token数
+        separator: 同一块内段落之间的分隔符
+
+    Returns:
+        文本块列表
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens必须大于0")
+
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    separator_tokens = estimate_tokens(separator)
+
+    for section in sections:
+        section_tokens = estimate_tokens(section)
+
+        if section_tokens > max_tokens:
+            if current:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_oversized(section, max_tokens))
+            continue
+
+        added_tokens = section_tokens + (separator_tokens if current else 0)
+        if current and current_tokens + added_tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+            added_tokens = section_tokens
+
+        current.append(section)
+        current_tokens += added_tokens
+
+    if current:
+        chunks.append(separator.join(current))
+
+    return chunks
+
+
+def compress_text(text: str) -> str:
+    """
+    压缩文本中不影响内容的部分以减少token
+
+    删除邮件回复中引用的原文（以">"开头的行）、行尾空白和连续的空白字符，
+    最多保留一个空行
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        压缩后的文本
+    """
+    lines = []
+    for line in text.splitlines():
+        if line.lstrip().startswith('>'):
+            continue
+        lines.append(re.sub(r'[ \t\u3000]+', ' ', line).rstrip())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'